@@ -0,0 +1,12 @@
+#!/bin/bash
+
+# YOUR CODE BELOW THIS LINE
+# ----------------------------------------------------------------------------
+
+
+# launching app
+exec python3 -m benchmarks.$1 "${@:2}"
+
+
+# ----------------------------------------------------------------------------
+# YOUR CODE ABOVE THIS LINE
@@ -14,7 +14,7 @@ from adanet.simulation import Simulator
 from adanet.solver import solvers
 from adanet.time import Clock
 from adanet.types.agent import AgentRole
-from adanet.types.problem import Problem
+from adanet.types.problem import Problem, ChannelCategory
 from adanet.types.report import Report
 
 
@@ -27,7 +27,7 @@ def duration_monitor(engine: Engine, duration: float, stime: float):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("role", type=str, choices=["source", "sink"],
+    parser.add_argument("role", type=str, choices=["source", "sink", "relay"],
                         help="Role of this instance")
     parser.add_argument("-a", "--agent", required=True, type=str,
                         help="Agent name")
@@ -40,6 +40,8 @@ def main():
                         help="Duration of the run, program will end once the duration is reached")
     parser.add_argument("-S", "--simulation", default=False, action="store_true",
                         help="Simulate problem")
+    parser.add_argument("-c", "--categorize", default=False, action="store_true",
+                        help="Split each channel into a 'live' and a 'cached' lane")
     parser.add_argument("-l", "--logger", required=False, type=str, default=None, choices=["wb"],
                         help="Logger to attach to the engine")
     parsed = parser.parse_args()
@@ -66,9 +68,8 @@ def main():
     print("Problem loaded:\n\t" + "\n\t".join(problem.as_yaml().splitlines()) + "\n")
 
     # extend channels to be of two types 'live/...' and 'cached/...'
-    if False:
-        # TODO: temporarily disabled
-        problem.categorize_channels(categories=["live", "cached"])
+    if parsed.categorize:
+        problem.categorize_channels(categories=[ChannelCategory.LIVE, ChannelCategory.CACHED])
 
     # activate logger (if needed)
     if parsed.logger == "wb":
@@ -78,11 +79,13 @@ def main():
     # pointers
     engine: Optional[Engine] = None
 
-    # - 'source' agent
-    if role is AgentRole.SOURCE:
+    # - 'source' and 'relay' agents
+    if role in [AgentRole.SOURCE, AgentRole.RELAY]:
         # create problem simulator (if needed)
         simulator: Optional[Simulator] = None
         if parsed.simulation:
+            if role is AgentRole.RELAY:
+                raise ValueError("Agents with role 'relay' cannot be simulated")
             simulator: Simulator = Simulator(problem)
 
         # pick the right solver
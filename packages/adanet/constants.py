@@ -11,6 +11,8 @@ PROCESS_KEY = str(uuid.uuid4())
 ZMQ_SUB_SERVER_PORT = 12345
 ZMQ_PUB_SERVER_PORT = 12346
 ZMQ_HEARTBEAT_EVERY_SEC = 1.0
+# weight of the most recent heartbeat in the estimate of the link reliability
+ZMQ_RELIABILITY_ALPHA = float(os.environ.get("ZMQ_RELIABILITY_ALPHA", 0.05))
 
 IFACE_BANDWIDTH_CHECK_EVERY_SECS = float(os.environ.get("IFACE_BANDWIDTH_CHECK_EVERY_SECS", 1.0))
 IFACE_PING_CHECK_EVERY_SECS = float(os.environ.get("IFACE_PING_CHECK_EVERY_SECS", 1))
@@ -18,9 +20,57 @@ IFACE_PING_CHECK_EVERY_SECS = float(os.environ.get("IFACE_PING_CHECK_EVERY_SECS"
 IFACE_MIN_BANDWIDTH_BYTES_SEC = 8
 IFACE_BANDWIDTH_OPTIMISM = 1.0
 
+# bandwidth estimation (see `adanet.types.misc.estimators` for the available estimators)
+IFACE_BANDWIDTH_ESTIMATOR = os.environ.get("IFACE_BANDWIDTH_ESTIMATOR", "ewma")
+# number of standard deviations below the mean used as the usable bandwidth
+IFACE_BANDWIDTH_CONFIDENCE = float(os.environ.get("IFACE_BANDWIDTH_CONFIDENCE", 1.0))
+
+# closed-loop rate control
+# - how often the receiving side reports what it received
+RATE_FEEDBACK_EVERY_SECS = float(os.environ.get("RATE_FEEDBACK_EVERY_SECS", 1.0))
+# - fraction of frames lost and delay growth (secs/sec) above which the link is congested
+RATE_LOSS_THRESHOLD = float(os.environ.get("RATE_LOSS_THRESHOLD", 0.02))
+RATE_DELAY_GRADIENT_THRESHOLD = float(os.environ.get("RATE_DELAY_GRADIENT_THRESHOLD", 0.05))
+# - multiplicative decrease (of the goodput) and additive increase (fraction of the goodput)
+RATE_DECREASE_FACTOR = float(os.environ.get("RATE_DECREASE_FACTOR", 0.85))
+RATE_INCREASE_FRACTION = float(os.environ.get("RATE_INCREASE_FRACTION", 0.05))
+# - burst allowed by the rate limiter (in seconds of traffic at the current rate)
+RATE_BURST_SEC = float(os.environ.get("RATE_BURST_SEC", 0.5))
+
 NETWORK_LOG_EVERY_SECS = float(os.environ.get("NETWORK_LOG_EVERY_SECS", 2))
 NETWORK_IFACES_DISCOVERY_EVERY_SECS = float(os.environ.get("NETWORK_IFACES_DISCOVERY_EVERY_SECS", 2))
 
+# workers (pool of threads converting messages off the threads that receive them)
+WORKER_POOL_SIZE = int(os.environ.get("WORKER_POOL_SIZE", 4))
+# - max number of ROS messages waiting to be converted, per topic (oldest dropped first)
+ROS_INGEST_RING_SIZE = int(os.environ.get("ROS_INGEST_RING_SIZE", 32))
+# - max number of ROS messages buffered by rospy, per topic
+ROS_SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("ROS_SUBSCRIBER_QUEUE_SIZE", 32))
+
+# sinks and backpressure
+# - max number of messages waiting to be processed by a sink
+SINK_QUEUE_SIZE = int(os.environ.get("SINK_QUEUE_SIZE", 100))
+# - how often the sinks report their backlog to the source
+BACKPRESSURE_EVERY_SECS = float(os.environ.get("BACKPRESSURE_EVERY_SECS", 1.0))
+# - fraction of the sink queue above which the source throttles the channel and below
+#   which it stops throttling it
+BACKPRESSURE_HIGH_WATERMARK = float(os.environ.get("BACKPRESSURE_HIGH_WATERMARK", 0.5))
+BACKPRESSURE_LOW_WATERMARK = float(os.environ.get("BACKPRESSURE_LOW_WATERMARK", 0.1))
+# - a throttled channel is sent at this fraction of the sink throughput (so the backlog drains)
+BACKPRESSURE_DRAIN_FACTOR = float(os.environ.get("BACKPRESSURE_DRAIN_FACTOR", 0.8))
+
+# relays (store-and-forward)
+# - messages not acknowledged by the next hop within this time (in seconds) are sent again
+CUSTODY_TIMEOUT_SEC = float(os.environ.get("CUSTODY_TIMEOUT_SEC", 30.0))
+# - how often relays look for expired messages
+CUSTODY_CHECK_EVERY_SECS = float(os.environ.get("CUSTODY_CHECK_EVERY_SECS", 5.0))
+
+# metered links
+# - file the bytes sent through each interface are persisted to (survives restarts)
+BUDGET_PATH = os.environ.get("BUDGET_PATH", "/tmp/adanet/budget.json")
+# - how often the totals are written to disk and the burn rate is sampled
+BUDGET_FLUSH_EVERY_SECS = float(os.environ.get("BUDGET_FLUSH_EVERY_SECS", 5.0))
+
 CHANNELS_LOG_EVERY_SECS = float(os.environ.get("CHANNELS_LOG_EVERY_SECS", 2))
 
 ZEROCONF_PREFIX = "_adanet._tcp.local."
@@ -29,9 +79,74 @@ ALLOW_DEVICE_TYPES = os.environ.get("ALLOW_DEVICE_TYPES", "all").split(",")
 
 FORMULATE_PROBLEM_EVERY_SEC = 4.0
 
+# event-triggered re-solving
+# - minimum time (in seconds) between two solutions
+SOLVE_MIN_SPACING_SEC = float(os.environ.get("SOLVE_MIN_SPACING_SEC", 0.5))
+# - the problem is solved again at least this often (in seconds) even if nothing changes
+SOLVE_FALLBACK_EVERY_SEC = float(os.environ.get("SOLVE_FALLBACK_EVERY_SEC", 30.0))
+# - relative change of the bandwidth of a link that triggers a new solution
+SOLVE_BANDWIDTH_CHANGE = float(os.environ.get("SOLVE_BANDWIDTH_CHANGE", 0.25))
+# - growth (in number of messages) of the queue of a channel that triggers a new solution
+SOLVE_QUEUE_GROWTH = int(os.environ.get("SOLVE_QUEUE_GROWTH", 10))
+
+# contacts (intermittent links)
+# - forecasted availability above which a link is expected to come up in the next window
+CONTACT_PREDICTED_AVAILABILITY = float(os.environ.get("CONTACT_PREDICTED_AVAILABILITY", 0.5))
+# - seconds of contact worth of backlog read ahead (into memory) before/as a contact begins
+PRESTAGE_HORIZON_SEC = float(os.environ.get("PRESTAGE_HORIZON_SEC", 10))
+# - max memory (in bytes) used by the backlog read ahead (across all channels)
+PRESTAGE_MAX_BYTES = int(os.environ.get("PRESTAGE_MAX_BYTES", 16 * 1024 * 1024))
+# - number of messages read ahead (or dropped from disk once sent) at once
+PRESTAGE_BATCH = int(os.environ.get("PRESTAGE_BATCH", 32))
+
+# link forecasting (expressed in number of problem windows)
+FORECAST_HORIZON_WINDOWS = int(os.environ.get("FORECAST_HORIZON_WINDOWS", 8))
+FORECAST_HISTORY_WINDOWS = int(os.environ.get("FORECAST_HISTORY_WINDOWS", 256))
+
+# striping of large messages across multiple links
+STRIPING_MIN_SIZE = int(os.environ.get("STRIPING_MIN_SIZE", 64 * 1024))
+STRIPING_CHUNK_SIZE = int(os.environ.get("STRIPING_CHUNK_SIZE", 16 * 1024))
+STRIPING_REASSEMBLY_TIMEOUT_SEC = float(os.environ.get("STRIPING_REASSEMBLY_TIMEOUT_SEC", 60))
+
+# fragmentation of messages larger than the link MTU (max size in bytes of a serialized fragment)
+IFACE_MTU_PPP = int(os.environ.get("IFACE_MTU_PPP", 512))
+IFACE_MTU_WIFI = int(os.environ.get("IFACE_MTU_WIFI", 1024 * 1024))
+IFACE_MTU_ETHERNET = int(os.environ.get("IFACE_MTU_ETHERNET", 1024 * 1024))
+# max number of fragments sent and not acknowledged yet
+FRAGMENTATION_WINDOW = int(os.environ.get("FRAGMENTATION_WINDOW", 8))
+# fragments not acknowledged within this time (plus twice the link latency) are sent again
+FRAGMENTATION_RETRANSMIT_AFTER_SEC = float(os.environ.get("FRAGMENTATION_RETRANSMIT_AFTER_SEC", 5))
+FRAGMENTATION_MAX_PENDING_TRANSFERS = int(os.environ.get("FRAGMENTATION_MAX_PENDING_TRANSFERS", 16))
+# memory (in bytes) the sink can use to hold partially received messages
+FRAGMENTATION_REASSEMBLY_MEMORY = int(os.environ.get("FRAGMENTATION_REASSEMBLY_MEMORY", 8 * 1024 * 1024))
+
+# inbound queue of each adapter (max number of frames waiting to be processed)
+INBOX_SIZE = int(os.environ.get("INBOX_SIZE", 64))
+# max number of frames buffered by the receiving socket of a link
+PIPE_RCVHWM = int(os.environ.get("PIPE_RCVHWM", 16))
+
+# outbound queue of each adapter
+# - max number of frames waiting to be sent
+OUTBOX_SIZE = int(os.environ.get("OUTBOX_SIZE", 64))
+# - time (in seconds) a frame has to wait for its priority to grow by one (starvation guard)
+OUTBOX_AGING_SEC = float(os.environ.get("OUTBOX_AGING_SEC", 2.0))
+
+# forward error correction (XOR parity over groups of messages)
+# - links losing less than this fraction of messages do not need FEC
+FEC_MIN_LOSS = float(os.environ.get("FEC_MIN_LOSS", 0.01))
+FEC_MIN_GROUP_SIZE = int(os.environ.get("FEC_MIN_GROUP_SIZE", 2))
+FEC_MAX_GROUP_SIZE = int(os.environ.get("FEC_MAX_GROUP_SIZE", 16))
+
 # solvers
 DEFAULT_SOLVER = "SimpleSolver"
 
+# receding horizon solver
+MPC_HORIZON_WINDOWS = int(os.environ.get("MPC_HORIZON_WINDOWS", FORECAST_HORIZON_WINDOWS))
+# time (in seconds) over which the budget of metered links has to last
+MPC_BUDGET_HORIZON_SEC = float(os.environ.get("MPC_BUDGET_HORIZON_SEC", 3600))
+# fraction of the best bandwidth in the horizon above which a link is good for bulk transfers
+MPC_BULK_BANDWIDTH_FRACTION = float(os.environ.get("MPC_BULK_BANDWIDTH_FRACTION", 0.25))
+
 # reports
 REPORT_PRECISION_SEC = 0.5
 
@@ -44,3 +159,19 @@ WANDB_OFFLINE = os.environ.get("WANDB_OFFLINE", "0").lower() in ["1", "true", "y
 # persist-queue
 QUEUE_PATH = os.environ.get("QUEUE_PATH", "/tmp/queue")
 os.makedirs(QUEUE_PATH, exist_ok=True)
+# - max number of messages kept by the 'cached' lane of a channel (-1 means unbounded)
+CACHED_QUEUE_SIZE = int(os.environ.get("CACHED_QUEUE_SIZE", -1))
+# - durability of the sqlite queues (see `adanet.queue.base.QueueDurability`)
+QUEUE_DURABILITY = os.environ.get("QUEUE_DURABILITY", "batch").lower()
+# - operations committed together (durability 'batch' and 'off')
+QUEUE_COMMIT_BATCH = int(os.environ.get("QUEUE_COMMIT_BATCH", 64))
+# - max time (in seconds) an operation waits to be committed (durability 'batch' and 'off')
+QUEUE_COMMIT_EVERY_SEC = float(os.environ.get("QUEUE_COMMIT_EVERY_SEC", 0.2))
+# - bytes a (large) cache queue keeps in memory before spilling to disk
+QUEUE_MEMORY_BYTES = int(os.environ.get("QUEUE_MEMORY_BYTES", 8 * 1024 * 1024))
+# - size of the files spilled messages are stored in
+QUEUE_SEGMENT_BYTES = int(os.environ.get("QUEUE_SEGMENT_BYTES", 1024 * 1024))
+# - storage of the persistent queues, one of 'sqlite', 'log'
+QUEUE_PERSISTENT_BACKEND = os.environ.get("QUEUE_PERSISTENT_BACKEND", "sqlite").lower()
+# - size of the files the 'log' backend writes messages to
+QUEUE_LOG_SEGMENT_BYTES = int(os.environ.get("QUEUE_LOG_SEGMENT_BYTES", 64 * 1024 * 1024))
@@ -0,0 +1,120 @@
+import dataclasses
+from threading import Semaphore
+from typing import Dict, Optional, Callable, List
+
+from adanet.constants import CONTACT_PREDICTED_AVAILABILITY, PRESTAGE_HORIZON_SEC
+from adanet.time import Clock
+from adanet.types.problem import LinkForecast
+
+
+@dataclasses.dataclass
+class Contact:
+    interface: str
+    start: float
+    end: Optional[float] = None
+    # bytes sent through the link during the contact
+    delivered: int = 0
+    # bytes the link could have carried during the contact
+    capacity: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return (Clock.time() if self.end is None else self.end) - self.start
+
+    @property
+    def utilisation(self) -> float:
+        return self.delivered / self.capacity if self.capacity > 0 else 0.0
+
+    def report(self) -> dict:
+        return {
+            "duration": self.duration,
+            "delivered": self.delivered,
+            "capacity": self.capacity,
+            "utilisation": self.utilisation,
+        }
+
+
+class ContactMonitor:
+    """
+    Follows the contacts of intermittent links (e.g., a glider surfacing next to a drone).
+
+    A contact begins when a link comes up and ends when it goes down. Interested parties are
+    told when a contact begins or is expected to begin in the next problem window (see
+    `on_contact`) together with the amount of data the contact is expected to carry in its
+    first `horizon` seconds.
+
+    :param sent:    function returning the total number of bytes sent through an interface
+    """
+
+    def __init__(self, sent: Callable[[str], int], horizon: float = PRESTAGE_HORIZON_SEC,
+                 availability: float = CONTACT_PREDICTED_AVAILABILITY):
+        self._sent: Callable[[str], int] = sent
+        self._horizon: float = horizon
+        self._availability: float = availability
+        self._lock: Semaphore = Semaphore()
+        # ongoing contacts
+        self._contacts: Dict[str, Contact] = {}
+        # bytes sent through the interface when the contact began
+        self._sent_at_start: Dict[str, int] = {}
+        # time and bandwidth of the last reading
+        self._last_reading: Dict[str, float] = {}
+        self._bandwidth: Dict[str, float] = {}
+        self._callbacks: List[Callable[[str, float], None]] = []
+
+    def on_contact(self, callback: Callable[[str, float], None]):
+        """
+        Registers a function to call with the interface and the expected size (in bytes) of a
+        contact that is beginning or is about to begin.
+        """
+        self._callbacks.append(callback)
+
+    def contact(self, interface: str) -> Optional[Contact]:
+        return self._contacts.get(interface, None)
+
+    def predict(self, interface: str, forecast: Optional[LinkForecast]):
+        """
+        Announces a contact if the given link, currently down, is expected to come up in the
+        next problem window.
+        """
+        if interface in self._contacts or forecast is None or not forecast.availability:
+            return
+        if forecast.availability[0] < self._availability:
+            return
+        self._notify(interface, forecast.bandwidth[0] * self._horizon)
+
+    def observe(self, interface: str, connected: bool, bandwidth: float) -> Optional[Contact]:
+        """
+        Records a new reading for the given link.
+
+        :param interface:   name of the link's network interface
+        :param connected:   whether the link is currently up
+        :param bandwidth:   bandwidth (bytes/sec) the link can currently carry
+        :return:            the contact that just ended (if any)
+        """
+        now: float = Clock.time()
+        ended: Optional[Contact] = None
+        began: bool = False
+        with self._lock:
+            contact: Optional[Contact] = self._contacts.get(interface, None)
+            # accumulate the capacity of the ongoing contact
+            if contact is not None:
+                elapsed: float = now - self._last_reading.get(interface, now)
+                contact.capacity += self._bandwidth.get(interface, 0.0) * elapsed
+                contact.delivered = self._sent(interface) - self._sent_at_start[interface]
+            self._last_reading[interface] = now
+            self._bandwidth[interface] = bandwidth if connected else 0.0
+            # contacts begin and end
+            if connected and contact is None:
+                self._contacts[interface] = Contact(interface, start=now)
+                self._sent_at_start[interface] = self._sent(interface)
+                began = True
+            elif not connected and contact is not None:
+                contact.end = now
+                ended = self._contacts.pop(interface)
+        if began:
+            self._notify(interface, bandwidth * self._horizon)
+        return ended
+
+    def _notify(self, interface: str, expected: float):
+        for callback in self._callbacks:
+            callback(interface, expected)
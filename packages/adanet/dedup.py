@@ -0,0 +1,113 @@
+import hashlib
+from threading import Semaphore
+from typing import Dict, Optional
+
+from adanet.constants import INFTY
+from adanet.time import Clock
+
+# header of the (empty) messages sent in place of a payload identical to the previous one,
+# carries the digest of the payload (see `Deduplicator.digest`)
+UNCHANGED_HEADER = "unchanged"
+
+
+class Deduplicator:
+    """
+    Recognizes payloads identical to the last one sent on a channel.
+
+    Payloads are compared through their hash. A repeated payload is sent again in full at
+    least once every `window` seconds so that the other side recovers from a lost message.
+    """
+
+    def __init__(self, window: Optional[float] = None):
+        self._window: float = INFTY if window is None else window
+        self._lock: Semaphore = Semaphore()
+        self._digest: Optional[bytes] = None
+        self._last_full: float = -INFTY
+        # statistics
+        self._messages: int = 0
+        self._suppressed: int = 0
+        self._bytes_saved: int = 0
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "suppressed": self._suppressed,
+            "ratio": self._suppressed / self._messages if self._messages else 0.0,
+            "bytes_saved": self._bytes_saved,
+        }
+
+    @staticmethod
+    def digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def unchanged(self, data: bytes, digest: Optional[bytes] = None) -> bool:
+        """
+        Tells whether the given payload is the same as the last one sent (within the window).
+        Payloads for which this returns False are assumed to be sent in full.
+
+        :param data:    the payload
+        :param digest:  digest of the payload, if already known
+        :return:        whether the payload can be replaced by a marker
+        """
+        digest = self.digest(data) if digest is None else digest
+        now: float = Clock.time()
+        with self._lock:
+            self._messages += 1
+            if digest == self._digest and now - self._last_full < self._window:
+                self._suppressed += 1
+                self._bytes_saved += len(data)
+                return True
+            self._digest = digest
+            self._last_full = now
+            return False
+
+
+class Republisher:
+    """
+    Receiving end of a `Deduplicator`, stands the last payload received on a channel in for
+    the markers sent in place of a repeated payload.
+
+    Markers carry the digest of the payload they stand for, a marker that does not match the
+    last payload received (e.g., the original was lost) is dropped rather than republishing
+    stale data.
+    """
+
+    def __init__(self):
+        self._lock: Semaphore = Semaphore()
+        self._payload: Optional[bytes] = None
+        # digest of the last payload, computed when the first marker comes
+        self._digest: Optional[bytes] = None
+        # statistics
+        self._republished: int = 0
+        self._mismatched: int = 0
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "republished": self._republished,
+            "mismatched": self._mismatched,
+        }
+
+    def received(self, data: bytes):
+        """
+        Records a payload received in full.
+        """
+        with self._lock:
+            self._payload = data
+            self._digest = None
+
+    def resolve(self, digest: bytes) -> Optional[bytes]:
+        """
+        Payload the marker with the given digest stands for.
+
+        :param digest:  digest carried by the marker
+        :return:        the payload, None if it is not the last one received
+        """
+        with self._lock:
+            if self._payload is not None and self._digest is None:
+                self._digest = Deduplicator.digest(self._payload)
+            if self._payload is None or digest != self._digest:
+                self._mismatched += 1
+                return None
+            self._republished += 1
+            return self._payload
@@ -1,8 +1,10 @@
 from threading import Thread
 from time import sleep
-from typing import Type, Optional, List
+from typing import Type, Optional, List, Tuple
 
-from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC
+from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC, SOLVE_FALLBACK_EVERY_SEC
+from adanet.contact import ContactMonitor, Contact
+from adanet.forecast import LinkForecaster
 from adanet.networking import Adapter
 from adanet.networking.manager import NetworkManager
 from adanet.simulation import Simulator
@@ -10,9 +12,11 @@ from adanet.solver.base import AbsSolver
 from adanet.source.base import ISource
 from adanet.switchboard import Switchboard
 from adanet.time import Clock
+from adanet.trigger import SolveTrigger, Snapshot
 from adanet.types import Shuttable
 from adanet.types.agent import AgentRole
-from adanet.types.problem import Problem, Link, Channel
+from adanet.types.misc import Reminder
+from adanet.types.problem import Problem, Link, Channel, LinkForecast
 from adanet.types.report import Report
 from adanet.types.solution import Solution
 from adanet.utils import indent_block
@@ -28,11 +32,11 @@ class Engine(Shuttable, Thread):
         Thread.__init__(self, daemon=True)
         self._role: AgentRole = role
         self._solver: Optional[AbsSolver] = None
-        # - ROBOT mode
-        if role is AgentRole.SOURCE:
-            # make sure a solver is given when running in SOURCE mode
+        # - ROBOT mode (relays solve the problem of the links facing downstream)
+        if role in [AgentRole.SOURCE, AgentRole.RELAY]:
+            # make sure a solver is given when running in SOURCE/RELAY mode
             if solver is None:
-                raise ValueError("A 'solver' is required when 'role=SOURCE'")
+                raise ValueError(f"A 'solver' is required when 'role={role.name}'")
             # instantiate solver
             self._solver: AbsSolver = solver()
         # ---
@@ -43,11 +47,24 @@ class Engine(Shuttable, Thread):
         self._switchboard: Switchboard = Switchboard(role=role, problem=problem,
                                                      simulation=simulation)
         self._zeroconf: ZeroconfListener = ZeroconfListener(role)
+        self._forecaster: LinkForecaster = LinkForecaster()
+        # links are observed once per window, whether the problem is solved again or not
+        self._observation: Reminder = Reminder(period=FORMULATE_PROBLEM_EVERY_SEC,
+                                               right_away=True)
         # link network manager and switchboard
         self._network_manager.switchboard = self._switchboard
         self._switchboard.network_manager = self._network_manager
         # tell the network manager to notify zeroconf of any new network interface
         self._network_manager.on_new_interface(self._zeroconf.on_new_network_interface)
+        # solve the problem again when something significant happens (the simulator changes
+        # the problem on its own schedule, so fall back to solving it at every window)
+        self._trigger: SolveTrigger = SolveTrigger(
+            fallback=FORMULATE_PROBLEM_EVERY_SEC if simulation else SOLVE_FALLBACK_EVERY_SEC)
+        self._network_manager.on_new_interface(lambda _: self._trigger.notify("link/new"))
+        self._network_manager.on_interface_lost(lambda _: self._trigger.notify("link/lost"))
+        # read the backlog ahead when a contact begins or is expected to begin
+        self._contacts: ContactMonitor = ContactMonitor(sent=self._network_manager.budget.spent)
+        self._contacts.on_contact(lambda _, expected: self._switchboard.prestage(expected))
 
     def start(self):
         # reset clock
@@ -70,25 +87,13 @@ class Engine(Shuttable, Thread):
             problem = self._simulator.step()
         else:
             # start from an empty problem
-            links: List[Link] = []
             channels: List[Channel] = []
             # add channels to the problem
             for channel in self._problem.channels:
                 new_channel: Channel = channel.copy(deep=True)
                 channels.append(new_channel)
-            # add links to the problem
-            for adapter in self._network_manager.adapters:
-                # use the statistics collector to formulate a new problem
-                links.append(Link(
-                    interface=adapter.device.interface,
-                    # TODO: perhaps we should use a combination of IN and OUT bandwidth
-                    bandwidth=adapter.bandwidth_out,
-                    latency=adapter.latency,
-                    # TODO: this is not used
-                    reliability=1.0,
-                ))
             # compile the problem
-            problem: Problem = Problem(links=links, channels=channels)
+            problem: Problem = Problem(links=self._links(), channels=channels)
 
         # update channels with real data
         for channel in problem.channels:
@@ -99,14 +104,87 @@ class Engine(Shuttable, Thread):
             channel.size = source.size
             # update current queue length
             channel.queue_length = source.queue_length
+        # simulated links only change when the simulator steps, i.e., once per solution
+        if self._simulator:
+            self._observe_links(problem.links)
         # remove adapters that have no signal
         for link in list(problem.links):
-            adapter: Optional[Adapter] = self._network_manager.adapter(link.interface)
-            if adapter is None or not adapter.is_connected:
+            if not self._is_available(link.interface):
                 problem.links.remove(link)
+        # attach the forecasts to the links
+        for link in problem.links:
+            link.forecast = self._forecaster.forecast(link.interface)
+        # metered links can only use what is left of their budget (across runs)
+        for link in problem.links:
+            remaining: Optional[float] = self._network_manager.remaining_budget(link.interface)
+            if remaining is not None:
+                link.budget = remaining
         # ---
         return problem
 
+    def _links(self) -> List[Link]:
+        links: List[Link] = []
+        for adapter in self._network_manager.adapters:
+            # links facing upstream (relays only) cannot be used to send data
+            if adapter.role is AgentRole.SINK:
+                continue
+            # use the statistics collector to formulate a new problem
+            links.append(Link(
+                interface=adapter.device.interface,
+                # TODO: perhaps we should use a combination of IN and OUT bandwidth
+                # NOTE: we plan on the lower confidence bound of the bandwidth estimate
+                #       rather than on the last (noisy) reading, capped by the goodput
+                #       the other side reports (see `RateController`)
+                bandwidth=adapter.planned_bandwidth_out,
+                latency=adapter.latency,
+                reliability=adapter.reliability,
+            ))
+        return links
+
+    def _is_available(self, interface: str) -> bool:
+        adapter: Optional[Adapter] = self._network_manager.adapter(interface)
+        return adapter is not None and adapter.is_connected
+
+    def _observe_links(self, links: List[Link]):
+        # learn the links' patterns
+        for link in links:
+            available: bool = self._is_available(link.interface)
+            self._forecaster.observe(link.interface, link.bandwidth or 0.0, available)
+            if not available:
+                # get ready for links that are expected to come up soon
+                forecast: Optional[LinkForecast] = self._forecaster.forecast(link.interface)
+                self._contacts.predict(link.interface, forecast)
+
+    def _snapshot(self) -> Snapshot:
+        return Snapshot(
+            links={
+                adapter.device.interface: (adapter.is_connected, adapter.planned_bandwidth_out)
+                for adapter in self._network_manager.adapters
+            },
+            queues={
+                channel.name: self._switchboard.source(channel.name).queue_length
+                for channel in self._problem.channels
+            },
+            spent={
+                adapter.device.interface:
+                    self._network_manager.budget.spent(adapter.device.interface)
+                for adapter in self._network_manager.adapters
+                if self._network_manager.remaining_budget(adapter.device.interface) is not None
+            },
+        )
+
+    def _follow_contacts(self):
+        for adapter in self._network_manager.adapters:
+            # links facing upstream (relays only) are not ours to use
+            if adapter.role is AgentRole.SINK:
+                continue
+            interface: str = adapter.device.interface
+            contact: Optional[Contact] = self._contacts.observe(
+                interface, adapter.is_connected, adapter.planned_bandwidth_out)
+            # log how much of the contact we used
+            if contact is not None:
+                Report.log({f"contact/{interface}": contact.report()})
+
     def _solve_problem(self) -> Solution:
         stime = Clock.true_time()
         solution = self._solver.solve(self._problem)
@@ -115,30 +193,40 @@ class Engine(Shuttable, Thread):
         return solution
 
     def run(self):
-        stime: float = Clock.time()
-        solution: Optional[Solution] = None
-        # ---
         while not self.is_shutdown:
             # - ROBOT mode
-            if self._role is AgentRole.SOURCE:
-                # is it time for a new problem?
-                if Clock.time() - stime >= FORMULATE_PROBLEM_EVERY_SEC:
-                    print("Formulating new problem...")
-                    solution = None
-                    stime = Clock.time()
+            if self._role in [AgentRole.SOURCE, AgentRole.RELAY]:
+                # did anything significant change since the last solution?
+                now: float = Clock.time()
+                snapshot: Snapshot = self._snapshot()
+                self._trigger.observe(snapshot)
+                self._follow_contacts()
+                if self._simulator is None and self._observation.is_time():
+                    self._observe_links(self._links())
+                due: Optional[Tuple[float, str]] = self._trigger.due()
                 # solve problem (if needed)
-                if solution is None:
+                if due is not None:
+                    event_time, reason = due
+                    print(f"Formulating new problem ({reason})...")
                     self._problem = self._formulate_new_problem()
                     print(f"Problem definition:\n{indent_block(self._problem.as_yaml())}\n")
                     # log new problem
                     Report.log(self._problem)
                     print("Solving new problem...", end='')
-                    solution = self._solve_problem()
+                    solution: Solution = self._solve_problem()
                     print(f"Solution found:\n{indent_block(solution.as_yaml())}\n")
                     # log new solution
                     Report.log(solution)
                     # inform the switchboard of a new solution
                     self._switchboard.update_solution(solution)
+                    self._trigger.solved(snapshot, since=now)
+                    # log how long it took to react to the event
+                    Report.log({
+                        "engine": {
+                            "trigger": reason,
+                            "reaction_time": Clock.time() - event_time,
+                        }
+                    })
             # let the switchbox do its job
             sleep(Clock.period(0.1))
         # stop simulator (if any)
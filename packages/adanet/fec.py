@@ -0,0 +1,185 @@
+import uuid
+from collections import OrderedDict
+from math import floor
+from threading import Semaphore
+from typing import Dict, List, Optional
+
+from adanet.constants import FEC_MIN_LOSS, FEC_MIN_GROUP_SIZE, FEC_MAX_GROUP_SIZE
+from adanet.types.message import Message
+
+
+def _xor(payloads: List[bytes]) -> bytes:
+    size: int = max([len(p) for p in payloads] or [0])
+    parity: int = 0
+    for p in payloads:
+        parity ^= int.from_bytes(p.ljust(size, b"\0"), "little")
+    return parity.to_bytes(size, "little")
+
+
+class FECEncoder:
+    """
+    Systematic XOR parity encoder.
+
+    Messages are sent as they are (tagged with their position within a group of `k` messages)
+    and one parity message is sent after each group, this allows the other side to recover
+    any single message lost within a group without waiting for a retransmission.
+    """
+
+    def __init__(self):
+        self._group: str = uuid.uuid4().hex
+        self._k: int = 0
+        self._payloads: List[bytes] = []
+        self._stamps: List[float] = []
+        # headers of the messages, restored with the message recovered (e.g., dedup markers)
+        self._headers: List[dict] = []
+        self._lock: Semaphore = Semaphore()
+        # statistics
+        self._parity: int = 0
+
+    @property
+    def group_size(self) -> int:
+        return self._k
+
+    @property
+    def parity(self) -> int:
+        return self._parity
+
+    @staticmethod
+    def group_size_for(reliability: float) -> int:
+        """
+        Group size that keeps the expected number of messages lost per group (parity included)
+        around 1/2. Zero means that the link is reliable enough to not need FEC.
+
+        :param reliability:     probability of a message to be delivered
+        :return:                number of messages protected by each parity message
+        """
+        loss: float = 1.0 - reliability
+        if loss < FEC_MIN_LOSS:
+            return 0
+        return int(max(FEC_MIN_GROUP_SIZE, min(FEC_MAX_GROUP_SIZE, floor(0.5 / loss) - 1)))
+
+    def encode(self, message: Message, reliability: float) -> List[Message]:
+        """
+        Tags the given message and returns the messages to send, i.e., the message itself and
+        the parity message if this message completes a group.
+
+        :param message:         the message to protect
+        :param reliability:     current reliability of the link(s) the message will travel on
+        :return:                the messages to send
+        """
+        with self._lock:
+            # the group size can only change at the beginning of a new group
+            if not self._payloads:
+                self._k = self.group_size_for(reliability)
+            if self._k == 0:
+                return [message]
+            index: int = len(self._payloads)
+            self._payloads.append(message.payload)
+            self._stamps.append(message.stamp)
+            self._headers.append(message.headers)
+            out: List[Message] = [Message(
+                channel=message.channel,
+                stamp=message.stamp,
+                payload=message.payload,
+                headers={
+                    **message.headers,
+                    "fec": {"group": self._group, "index": index, "k": self._k},
+                },
+                priority=message.priority,
+            )]
+            # close the group
+            if len(self._payloads) == self._k:
+                out.append(Message(
+                    channel=message.channel,
+                    stamp=message.stamp,
+                    payload=_xor(self._payloads),
+                    headers={
+                        "fec": {
+                            "group": self._group,
+                            "index": self._k,
+                            "k": self._k,
+                            "sizes": [len(p) for p in self._payloads],
+                            "stamps": self._stamps,
+                            "headers": self._headers,
+                        },
+                    },
+                    priority=message.priority,
+                ))
+                self._parity += 1
+                self._group = uuid.uuid4().hex
+                self._payloads = []
+                self._stamps = []
+                self._headers = []
+            return out
+
+
+class FECDecoder:
+    """
+    Decoder for the messages produced by `FECEncoder`.
+    Only the last `history` groups are kept in memory.
+    """
+
+    class Group:
+
+        def __init__(self, k: int):
+            self.k: int = k
+            self.payloads: Dict[int, bytes] = {}
+            self.parity: Optional[Message] = None
+            self.recovered: bool = False
+
+    def __init__(self, history: int = 32):
+        self._history: int = history
+        self._groups: Dict[str, FECDecoder.Group] = OrderedDict()
+        self._lock: Semaphore = Semaphore()
+        # statistics
+        self._recovered: int = 0
+
+    @property
+    def recovered(self) -> int:
+        return self._recovered
+
+    def decode(self, message: Message) -> List[Message]:
+        """
+        Processes a message received.
+
+        :param message:     the message received
+        :return:            the messages to deliver, i.e., the message itself (unless it is a
+                            parity or duplicate message) and the message recovered (if any)
+        """
+        header: dict = message.headers["fec"]
+        out: List[Message] = []
+        with self._lock:
+            group: Optional[FECDecoder.Group] = self._groups.get(header["group"], None)
+            if group is None:
+                group = FECDecoder.Group(header["k"])
+                self._groups[header["group"]] = group
+                while len(self._groups) > self._history:
+                    self._groups.popitem(last=False)
+            index: int = header["index"]
+            if index == group.k:
+                group.parity = message
+            elif index not in group.payloads:
+                group.payloads[index] = message.payload
+                out.append(Message(
+                    channel=message.channel,
+                    stamp=message.stamp,
+                    payload=message.payload,
+                    headers={k: v for k, v in message.headers.items() if k != "fec"},
+                ))
+            # recover the missing message (if only one is missing)
+            if group.parity is not None and not group.recovered and \
+                    len(group.payloads) == group.k - 1:
+                missing: int = (set(range(group.k)) - set(group.payloads.keys())).pop()
+                parity: dict = group.parity.headers["fec"]
+                payload: bytes = _xor([group.parity.payload, *group.payloads.values()])
+                payload = payload[:parity["sizes"][missing]]
+                group.payloads[missing] = payload
+                group.recovered = True
+                self._recovered += 1
+                out.append(Message(
+                    channel=message.channel,
+                    stamp=parity["stamps"][missing],
+                    payload=payload,
+                    headers=parity.get("headers", [{}] * group.k)[missing],
+                ))
+        return out
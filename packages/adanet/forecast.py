@@ -0,0 +1,181 @@
+from collections import deque
+from threading import Semaphore
+from typing import Deque, Dict, List, Optional
+
+from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC, FORECAST_HISTORY_WINDOWS, \
+    FORECAST_HORIZON_WINDOWS
+from adanet.time import Clock
+from adanet.types.problem import LinkForecast
+
+# minimum correlation between the history and its shifted self for a period to be accepted
+PERIOD_CORRELATION_THRESHOLD = 0.5
+# number of windows averaged together when the link does not show a periodic pattern
+FLAT_FORECAST_WINDOWS = 4
+
+
+class LinkHistory:
+    """
+    History of bandwidth and availability readings of a link, binned in problem windows.
+    """
+
+    def __init__(self, window: float, size: int):
+        self._window: float = window
+        self._bandwidth: Deque[float] = deque(maxlen=size)
+        self._availability: Deque[float] = deque(maxlen=size)
+        # current (open) bin
+        self._bin: Optional[int] = None
+        self._bin_bandwidth: float = 0.0
+        self._bin_availability: float = 0.0
+        self._bin_samples: int = 0
+
+    @property
+    def bandwidth(self) -> List[float]:
+        return list(self._bandwidth) + \
+               ([self._bin_bandwidth / self._bin_samples] if self._bin_samples else [])
+
+    @property
+    def availability(self) -> List[float]:
+        return list(self._availability) + \
+               ([self._bin_availability / self._bin_samples] if self._bin_samples else [])
+
+    def observe(self, t: float, bandwidth: float, available: bool):
+        b: int = int(t // self._window)
+        if self._bin is None:
+            self._bin = b
+        if b > self._bin:
+            self._close_bin()
+            # windows in which we did not hear about the link repeat the last reading
+            missing: int = min(b - self._bin - 1, self._bandwidth.maxlen)
+            if self._bandwidth:
+                for _ in range(missing):
+                    self._bandwidth.append(self._bandwidth[-1])
+                    self._availability.append(self._availability[-1])
+            self._bin = b
+        # accumulate
+        self._bin_bandwidth += bandwidth
+        self._bin_availability += float(available)
+        self._bin_samples += 1
+
+    def _close_bin(self):
+        if self._bin_samples <= 0:
+            return
+        self._bandwidth.append(self._bin_bandwidth / self._bin_samples)
+        self._availability.append(self._bin_availability / self._bin_samples)
+        self._bin_bandwidth = 0.0
+        self._bin_availability = 0.0
+        self._bin_samples = 0
+
+
+class LinkForecaster:
+    """
+    Learns per-link bandwidth/availability patterns and predicts the next problem windows.
+
+    Periodic links (e.g., gliders surfacing on a schedule, drones flying patterns) are
+    detected through the autocorrelation of the effective bandwidth (bandwidth x availability)
+    and forecasted with a seasonal average over the past periods. Links without a periodic
+    pattern get a flat forecast equal to their recent average.
+    """
+
+    def __init__(self, window: float = FORMULATE_PROBLEM_EVERY_SEC,
+                 history: int = FORECAST_HISTORY_WINDOWS):
+        self._window: float = window
+        self._history: int = history
+        self._links: Dict[str, LinkHistory] = {}
+        self._lock: Semaphore = Semaphore()
+
+    def observe(self, interface: str, bandwidth: float, available: bool,
+                t: Optional[float] = None):
+        """
+        Records a new reading for the given link.
+
+        :param interface:   name of the link's network interface
+        :param bandwidth:   bandwidth (bytes/sec) measured on the link
+        :param available:   whether the link is currently usable
+        :param t:           time of the reading (defaults to now)
+        """
+        t = Clock.time() if t is None else t
+        with self._lock:
+            if interface not in self._links:
+                self._links[interface] = LinkHistory(self._window, self._history)
+            self._links[interface].observe(t, bandwidth if available else 0.0, available)
+
+    def forecast(self, interface: str, horizon: int = FORECAST_HORIZON_WINDOWS) -> \
+            Optional[LinkForecast]:
+        """
+        Predicts bandwidth and availability of the given link for the next `horizon` windows.
+
+        :param interface:   name of the link's network interface
+        :param horizon:     number of future problem windows to predict
+        :return:            the forecast or None if the link was never observed
+        """
+        with self._lock:
+            history: Optional[LinkHistory] = self._links.get(interface, None)
+            if history is None:
+                return None
+            bandwidth: List[float] = history.bandwidth
+            availability: List[float] = history.availability
+        if not bandwidth:
+            return None
+        effective: List[float] = [b * a for b, a in zip(bandwidth, availability)]
+        period: Optional[int] = self.find_period(effective)
+        if period is None:
+            return LinkForecast(
+                bandwidth=[self._flat(bandwidth)] * horizon,
+                availability=[self._flat(availability)] * horizon,
+                period=None,
+            )
+        return LinkForecast(
+            bandwidth=self._seasonal(bandwidth, period, horizon),
+            availability=self._seasonal(availability, period, horizon),
+            period=period,
+        )
+
+    @staticmethod
+    def find_period(series: List[float], min_period: int = 2,
+                    threshold: float = PERIOD_CORRELATION_THRESHOLD) -> Optional[int]:
+        """
+        Finds the period of a series as the first local maximum of its autocorrelation.
+        At least two full periods are needed for a period to be detected.
+
+        :param series:      the series to analyze
+        :param min_period:  shortest period to look for
+        :param threshold:   minimum autocorrelation for a period to be accepted
+        :return:            the period (in number of samples) or None
+        """
+        n: int = len(series)
+        max_lag: int = n // 2
+        if max_lag < min_period + 1:
+            return None
+        mean: float = sum(series) / n
+        centered: List[float] = [v - mean for v in series]
+        variance: float = sum(v * v for v in centered)
+        if variance <= 0:
+            return None
+        acf: List[float] = [1.0]
+        for lag in range(1, max_lag + 1):
+            cov: float = sum(centered[i] * centered[i + lag] for i in range(n - lag))
+            # unbiased estimate, shorter overlaps are scaled up
+            acf.append((cov / variance) * (n / (n - lag)))
+        for lag in range(min_period, max_lag):
+            if acf[lag] >= threshold and acf[lag] >= acf[lag - 1] and acf[lag] >= acf[lag + 1]:
+                return lag
+        return None
+
+    @staticmethod
+    def _flat(series: List[float]) -> float:
+        recent: List[float] = series[-FLAT_FORECAST_WINDOWS:]
+        return sum(recent) / len(recent)
+
+    @staticmethod
+    def _seasonal(series: List[float], period: int, horizon: int) -> List[float]:
+        n: int = len(series)
+        forecast: List[float] = []
+        for h in range(1, horizon + 1):
+            # the window `h` steps ahead shares the phase of these windows in the past
+            samples: List[float] = []
+            i: int = n - 1 + h - period * (((h - 1) // period) + 1)
+            while i >= 0:
+                samples.append(series[i])
+                i -= period
+            forecast.append(sum(samples) / len(samples))
+        return forecast
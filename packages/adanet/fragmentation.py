@@ -0,0 +1,269 @@
+import uuid
+from collections import OrderedDict, deque
+from math import ceil
+from threading import Semaphore
+from typing import Dict, List, Tuple, Optional, Deque
+
+from adanet.constants import FRAGMENTATION_WINDOW, FRAGMENTATION_RETRANSMIT_AFTER_SEC, \
+    FRAGMENTATION_MAX_PENDING_TRANSFERS, FRAGMENTATION_REASSEMBLY_MEMORY
+from adanet.time import Clock
+from adanet.types.message import Message, ControlMessage
+
+FRAGMENT_ACK = "fragment/ack"
+
+
+class FragmentSender:
+    """
+    Cuts messages into fragments that fit the link MTU and keeps track of which fragments
+    were acknowledged by the other side.
+
+    Fragments are sent in order with at most `window` fragments in flight. Fragments that are
+    not acknowledged in time are sent again starting from the first one not acknowledged
+    (go-back-N), this is also what happens after a reconnection (see `rewind`), so that
+    transfers resume from the last fragment received instead of starting over.
+    """
+
+    class Transfer:
+
+        def __init__(self, transfer_id: str, fragments: List[Message]):
+            self.id: str = transfer_id
+            self.fragments: List[Message] = fragments
+            # index of the first fragment not acknowledged yet
+            self.acked: int = 0
+            # index of the next fragment to send
+            self.next: int = 0
+            self.last_progress: float = Clock.time()
+
+        @property
+        def count(self) -> int:
+            return len(self.fragments)
+
+    def __init__(self, window: int = FRAGMENTATION_WINDOW,
+                 retransmit_after: float = FRAGMENTATION_RETRANSMIT_AFTER_SEC,
+                 max_pending: int = FRAGMENTATION_MAX_PENDING_TRANSFERS):
+        self._window: int = max(1, window)
+        self._retransmit_after: float = retransmit_after
+        self._max_pending: int = max(1, max_pending)
+        self._transfers: Dict[str, FragmentSender.Transfer] = OrderedDict()
+        self._lock: Semaphore = Semaphore()
+        # statistics
+        self._sent: int = 0
+        self._retransmitted: int = 0
+        self._dropped: int = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._transfers)
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "pending": self.pending,
+            "sent": self._sent,
+            "retransmitted": self._retransmitted,
+            "dropped": self._dropped,
+        }
+
+    @staticmethod
+    def split(message: Message, mtu: int) -> List[Message]:
+        """
+        Splits the given message into fragments whose serialized size does not exceed `mtu`.
+
+        :param message:     the message to split
+        :param mtu:         maximum size (in bytes) of a serialized fragment
+        :return:            the list of fragments
+        """
+        transfer_id: str = uuid.uuid4().hex
+
+        def fragment(index: int, count: int, payload: bytes) -> Message:
+            return Message(
+                channel=message.channel,
+                stamp=message.stamp,
+                payload=payload,
+                headers={
+                    **message.headers,
+                    "fragment": {"id": transfer_id, "index": index, "count": count},
+                },
+                priority=message.priority,
+            )
+
+        # measure the overhead of a fragment (worst case, biggest index and count)
+        overhead: int = len(fragment(len(message.payload), len(message.payload), b"").serialize())
+        # NOTE: cbor uses up to 9 bytes to encode the length of the payload
+        chunk_size: int = max(1, mtu - overhead - 9)
+        count: int = max(1, int(ceil(len(message.payload) / chunk_size)))
+        return [
+            fragment(i, count, message.payload[i * chunk_size:(i + 1) * chunk_size])
+            for i in range(count)
+        ]
+
+    def push(self, message: Message, mtu: int):
+        """
+        Queues the given message for a fragmented transfer. The oldest transfer is dropped
+        when too many are pending.
+        """
+        fragments: List[Message] = self.split(message, mtu)
+        transfer_id: str = fragments[0].headers["fragment"]["id"]
+        with self._lock:
+            while len(self._transfers) >= self._max_pending:
+                self._transfers.popitem(last=False)
+                self._dropped += 1
+            self._transfers[transfer_id] = FragmentSender.Transfer(transfer_id, fragments)
+
+    def ack(self, transfer_id: str, received: int):
+        """
+        Processes an acknowledgement from the other side.
+
+        :param transfer_id:     the transfer being acknowledged
+        :param received:        number of consecutive fragments (from the first) received
+        """
+        with self._lock:
+            transfer: Optional[FragmentSender.Transfer] = self._transfers.get(transfer_id, None)
+            if transfer is None:
+                return
+            if received >= transfer.count:
+                del self._transfers[transfer_id]
+                return
+            if received > transfer.acked:
+                transfer.acked = received
+                transfer.next = max(transfer.next, received)
+                transfer.last_progress = Clock.time()
+            elif received < transfer.acked:
+                # the other side dropped (part of) the transfer (see `Defragmenter._evict`),
+                # resume from what it still has
+                self._retransmitted += transfer.next - received
+                transfer.acked = transfer.next = received
+                transfer.last_progress = Clock.time()
+
+    def rewind(self):
+        """
+        Makes all the transfers resume from the first fragment not acknowledged yet.
+        """
+        with self._lock:
+            for transfer in self._transfers.values():
+                transfer.next = transfer.acked
+                transfer.last_progress = Clock.time()
+
+    def due(self, latency: float = 0.0, limit: Optional[int] = None) -> List[Message]:
+        """
+        Returns the fragments to send now.
+
+        :param latency:     current latency (in seconds) of the link, used to size the timeout
+        :param limit:       maximum number of fragments to return (e.g., to respect a rate limit)
+        :return:            the fragments to send, in order
+        """
+        now: float = Clock.time()
+        timeout: float = self._retransmit_after + 2 * latency
+        out: List[Message] = []
+        with self._lock:
+            in_flight: int = 0
+            for transfer in self._transfers.values():
+                # nothing acknowledged in a while, go back to the first fragment not acknowledged
+                if transfer.next > transfer.acked and now - transfer.last_progress > timeout:
+                    self._retransmitted += transfer.next - transfer.acked
+                    transfer.next = transfer.acked
+                    transfer.last_progress = now
+                in_flight += transfer.next - transfer.acked
+                while transfer.next < transfer.count and in_flight < self._window and \
+                        (limit is None or len(out) < limit):
+                    out.append(transfer.fragments[transfer.next])
+                    transfer.next += 1
+                    in_flight += 1
+                if in_flight >= self._window:
+                    break
+            self._sent += len(out)
+        return out
+
+
+class Defragmenter:
+    """
+    Collects fragments and rebuilds the original messages.
+
+    Partially received messages are kept as long as the memory they use stays within
+    `memory` bytes, the least recently updated ones are evicted first.
+    """
+
+    class Transfer:
+
+        def __init__(self, count: int):
+            self.count: int = count
+            self.fragments: Dict[int, bytes] = {}
+            self.size: int = 0
+
+        @property
+        def received(self) -> int:
+            """
+            Number of consecutive fragments (from the first) received.
+            """
+            i: int = 0
+            while i in self.fragments:
+                i += 1
+            return i
+
+    def __init__(self, memory: int = FRAGMENTATION_REASSEMBLY_MEMORY, history: int = 128):
+        self._memory: int = memory
+        self._transfers: Dict[str, Defragmenter.Transfer] = OrderedDict()
+        self._completed: Deque[str] = deque(maxlen=history)
+        self._used: int = 0
+        self._lock: Semaphore = Semaphore()
+        # statistics
+        self._evicted: int = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._transfers)
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "reassembly/pending": self.pending,
+            "reassembly/memory": self._used,
+            "reassembly/evicted": self._evicted,
+        }
+
+    def add(self, fragment: Message) -> Tuple[Optional[Message], ControlMessage]:
+        """
+        Adds a fragment to the reassembly buffer.
+
+        :param fragment:    the fragment received
+        :return:            the original message when the last fragment arrives (None otherwise)
+                            and the acknowledgement to send back
+        """
+        header: dict = fragment.headers["fragment"]
+        transfer_id: str = header["id"]
+        with self._lock:
+            # this is a duplicate of a fragment of a message we already rebuilt
+            if transfer_id in self._completed:
+                return None, self._ack(transfer_id, header["count"])
+            transfer: Optional[Defragmenter.Transfer] = self._transfers.get(transfer_id, None)
+            if transfer is None:
+                transfer = Defragmenter.Transfer(header["count"])
+                self._transfers[transfer_id] = transfer
+            self._transfers.move_to_end(transfer_id)
+            if header["index"] not in transfer.fragments:
+                transfer.fragments[header["index"]] = fragment.payload
+                transfer.size += len(fragment.payload)
+                self._used += len(fragment.payload)
+            if len(transfer.fragments) < transfer.count:
+                self._evict()
+                return None, self._ack(transfer_id, transfer.received)
+            # message complete
+            del self._transfers[transfer_id]
+            self._used -= transfer.size
+            self._completed.append(transfer_id)
+        # rebuild message
+        headers: dict = {k: v for k, v in fragment.headers.items() if k != "fragment"}
+        payload: bytes = b"".join(transfer.fragments[i] for i in range(transfer.count))
+        message: Message = Message(fragment.channel, fragment.stamp, payload, headers)
+        return message, self._ack(transfer_id, transfer.count)
+
+    def _evict(self):
+        # evict the least recently updated transfers (but never the one just updated)
+        while self._used > self._memory and len(self._transfers) > 1:
+            _, transfer = self._transfers.popitem(last=False)
+            self._used -= transfer.size
+            self._evicted += 1
+
+    @staticmethod
+    def _ack(transfer_id: str, received: int) -> ControlMessage:
+        return ControlMessage(FRAGMENT_ACK, {"id": transfer_id, "received": received})
@@ -4,9 +4,9 @@ import uuid
 from abc import ABC, abstractmethod
 from enum import Enum
 from ipaddress import IPv4Network, IPv4Address
-from threading import Thread
+from threading import Thread, Event
 from time import sleep
-from typing import Optional, Dict, Iterable
+from typing import Optional, Dict, Iterable, Callable, List
 
 import netifaces
 import psutil
@@ -14,22 +14,31 @@ from pythonping import ping
 from pythonping.executor import Response
 from zeroconf import ServiceNameAlreadyRegistered, NonUniqueNameException
 
+from .outbox import Outbox
 from .pipe import Pipe
+from .rate import RateController
 from ..constants import \
     IFACE_BANDWIDTH_CHECK_EVERY_SECS, \
     IFACE_PING_CHECK_EVERY_SECS, \
     IFACE_BANDWIDTH_OPTIMISM, \
+    IFACE_BANDWIDTH_ESTIMATOR, \
+    IFACE_BANDWIDTH_CONFIDENCE, \
     IFACE_MIN_BANDWIDTH_BYTES_SEC, \
+    IFACE_MTU_ETHERNET, \
+    RATE_FEEDBACK_EVERY_SECS, \
+    INBOX_SIZE, \
     DEBUG, \
     ZERO, \
     INFTY
 from ..exceptions import InterfaceNotFoundError
+from ..fragmentation import FragmentSender, Defragmenter, FRAGMENT_ACK
 from ..time import Clock
 from ..types import Shuttable
 from ..types.agent import AgentRole
-from ..types.message import Message
-from ..types.misc import Reminder, MaxWindow
+from ..types.message import Message, ControlMessage
+from ..types.misc import Reminder, MaxWindow, IEstimator, TokenBucket, estimators
 from ..types.network import NetworkDevice, IAdapter, INetworkManager
+from ..workers import workers, Lane
 from ..zeroconf import zc
 from ..zeroconf.services import NetworkPeerService
 
@@ -53,9 +62,25 @@ class Adapter(Shuttable, IAdapter, ABC):
         self._latency: float = 0.0
         self._bandwidth_in: MaxWindow = MaxWindow()
         self._bandwidth_out: MaxWindow = MaxWindow()
+        if IFACE_BANDWIDTH_ESTIMATOR not in estimators:
+            raise ValueError(f"Bandwidth estimator '{IFACE_BANDWIDTH_ESTIMATOR}' not recognized, "
+                             f"available estimators are {list(estimators.keys())}")
+        self._bandwidth_out_estimator: IEstimator = estimators[IFACE_BANDWIDTH_ESTIMATOR]()
         self._device: NetworkDevice = device
         self._remote: Optional[IPv4Address] = remote
         self._pipe: Pipe = Pipe()
+        # fragmentation
+        self._fragment_sender: FragmentSender = FragmentSender()
+        self._defragmenter: Defragmenter = Defragmenter()
+        self._control_cbs: Dict[str, Callable[[dict], None]] = {}
+        self.on_control(FRAGMENT_ACK, self._on_fragment_ack)
+        # rate control
+        self._rate_controller: RateController = RateController()
+        # outbound queue
+        self._outbox: Outbox = Outbox()
+        # inbound queue (the mailman only drains the socket, the shared workers do the rest)
+        self._inbox: Lane = workers.lane(f"adapter/{device.interface}", self.recv, INBOX_SIZE)
+        self.on_control("feedback", self._rate_controller.update)
         if self._role is AgentRole.SOURCE and self._remote:
             print(f"Forcing interface '{device.interface}' to talk to remote IP {self._remote}")
         # role: sink (server)
@@ -77,6 +102,9 @@ class Adapter(Shuttable, IAdapter, ABC):
         self._ping_worker = AdapterPingWorker(self)
         self._reconnect_worker = AdapterReconnectWorker(self)
         self._mailman_worker = AdapterMailman(self, self._pipe)
+        self._postman_worker = AdapterPostman(self, self._pipe, self._outbox,
+                                              self._fragment_sender)
+        self._feedback_worker = AdapterFeedbackWorker(self, self._pipe)
         # debug
         if DEBUG:
             self._debug_worker = AdapterDebugger(self)
@@ -206,6 +234,8 @@ class Adapter(Shuttable, IAdapter, ABC):
         self._ping_worker.start()
         self._reconnect_worker.start()
         self._mailman_worker.start()
+        self._postman_worker.start()
+        self._feedback_worker.start()
         if DEBUG:
             self._debug_worker.start()
 
@@ -225,17 +255,61 @@ class Adapter(Shuttable, IAdapter, ABC):
         if not self.is_connected:
             # TODO: mark the message as 'lost'
             return
-        # serialize message
-        data: bytes = message.serialize()
-        # send data to the socket
-        self._pipe.send(data)
+        # serialize message (unless its payload alone exceeds the link MTU)
+        data: Optional[bytes] = message.serialize() if len(message.payload) <= self.mtu else None
+        # messages whose frame does not fit the link MTU are fragmented
+        if data is None or len(data) > self.mtu:
+            self._fragment_sender.push(message, self.mtu)
+            self._postman_worker.wake_up()
+            return
+        # queue message according to its priority
+        self._outbox.put(data, message.priority)
+        self._postman_worker.wake_up()
 
     def recv(self, data: bytes):
         # deserialize message
         message: Message = Message.deserialize(data)
+        # reassemble fragmented messages
+        if "fragment" in message.headers:
+            message, ack = self._defragmenter.add(message)
+            self.send_control(ack)
+            if message is None:
+                return
         # send message up to the network manager
         self._network_manager.recv(self.name, message)
 
+    def send_control(self, message: ControlMessage):
+        """
+        Sends a control message to the adapter on the other side of the link.
+        """
+        data: bytes = message.serialize()
+        self._pipe.send_control(data)
+
+    def sent(self, size: int):
+        """
+        Accounts for bytes that actually left through this adapter.
+        """
+        self._network_manager.charge(self.name, size)
+
+    def recv_control(self, data: bytes):
+        # deserialize message
+        message: ControlMessage = ControlMessage.deserialize(data)
+        callback: Optional[Callable[[dict], None]] = self._control_cbs.get(message.type, None)
+        if callback is None:
+            print(f"Received control message of unknown type '{message.type}'")
+            return
+        callback(message.data)
+
+    def on_control(self, type: str, callback: Callable[[dict], None]):
+        """
+        Registers a callback for the control messages of the given type.
+        """
+        self._control_cbs[type] = callback
+
+    def _on_fragment_ack(self, data: dict):
+        self._fragment_sender.ack(data["id"], data["received"])
+        self._postman_worker.wake_up()
+
     def bind(self):
         if self.ip_address is None:
             return
@@ -282,6 +356,43 @@ class Adapter(Shuttable, IAdapter, ABC):
         # reconnect
         self._pipe.reconnect(str(server_ip), sub_port=server_port)
 
+    @property
+    def mtu(self) -> int:
+        """
+        Maximum size (in bytes) of a serialized message sent as a single frame, bigger messages
+        are fragmented.
+
+        :return: the MTU of the interface
+        """
+        return IFACE_MTU_ETHERNET
+
+    @property
+    def rate_controller(self) -> RateController:
+        return self._rate_controller
+
+    @property
+    def rate_statistics(self) -> Dict[str, float]:
+        return self._rate_controller.statistics
+
+    @property
+    def outbox_statistics(self) -> Dict[str, float]:
+        return self._outbox.statistics
+
+    @property
+    def inbox(self) -> Lane:
+        return self._inbox
+
+    @property
+    def inbox_statistics(self) -> Dict[str, float]:
+        return self._inbox.statistics
+
+    @property
+    def fragmentation_statistics(self) -> Dict[str, float]:
+        return {
+            **self._fragment_sender.statistics,
+            **self._defragmenter.statistics,
+        }
+
     @property
     def bandwidth_in(self) -> float:
         return self._bandwidth_in.last
@@ -294,6 +405,15 @@ class Adapter(Shuttable, IAdapter, ABC):
     def latency(self) -> float:
         return self._latency
 
+    @property
+    def reliability(self) -> float:
+        """
+        Estimated probability of a message sent through this interface to be delivered.
+
+        :return: the reliability of the interface
+        """
+        return self._pipe.reliability
+
     def set_bandwidth_in(self, value: float) -> float:
         """
         Sets a new value for the interface IN bandwidth. Returns the old value.
@@ -312,6 +432,7 @@ class Adapter(Shuttable, IAdapter, ABC):
         """
         old = self._bandwidth_out.last
         self._bandwidth_out.add(value)
+        self._bandwidth_out_estimator.add(value)
         return old
 
     def set_latency(self, value: float) -> float:
@@ -357,6 +478,38 @@ class Adapter(Shuttable, IAdapter, ABC):
         projection: float = 1 + IFACE_BANDWIDTH_OPTIMISM
         return max(IFACE_MIN_BANDWIDTH_BYTES_SEC, self._bandwidth_out.value * projection)
 
+    @property
+    def bandwidth_out_estimator(self) -> IEstimator:
+        """
+        The statistical estimator tracking the interface OUT bandwidth.
+
+        :return: the OUT bandwidth estimator
+        """
+        return self._bandwidth_out_estimator
+
+    @property
+    def usable_bandwidth_out(self) -> float:
+        """
+        Conservative estimate of the interface OUT bandwidth, i.e., the lower confidence
+        bound of the bandwidth estimator.
+        :return: usable value for bandwidth in bytes/sec
+        """
+        if (not self.is_active) or (not self.has_link):
+            return 0
+        return self._bandwidth_out_estimator.lower_bound(IFACE_BANDWIDTH_CONFIDENCE)
+
+    @property
+    def planned_bandwidth_out(self) -> float:
+        """
+        Bandwidth (bytes/sec) the solver should plan on, i.e., the usable OUT bandwidth capped
+        by the send rate allowed by the rate controller, which follows the goodput achieved
+        according to the other side.
+        :return: planned value for bandwidth in bytes/sec
+        """
+        usable: float = self.usable_bandwidth_out
+        rate: Optional[float] = self._rate_controller.rate
+        return usable if rate is None else min(usable, rate)
+
     def __del__(self):
         if hasattr(self, "_zeroconf_srv") and self._zeroconf_srv is not None:
             # de-register services
@@ -380,13 +533,68 @@ class AdapterMailman(Thread, Shuttable):
                 continue
             # noinspection PyBroadException
             try:
-                data: bytes = self._pipe.recv()
+                level, data = self._pipe.recv()
+                # control messages are consumed by the adapter
+                if level == Pipe.CONTROL:
+                    self._adapter.recv_control(data)
+                    continue
+                # send data to adapter
+                if self._adapter.role is AgentRole.SINK:
+                    self._adapter.inbox.push(data)
             except Exception:
                 print(traceback.format_exc())
+
+
+class AdapterPostman(Thread, Shuttable):
+    """
+    Sends the frames queued in the adapter's outbox (in order of priority) as fast as the
+    rate controller allows, including the fragments of the messages that do not fit the
+    link MTU.
+    """
+
+    def __init__(self, adapter: Adapter, pipe: Pipe, outbox: Outbox, sender: FragmentSender):
+        Thread.__init__(self, daemon=True)
+        Shuttable.__init__(self)
+        # ---
+        self._adapter: Adapter = adapter
+        self._pipe: Pipe = pipe
+        self._outbox: Outbox = outbox
+        self._sender: FragmentSender = sender
+        self._event: Event = Event()
+        self._was_connected: bool = False
+
+    def wake_up(self):
+        self._event.set()
+
+    def run(self) -> None:
+        while not self.is_shutdown:
+            self._event.wait(Clock.period(0.1))
+            self._event.clear()
+            if not self._adapter.is_connected:
+                self._was_connected = False
                 continue
-            # send data to adapter
-            if self._adapter.role is AgentRole.SINK:
-                self._adapter.recv(data)
+            # resume transfers from the last fragment acknowledged after a reconnection
+            if not self._was_connected:
+                self._sender.rewind()
+                self._was_connected = True
+            # noinspection PyBroadException
+            try:
+                # queue the fragments that are due (as long as there is room for them)
+                fragments: List[Message] = self._sender.due(latency=self._adapter.latency,
+                                                            limit=self._outbox.free)
+                for fragment in fragments:
+                    self._outbox.put(fragment.serialize(), fragment.priority)
+                # send as much as the rate controller allows
+                bucket: TokenBucket = self._adapter.rate_controller.bucket
+                while True:
+                    data: Optional[bytes] = self._outbox.peek()
+                    if data is None or not bucket.allows(len(data)):
+                        break
+                    self._outbox.pop()
+                    bucket.charge(len(data))
+                    self._pipe.send(data)
+            except Exception:
+                print(traceback.format_exc())
 
 
 class IAdapterWorker(Thread, Shuttable):
@@ -461,6 +669,10 @@ class AdapterBandwidthWorker(IAdapterWorker):
         used_since: float = used_overall - self._bytes
         bw_since: float = used_since / (now - self._last)
         self._set_bandwidth(bw_since)
+        # metered links are billed for everything that leaves the interface (heartbeats,
+        # control messages, transport overhead), not just for our frames
+        if self._direction is AdapterBandwidthWorker.BandwidthDirection.OUT and used_since > 0:
+            self._adapter.sent(int(used_since))
         # move cursors
         self._last = now
         self._bytes = used_overall
@@ -527,6 +739,26 @@ class AdapterReconnectWorker(IAdapterWorker):
                 self._last_time_connected = Clock.time()
 
 
+class AdapterFeedbackWorker(IAdapterWorker):
+    """
+    Tells the other side what we received from it (see `RateController`).
+    """
+
+    def __init__(self, adapter: Adapter, pipe: Pipe):
+        super(AdapterFeedbackWorker, self).__init__(
+            adapter,
+            frequency=1.0 / Clock.period(RATE_FEEDBACK_EVERY_SECS),
+        )
+        self._pipe: Pipe = pipe
+
+    def _step(self):
+        if not self._adapter.is_connected:
+            return
+        feedback: Optional[dict] = self._pipe.collect_feedback()
+        if feedback is not None:
+            self._adapter.send_control(ControlMessage("feedback", feedback))
+
+
 class AdapterDebugger(IAdapterWorker):
 
     def __init__(self, adapter: Adapter):
@@ -545,4 +777,10 @@ Interface: {self._adapter.name}
   Bandwidth IN (estimated):   {self._adapter.estimated_bandwidth_in or 0:.0f} B/s
   Bandwidth OUT (used):       {self._adapter.bandwidth_out or 0:.0f} B/s
   Bandwidth OUT (estimated):  {self._adapter.estimated_bandwidth_out or 0:.0f} B/s
+  Bandwidth OUT (mean):       {self._adapter.bandwidth_out_estimator.mean:.0f} B/s
+  Bandwidth OUT (std):        {self._adapter.bandwidth_out_estimator.std:.0f} B/s
+  Bandwidth OUT (usable):     {self._adapter.usable_bandwidth_out or 0:.0f} B/s
+  Reliability:                {self._adapter.reliability:.3f}
+  Rate (allowed):             {self._adapter.rate_controller.rate or 0:.0f} B/s
+  Goodput (achieved):         {self._adapter.rate_controller.goodput or 0:.0f} B/s
 -----------------------------------------------""")
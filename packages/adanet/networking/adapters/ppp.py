@@ -4,10 +4,21 @@ from typing import Optional
 import netifaces
 
 from .. import Adapter
+from ...constants import IFACE_MTU_PPP
 
 
 class PPPAdapter(Adapter):
 
+    @property
+    def mtu(self) -> int:
+        """
+        Slow serial links (e.g., acoustic, freewave) lose entire messages when the link blips,
+        so messages are sent in small fragments.
+
+        :return: the MTU of the interface
+        """
+        return IFACE_MTU_PPP
+
     @property
     def ip_network(self) -> Optional[IPv4Network]:
         """
@@ -1,5 +1,9 @@
 from .. import Adapter
+from ...constants import IFACE_MTU_WIFI
 
 
 class WifiAdapter(Adapter):
-    pass
+
+    @property
+    def mtu(self) -> int:
+        return IFACE_MTU_WIFI
@@ -0,0 +1,111 @@
+import json
+import os
+from collections import defaultdict
+from threading import Semaphore
+from typing import Dict, Optional
+
+from ..constants import BUDGET_PATH
+from ..time import Clock
+from ..types.misc import EWMAEstimator
+
+
+class BudgetLedger:
+    """
+    Keeps the running total of the bytes sent through each interface.
+
+    Totals are persisted to `path` so that the budget of metered links is not reset when the
+    agent restarts. The file is replaced atomically (write to a temporary file, fsync, rename),
+    so a crash leaves either the old or the new totals on disk, never a partial file.
+    """
+
+    def __init__(self, path: str = BUDGET_PATH):
+        self._path: str = path
+        self._lock: Semaphore = Semaphore()
+        self._spent: Dict[str, int] = defaultdict(lambda: 0)
+        self._spent.update(self._load())
+        # burn rate (bytes/sec) sampled at every flush
+        self._burn_rate: Dict[str, EWMAEstimator] = defaultdict(EWMAEstimator)
+        self._last_flush: float = Clock.time()
+        self._last_spent: Dict[str, int] = dict(self._spent)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def charge(self, interface: str, size: int):
+        """
+        Accounts for `size` bytes sent through the given interface.
+        """
+        with self._lock:
+            self._spent[interface] += size
+
+    def spent(self, interface: str) -> int:
+        return self._spent.get(interface, 0)
+
+    def remaining(self, interface: str, budget: Optional[float]) -> Optional[float]:
+        """
+        Budget left on the given interface, None if the interface is not metered.
+        """
+        if budget is None:
+            return None
+        return max(0.0, budget - self.spent(interface))
+
+    def burn_rate(self, interface: str) -> float:
+        estimator: Optional[EWMAEstimator] = self._burn_rate.get(interface, None)
+        return estimator.mean if estimator is not None else 0.0
+
+    def statistics(self, interface: str, budget: Optional[float]) -> Dict[str, float]:
+        stats: Dict[str, float] = {
+            "spent": self.spent(interface),
+            "burn_rate": self.burn_rate(interface),
+        }
+        remaining: Optional[float] = self.remaining(interface, budget)
+        if remaining is not None:
+            burn_rate: float = stats["burn_rate"]
+            stats["remaining"] = remaining
+            # time (in seconds) until the budget is exhausted at the current burn rate
+            stats["exhausted_in"] = remaining / burn_rate if burn_rate > 0 else None
+        return stats
+
+    def flush(self):
+        """
+        Samples the burn rate and writes the totals to disk.
+        """
+        now: float = Clock.time()
+        with self._lock:
+            spent: Dict[str, int] = dict(self._spent)
+            elapsed: float = now - self._last_flush
+            if elapsed > 0:
+                for interface, total in spent.items():
+                    delta: int = total - self._last_spent.get(interface, 0)
+                    self._burn_rate[interface].add(delta / elapsed)
+            self._last_flush = now
+            self._last_spent = spent
+            self._write(spent)
+
+    def _load(self) -> Dict[str, int]:
+        if not os.path.isfile(self._path):
+            return {}
+        try:
+            with open(self._path, "rt") as fin:
+                return {k: int(v) for k, v in json.load(fin).items()}
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"ERROR: Could not read the budget ledger '{self._path}', starting from "
+                  f"zero. The exception generated is:\n{str(e)}")
+            return {}
+
+    def _write(self, spent: Dict[str, int]):
+        directory: str = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path: str = f"{self._path}.tmp"
+        with open(tmp_path, "wt") as fout:
+            json.dump(spent, fout, sort_keys=True)
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.replace(tmp_path, self._path)
+        # make the rename itself durable
+        fd: int = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
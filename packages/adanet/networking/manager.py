@@ -7,18 +7,21 @@ from typing import Set, Dict, Type, Tuple, List, Callable, Optional
 from pyroute2 import IPRoute, IW
 
 from . import Adapter
+from .budget import BudgetLedger
 from .adapters.ethernet import EthernetAdapter
 from .adapters.ppp import PPPAdapter
 from .adapters.wifi import WifiAdapter
 from ..asyncio import Task, loop
+from ..queue.custody import CUSTODY_ACK
 from ..constants import \
     ALLOW_DEVICE_TYPES, \
     NETWORK_LOG_EVERY_SECS, \
-    NETWORK_IFACES_DISCOVERY_EVERY_SECS
+    NETWORK_IFACES_DISCOVERY_EVERY_SECS, \
+    BUDGET_FLUSH_EVERY_SECS
 from ..time import Clock
 from ..types import Shuttable
 from ..types.agent import AgentRole
-from ..types.message import Message
+from ..types.message import Message, ControlMessage
 from ..types.misc import FlowWatch
 from ..types.network import NetworkDevice, NetworkDeviceType, INetworkManager, ISwitchboard
 from ..types.problem import Problem, Link
@@ -45,6 +48,13 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
         self._known_links: Dict[str, Link] = {}
         for link in problem.links:
             self._known_links[link.interface] = link
+        # relays need to know which side of each link they are on
+        if self._role is AgentRole.RELAY:
+            for link in problem.links:
+                if link.role not in [AgentRole.SOURCE, AgentRole.SOURCE.value,
+                                     AgentRole.SINK, AgentRole.SINK.value]:
+                    raise ValueError(f"Agents with role 'relay' need a 'role' ('source' or "
+                                     f"'sink') for each link, link '{link.interface}' has none.")
         # if a problem is given and the 'links' are populated, stick to those links
         self._whitelisted_links: Optional[Set[str]] = None
         if self._problem.links is not None:
@@ -58,11 +68,16 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
         # statistics
         self._interface_flowwatch: Dict[str, FlowWatch] = defaultdict(FlowWatch)
         self._channel_flowwatch: Dict[str, FlowWatch] = defaultdict(FlowWatch)
+        # bytes sent through each interface (persisted across runs)
+        self._budget: BudgetLedger = BudgetLedger()
+        self.register_shutdown_callback(self._budget.flush)
         # network APIs
         self._ip = IPRoute()
         self._iw = IW()
         # create network monitor task
         self._monitor_task: Task = NetworkMonitorTask(period=Clock.period(NETWORK_LOG_EVERY_SECS))
+        # create budget task (persists the bytes sent and samples the burn rate)
+        self._budget_task: Task = NetworkBudgetTask(period=Clock.period(BUDGET_FLUSH_EVERY_SECS))
 
     @property
     def switchboard(self) -> ISwitchboard:
@@ -76,6 +91,10 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
     def adapters(self) -> Set[Adapter]:
         return set(self._adapters.values())
 
+    @property
+    def budget(self) -> BudgetLedger:
+        return self._budget
+
     @property
     def link_statistics(self) -> Dict[str, Dict[str, float]]:
         with self._lock:
@@ -85,7 +104,31 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
                     "frequency": vw.frequency,
                     "volume": vw.volume,
                     "speed": vw.speed,
-                    "connected": int(self._adapters[k].is_connected)
+                    "connected": int(self._adapters[k].is_connected),
+                    "bandwidth/mean": self._adapters[k].bandwidth_out_estimator.mean,
+                    "bandwidth/std": self._adapters[k].bandwidth_out_estimator.std,
+                    "bandwidth/usable": self._adapters[k].usable_bandwidth_out,
+                    "reliability": self._adapters[k].reliability,
+                    **{
+                        f"rate/{stat}": value for stat, value in
+                        self._adapters[k].rate_statistics.items()
+                    },
+                    **{
+                        f"outbox/{stat}": value for stat, value in
+                        self._adapters[k].outbox_statistics.items()
+                    },
+                    **{
+                        f"inbox/{stat}": value for stat, value in
+                        self._adapters[k].inbox_statistics.items()
+                    },
+                    **{
+                        f"fragmentation/{stat}": value for stat, value in
+                        self._adapters[k].fragmentation_statistics.items()
+                    },
+                    **{
+                        f"budget/{stat}": value for stat, value in
+                        self._budget.statistics(k, self._known_budget(k)).items()
+                    },
                 } for k, vw in self._interface_flowwatch.items()
             }
 
@@ -104,6 +147,16 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
     def adapter(self, interface: str) -> Optional[Adapter]:
         return self._adapters.get(interface, None)
 
+    def remaining_budget(self, interface: str) -> Optional[float]:
+        """
+        Budget (in bytes) left on the given interface, None if the interface is not metered.
+        """
+        return self._budget.remaining(interface, self._known_budget(interface))
+
+    def _known_budget(self, interface: str) -> Optional[float]:
+        link: Optional[Link] = self._known_links.get(interface, None)
+        return link.budget if link is not None else None
+
     def reset_statistics(self):
         with self._lock:
             for flowwatch in self._interface_flowwatch.values():
@@ -137,9 +190,40 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
         self._interface_flowwatch[interface].signal(len(message.payload))
         self._channel_flowwatch[message.channel].signal(len(message.payload))
 
+    def charge(self, interface: str, size: int):
+        self._budget.charge(interface, size)
+
+    def acknowledge(self, message: Message):
+        """
+        Tells the previous hop that we took custody of the given message.
+        """
+        ack: ControlMessage = ControlMessage(CUSTODY_ACK, {
+            "channel": message.channel,
+            **message.headers["custody"],
+        })
+        # acknowledgements only go upstream
+        for adapter in self.adapters:
+            if adapter.is_connected and adapter.role is AgentRole.SINK:
+                adapter.send_control(ack)
+
+    def broadcast_control(self, message: ControlMessage):
+        for adapter in self.adapters:
+            if adapter.is_connected:
+                adapter.send_control(message)
+
+    def _on_backpressure(self, report: dict):
+        if self._switchboard is not None:
+            self._switchboard.backpressure(report)
+
+    def _on_custody_ack(self, ack: dict):
+        if self._switchboard is not None:
+            self._switchboard.custody_ack(ack)
+
     def start(self) -> None:
         # activate network monitor
         loop.add_task(self._monitor_task, self)
+        # activate budget accounting
+        loop.add_task(self._budget_task, self)
         # run this thread
         super(NetworkManager, self).start()
 
@@ -230,7 +314,8 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
             for device in list(devices.keys()):
                 if device not in self._whitelisted_links:
                     # print out (only once) that we are ignoring this link
-                    if self._role is AgentRole.SOURCE and device not in self._ignored_links:
+                    if self._role in [AgentRole.SOURCE, AgentRole.RELAY] and \
+                            device not in self._ignored_links:
                         print(f"Interface '{device}' of type '{devices[device]}' is not listed in "
                               f"the problem definition, it will not be used.")
                         # mark this device as 'ignored'
@@ -245,7 +330,14 @@ class NetworkManager(Shuttable, INetworkManager, Thread):
         cls: Type[Adapter] = self._adapter_classes[device.type.value]
         link: Optional[Link] = self._known_links.get(device.interface)
         remote: Optional[IPv4Address] = link.server if link else None
-        return cls(role=self._role, device=device, remote=remote, network_manager=self)
+        # relays are sinks on the links facing upstream and sources on the ones facing downstream
+        role: AgentRole = AgentRole(link.role) if self._role is AgentRole.RELAY else self._role
+        adapter: Adapter = cls(role=role, device=device, remote=remote, network_manager=self)
+        # sinks report their backlog to the switchboard
+        adapter.on_control("backpressure", self._on_backpressure)
+        # the next hop takes custody of the messages we relay
+        adapter.on_control(CUSTODY_ACK, self._on_custody_ack)
+        return adapter
 
 
 class NetworkMonitorTask(Task):
@@ -261,3 +353,9 @@ class NetworkMonitorTask(Task):
             Report.log({
                 f"channel/{channel.strip('/')}": stats
             })
+
+
+class NetworkBudgetTask(Task):
+
+    def step(self, nm: NetworkManager):
+        nm.budget.flush()
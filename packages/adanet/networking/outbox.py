@@ -0,0 +1,78 @@
+import heapq
+from collections import defaultdict
+from threading import Semaphore
+from typing import List, Tuple, Optional, Dict
+
+from ..constants import OUTBOX_SIZE, OUTBOX_AGING_SEC
+from ..time import Clock
+from ..types.misc import EWMAEstimator
+
+# (key, sequence number, data, priority, time of arrival)
+Entry = Tuple[float, int, bytes, int, float]
+
+
+class Outbox:
+    """
+    Priority queue of the frames waiting to be sent through an adapter.
+
+    Frames are sent in order of priority (higher first) and in FIFO order within the same
+    priority. To avoid starvation, the priority of a frame grows by one every `aging` seconds
+    it spends in the queue. Since all the frames age at the same rate, the effective priority
+    `priority + (now - arrival) / aging` orders frames the same way as the time-invariant key
+    `priority - arrival / aging`, so a plain heap is enough.
+    When the queue is full, the frame with the lowest effective priority is dropped.
+    """
+
+    def __init__(self, size: int = OUTBOX_SIZE, aging: float = OUTBOX_AGING_SEC):
+        self._size: int = max(1, size)
+        self._aging: float = aging
+        self._heap: List[Entry] = []
+        self._seq: int = 0
+        self._lock: Semaphore = Semaphore()
+        # statistics
+        self._latency: Dict[int, EWMAEstimator] = defaultdict(EWMAEstimator)
+        self._dropped: Dict[int, int] = defaultdict(lambda: 0)
+
+    @property
+    def length(self) -> int:
+        return len(self._heap)
+
+    @property
+    def free(self) -> int:
+        return max(0, self._size - len(self._heap))
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        with self._lock:
+            stats: Dict[str, float] = {"length": len(self._heap)}
+            for priority, latency in self._latency.items():
+                stats[f"priority/{priority}/latency"] = latency.mean
+            for priority, dropped in self._dropped.items():
+                stats[f"priority/{priority}/dropped"] = dropped
+            return stats
+
+    def put(self, data: bytes, priority: int = 0):
+        now: float = Clock.time()
+        # NOTE: heapq is a min-heap, so we store the opposite of the key
+        key: float = -(priority - now / self._aging) if self._aging > 0 else -priority
+        with self._lock:
+            heapq.heappush(self._heap, (key, self._seq, data, priority, now))
+            self._seq += 1
+            if len(self._heap) > self._size:
+                # drop the entry with the lowest effective priority (the newest one on ties)
+                worst: Entry = max(self._heap)
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+                self._dropped[worst[3]] += 1
+
+    def peek(self) -> Optional[bytes]:
+        with self._lock:
+            return self._heap[0][2] if self._heap else None
+
+    def pop(self) -> Optional[bytes]:
+        with self._lock:
+            if not self._heap:
+                return None
+            _, _, data, priority, arrival = heapq.heappop(self._heap)
+            self._latency[priority].add(Clock.time() - arrival)
+            return data
@@ -1,18 +1,23 @@
 import time
 from threading import Semaphore, Thread
-from typing import Optional
+from typing import Optional, Tuple
 
+import cbor2
 import zmq as zmq
 
 from adanet.constants import ZMQ_PUB_SERVER_PORT, ZMQ_SUB_SERVER_PORT, ZMQ_HEARTBEAT_EVERY_SEC, \
-    INFTY
+    ZMQ_RELIABILITY_ALPHA, PIPE_RCVHWM, INFTY
 from adanet.time import Clock
 from adanet.types import Shuttable
+from adanet.networking.rate import FeedbackCollector
 
 
 class Pipe(Shuttable, Thread):
     USER = b"0"
     SYSTEM = b"1"
+    CONTROL = b"2"
+    # longer gaps in the heartbeats are considered disconnections rather than losses
+    MAX_HEARTBEAT_GAP = 10
 
     def __init__(self, pub_port: Optional[int] = None, sub_port: Optional[int] = None):
         Shuttable.__init__(self)
@@ -26,6 +31,15 @@ class Pipe(Shuttable, Thread):
         self._lock: Semaphore = Semaphore()
         # internal state
         self._last_heard: float = -INFTY
+        self._heartbeat_seq: int = 0
+        self._last_heartbeat_seq: Optional[int] = None
+        # fraction of heartbeats received from the other side
+        self._reliability_in: float = 1.0
+        # fraction of our heartbeats received by the other side (as reported by the other side)
+        self._reliability_out: Optional[float] = None
+        # user frames are numbered and timestamped so that the other side can give us feedback
+        self._frame_seq: int = 0
+        self._feedback: FeedbackCollector = FeedbackCollector()
 
     @property
     def pub_port(self) -> int:
@@ -39,6 +53,17 @@ class Pipe(Shuttable, Thread):
     def is_connected(self) -> bool:
         return (Clock.time() - self._last_heard) <= 2 * ZMQ_HEARTBEAT_EVERY_SEC
 
+    @property
+    def reliability(self) -> float:
+        """
+        Estimated probability of a frame sent through this pipe to be delivered. Uses the loss
+        measured by the other side if known, the loss measured on the incoming heartbeats
+        otherwise.
+        """
+        if self._reliability_out is not None:
+            return self._reliability_out
+        return self._reliability_in
+
     @property
     def is_inited(self) -> bool:
         return self._inited
@@ -50,7 +75,8 @@ class Pipe(Shuttable, Thread):
         self._pub.setsockopt(zmq.IMMEDIATE, 1)
         # set high watermark
         self._pub.setsockopt(zmq.SNDHWM, 1)
-        self._sub.setsockopt(zmq.RCVHWM, 1)
+        # the receiving side can buffer a few frames, the mailman drains them right away
+        self._sub.setsockopt(zmq.RCVHWM, PIPE_RCVHWM)
         # subscribe to everything
         self._sub.setsockopt(zmq.SUBSCRIBE, b"")
         # mark as inited
@@ -103,25 +129,67 @@ class Pipe(Shuttable, Thread):
 
     def send(self, data: bytes):
         with self._lock:
-            self._pub.send_multipart((Pipe.USER, data))
+            meta: bytes = cbor2.dumps([self._frame_seq, Clock.time()])
+            self._frame_seq += 1
+            self._pub.send_multipart((Pipe.USER, data, meta))
+
+    def collect_feedback(self) -> Optional[dict]:
+        """
+        Summarizes the user frames received since the last call (see `FeedbackCollector`).
+        """
+        return self._feedback.collect()
+
+    def send_control(self, data: bytes):
+        with self._lock:
+            self._pub.send_multipart((Pipe.CONTROL, data))
 
-    def recv(self) -> bytes:
+    def recv(self) -> Tuple[bytes, bytes]:
         while not self.is_shutdown:
             parts = self._sub.recv_multipart()
             # validate number of parts
-            if len(parts) != 2:
+            if len(parts) not in [2, 3]:
                 continue
             # unpack parts
-            level, data = parts
+            level, data = parts[:2]
+            # user frames carry their sequence number and timestamp
+            if len(parts) == 3:
+                # noinspection PyBroadException
+                try:
+                    seq, sent = cbor2.loads(parts[2])
+                    self._feedback.add(len(data), seq, sent)
+                except Exception:
+                    pass
             # mark it as heard from
             self._last_heard = Clock.time()
             # system packets are hidden from the user
             if level == Pipe.SYSTEM:
+                self._on_heartbeat(data)
                 continue
-            # user data
-            return data
+            # user and control data
+            return level, data
+
+    def _on_heartbeat(self, data: bytes):
+        # noinspection PyBroadException
+        try:
+            heartbeat: dict = cbor2.loads(data)
+            seq: int = heartbeat["seq"]
+        except Exception:
+            return
+        # gaps in the sequence numbers are heartbeats lost
+        gap: Optional[int] = seq - self._last_heartbeat_seq \
+            if self._last_heartbeat_seq is not None else None
+        self._last_heartbeat_seq = seq
+        if gap is not None and 0 < gap <= Pipe.MAX_HEARTBEAT_GAP:
+            for _ in range(gap - 1):
+                self._reliability_in *= (1 - ZMQ_RELIABILITY_ALPHA)
+            self._reliability_in += ZMQ_RELIABILITY_ALPHA * (1 - self._reliability_in)
+        self._reliability_out = heartbeat.get("reliability", None)
 
     def run(self) -> None:
         while not self.is_shutdown:
-            self._send(b"x")
+            self._send(cbor2.dumps({
+                "seq": self._heartbeat_seq,
+                "reliability": self._reliability_in,
+            }))
+            self._heartbeat_seq += 1
             time.sleep(Clock.period(ZMQ_HEARTBEAT_EVERY_SEC))
@@ -0,0 +1,160 @@
+from threading import Semaphore
+from typing import Optional, List, Tuple, Dict
+
+from ..constants import \
+    IFACE_MIN_BANDWIDTH_BYTES_SEC, \
+    RATE_LOSS_THRESHOLD, \
+    RATE_DELAY_GRADIENT_THRESHOLD, \
+    RATE_DECREASE_FACTOR, \
+    RATE_INCREASE_FRACTION, \
+    RATE_BURST_SEC
+from ..time import Clock
+from ..types.misc import EWMAEstimator, TokenBucket
+
+
+class FeedbackCollector:
+    """
+    Collects statistics about the frames received by a pipe (on the receiving side) and
+    summarizes them into the feedback sent back to the other side.
+    """
+
+    # gaps in the sequence numbers bigger than this are considered restarts of the other side
+    MAX_SEQUENCE_GAP = 10000
+
+    def __init__(self):
+        self._lock: Semaphore = Semaphore()
+        self._next_seq: Optional[int] = None
+        self._reset(Clock.time())
+
+    def _reset(self, now: float):
+        self._start: float = now
+        self._bytes: int = 0
+        self._received: int = 0
+        self._lost: int = 0
+        # (arrival time, one-way delay) of the frames received
+        self._delays: List[Tuple[float, float]] = []
+
+    def add(self, size: int, seq: int, sent: float):
+        """
+        Registers a frame received.
+
+        :param size:    size (in bytes) of the frame
+        :param seq:     sequence number of the frame
+        :param sent:    time at which the frame was sent (clock of the other side)
+        """
+        now: float = Clock.time()
+        with self._lock:
+            self._bytes += size
+            self._received += 1
+            if self._next_seq is not None and 0 < seq - self._next_seq <= self.MAX_SEQUENCE_GAP:
+                self._lost += seq - self._next_seq
+            if self._next_seq is None or seq >= self._next_seq or \
+                    self._next_seq - seq > self.MAX_SEQUENCE_GAP:
+                self._next_seq = seq + 1
+            # NOTE: the clocks are not synchronized, only the trend of the delay is meaningful
+            self._delays.append((now, now - sent))
+
+    def collect(self) -> Optional[Dict[str, float]]:
+        """
+        Summarizes the frames received since the last call.
+
+        :return: receive rate (bytes/sec), loss (fraction of frames) and delay gradient
+                 (secs/sec), None if nothing was received
+        """
+        now: float = Clock.time()
+        with self._lock:
+            duration: float = now - self._start
+            if self._received == 0 or duration <= 0:
+                self._reset(now)
+                return None
+            feedback: Dict[str, float] = {
+                "rate": self._bytes / duration,
+                "loss": self._lost / (self._received + self._lost),
+                "delay_gradient": self._slope(self._delays),
+                "received": self._received,
+            }
+            self._reset(now)
+            return feedback
+
+    @staticmethod
+    def _slope(points: List[Tuple[float, float]]) -> float:
+        # least squares slope
+        n: int = len(points)
+        if n < 2:
+            return 0.0
+        mx: float = sum(x for x, _ in points) / n
+        my: float = sum(y for _, y in points) / n
+        sxx: float = sum((x - mx) ** 2 for x, _ in points)
+        if sxx <= 0:
+            return 0.0
+        return sum((x - mx) * (y - my) for x, y in points) / sxx
+
+
+class RateController:
+    """
+    AIMD rate controller driven by the feedback of the receiving side.
+
+    The send rate is not capped until the first sign of congestion (loss or growing delay),
+    at which point it is set to a fraction of the achieved goodput (multiplicative decrease).
+    While there is no congestion, the cap is increased by a fraction of the achieved goodput
+    at every feedback (additive increase), unless the sender is not using the rate it has.
+    """
+
+    def __init__(self):
+        self._rate: Optional[float] = None
+        self._goodput: EWMAEstimator = EWMAEstimator()
+        self._bucket: TokenBucket = TokenBucket()
+        self._congested: bool = False
+        self._lock: Semaphore = Semaphore()
+
+    @property
+    def rate(self) -> Optional[float]:
+        """
+        Current cap on the send rate (bytes/sec), None if the rate is not capped.
+        """
+        return self._rate
+
+    @property
+    def goodput(self) -> Optional[float]:
+        """
+        Achieved goodput (bytes/sec) as reported by the receiving side, None if unknown.
+        """
+        return self._goodput.mean if self._goodput.count else None
+
+    @property
+    def is_congested(self) -> bool:
+        return self._congested
+
+    @property
+    def bucket(self) -> TokenBucket:
+        return self._bucket
+
+    def update(self, feedback: Dict[str, float]):
+        """
+        Updates the rate given new feedback from the receiving side.
+        """
+        with self._lock:
+            received: float = feedback["rate"]
+            self._goodput.add(received)
+            goodput: float = self._goodput.mean
+            self._congested = feedback["loss"] > RATE_LOSS_THRESHOLD or \
+                feedback["delay_gradient"] > RATE_DELAY_GRADIENT_THRESHOLD
+            if self._congested:
+                # multiplicative decrease
+                rate: float = RATE_DECREASE_FACTOR * min(received, self._rate or received)
+            elif self._rate is not None and received >= 0.5 * self._rate:
+                # additive increase (only if we are actually using the rate we have)
+                rate: float = self._rate + max(IFACE_MIN_BANDWIDTH_BYTES_SEC,
+                                               RATE_INCREASE_FRACTION * goodput)
+            else:
+                return
+            self._rate = max(IFACE_MIN_BANDWIDTH_BYTES_SEC, rate)
+            self._bucket.set_rate(self._rate, self._rate * RATE_BURST_SEC)
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "rate": self._rate,
+            "goodput": self.goodput,
+            "congested": int(self._congested),
+        }
@@ -1,5 +1,5 @@
 from threading import Semaphore
-from typing import Type, Dict, Any
+from typing import Type, Dict, Any, Callable, List, Tuple
 
 import rospy
 import rostopic
@@ -13,6 +13,10 @@ class ROS:
     _registered: bool = False
     _shuttable: Shuttable = Shuttable()
     _cache: Dict[str, Type[rospy.msg.AnyMsg]] = {}
+    _raw_cache: Dict[str, Type[rospy.msg.AnyMsg]] = {}
+    # compiled converters (see `encoder` and `decoder`)
+    _encoders: Dict[str, Callable[[rospy.msg.AnyMsg], Dict]] = {}
+    _decoders: Dict[str, Callable[[Dict], rospy.msg.AnyMsg]] = {}
 
     @classmethod
     def register(cls):
@@ -51,31 +55,127 @@ class ROS:
             raise ROSTopicNotFound(f"Topic '{topic}' not found")
         return cls.load_message_type(msgtype)
 
+    @classmethod
+    def raw_message_type(cls, MsgType: Type[rospy.msg.AnyMsg]) -> Type[rospy.msg.AnyMsg]:
+        """
+        Message type that carries an already serialized message of type `MsgType` and
+        advertises itself as `MsgType`, so that raw buffers can be published as they are.
+        """
+        # noinspection PyProtectedMember
+        msgtype: str = MsgType._type
+        if msgtype in cls._raw_cache:
+            return cls._raw_cache[msgtype]
+        # noinspection PyProtectedMember
+        RawMsgType: Type[rospy.msg.AnyMsg] = type(f"Raw{MsgType.__name__}", (rospy.msg.AnyMsg,), {
+            "_type": MsgType._type,
+            "_md5sum": MsgType._md5sum,
+            "_full_text": MsgType._full_text,
+            "_has_header": MsgType._has_header,
+            "__slots__": [],
+        })
+        # update cache
+        cls._raw_cache[msgtype] = RawMsgType
+        # ---
+        return RawMsgType
+
     @classmethod
     def message_to_dict(cls, msg: rospy.msg.AnyMsg) -> Dict:
-        res: Dict = {}
-        for k in msg.__slots__:
-            v = getattr(msg, k)
-            if hasattr(v, "__slots__"):
-                v = cls.message_to_dict(v)
-            res[k] = v
-        return res
+        return cls.encoder(type(msg))(msg)
 
     @classmethod
     def dict_to_message(cls, data: Dict, MsgType: Type[rospy.msg.AnyMsg]) -> rospy.msg.AnyMsg:
-        fields: Dict = {}
-        for i, k in enumerate(MsgType.__slots__):
-            if k not in data:
+        return cls.decoder(MsgType)(data)
+
+    @classmethod
+    def encoder(cls, MsgType: Type[rospy.msg.AnyMsg]) -> Callable[[rospy.msg.AnyMsg], Dict]:
+        """
+        Function converting messages of type `MsgType` into Python dicts, compiled once per
+        message type.
+        """
+        # noinspection PyProtectedMember
+        msgtype: str = MsgType._type
+        if msgtype not in cls._encoders:
+            cls._encoders[msgtype] = cls._compile_encoder(MsgType)
+        return cls._encoders[msgtype]
+
+    @classmethod
+    def decoder(cls, MsgType: Type[rospy.msg.AnyMsg]) -> Callable[[Dict], rospy.msg.AnyMsg]:
+        """
+        Function converting Python dicts into messages of type `MsgType`, compiled once per
+        message type.
+        """
+        # noinspection PyProtectedMember
+        msgtype: str = MsgType._type
+        if msgtype not in cls._decoders:
+            cls._decoders[msgtype] = cls._compile_decoder(MsgType)
+        return cls._decoders[msgtype]
+
+    @classmethod
+    def _compile_encoder(cls, MsgType: Type[rospy.msg.AnyMsg]) -> Callable:
+        scope: Dict[str, Any] = {}
+        fields: List[str] = []
+        # noinspection PyProtectedMember
+        for i, (k, kt) in enumerate(zip(MsgType.__slots__, MsgType._slot_types)):
+            base, is_array = _slot_type(kt)
+            value: str = "x" if is_array else f"msg.{k}"
+            if base in _TIME_TYPES:
+                value = f"{{'secs': {value}.secs, 'nsecs': {value}.nsecs}}"
+            elif "/" in base:
+                scope[f"encode_{i}"] = cls.encoder(cls.load_message_type(base))
+                value = f"encode_{i}({value})"
+            else:
+                # primitives (and arrays of primitives) are taken as they are
+                fields.append(f"{k!r}: msg.{k}")
                 continue
-            # get field value
-            v: Any = data[k]
-            # noinspection PyProtectedMember
-            kt = MsgType._slot_types[i]
-            if kt == "time":
-                v = rospy.Time(**v)
-            elif "/" in kt:
-                FieldType: Type[rospy.msg.AnyMsg] = cls.load_message_type(kt)
-                v = cls.dict_to_message(v, FieldType)
-            # add field value
-            fields[k] = v
-        return MsgType(**fields)
+            if is_array:
+                value = f"[{value} for x in msg.{k}]"
+            fields.append(f"{k!r}: {value}")
+        return _compile("encode", "msg", ["return {" + ", ".join(fields) + "}"], scope)
+
+    @classmethod
+    def _compile_decoder(cls, MsgType: Type[rospy.msg.AnyMsg]) -> Callable:
+        scope: Dict[str, Any] = {"MsgType": MsgType}
+        lines: List[str] = ["fields = {}"]
+        # noinspection PyProtectedMember
+        for i, (k, kt) in enumerate(zip(MsgType.__slots__, MsgType._slot_types)):
+            base, is_array = _slot_type(kt)
+            value: str = "x" if is_array else f"data[{k!r}]"
+            if base in _TIME_TYPES:
+                scope[f"decode_{i}"] = _TIME_TYPES[base]
+                value = f"decode_{i}(**{value})"
+            elif "/" in base:
+                scope[f"decode_{i}"] = cls.decoder(cls.load_message_type(base))
+                value = f"decode_{i}({value})"
+            else:
+                # primitives (and arrays of primitives) are taken as they are
+                value = f"data[{k!r}]"
+                is_array = False
+            if is_array:
+                value = f"[{value} for x in data[{k!r}]]"
+            lines.append(f"if {k!r} in data:")
+            lines.append(f"    fields[{k!r}] = {value}")
+        lines.append("return MsgType(**fields)")
+        return _compile("decode", "data", lines, scope)
+
+
+# special (non-message) types converted to/from {'secs': ..., 'nsecs': ...}
+_TIME_TYPES: Dict[str, Type] = {
+    "time": rospy.Time,
+    "duration": rospy.Duration,
+}
+
+
+def _slot_type(kt: str) -> Tuple[str, bool]:
+    """
+    Splits a slot type (e.g., 'geometry_msgs/Point[]', 'float64[9]') into base type and
+    whether the slot is an array.
+    """
+    if kt.endswith("]"):
+        return kt[:kt.index("[")], True
+    return kt, False
+
+
+def _compile(name: str, argument: str, body: List[str], scope: Dict[str, Any]) -> Callable:
+    code: str = f"def {name}({argument}):\n" + "\n".join(f"    {line}" for line in body)
+    exec(code, scope)
+    return scope[name]
@@ -0,0 +1,139 @@
+import struct
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
+
+# float types values can be rounded to
+FLOAT_FORMATS: Dict[str, str] = {
+    "float16": "<e",
+    "float32": "<f",
+}
+
+NSECS: int = 1000000000
+
+
+def _round_float(fmt: str, v: float) -> float:
+    return struct.unpack(fmt, struct.pack(fmt, v))[0]
+
+
+def _elementwise(fcn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def _apply(v: Any) -> Any:
+        if isinstance(v, (list, tuple)):
+            return [fcn(e) for e in v]
+        return fcn(v)
+
+    return _apply
+
+
+class Codec:
+    """
+    Reduces the precision of the values of a field (see `encode`) and restores their original
+    representation on the other side (see `decode`).
+    """
+
+    def __init__(self, encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+        self.encode: Callable[[Any], Any] = encode
+        self.decode: Callable[[Any], Any] = decode
+
+    @staticmethod
+    def parse(field: str, spec: Union[str, Dict[str, float]]) -> 'Codec':
+        """
+        Parses the quantization of a field from the channel's arguments.
+
+        :param field:   the (dotted) path to the field
+        :param spec:    one of,
+                            - 'float16', 'float32': rounded to a smaller float type
+                            - {'fixed': scale}: fixed point, integer multiple of `scale`
+                            - {'time': resolution}: ROS time/duration, integer multiple of
+                              `resolution` seconds
+        :return:        the codec
+        """
+        if isinstance(spec, str) and spec in FLOAT_FORMATS:
+            fmt: str = FLOAT_FORMATS[spec]
+            # smaller floats are still floats (encoded in their shortest form), nothing to undo
+            return Codec(_elementwise(lambda v: _round_float(fmt, v)), lambda v: v)
+        if isinstance(spec, dict) and len(spec) == 1:
+            kind, value = list(spec.items())[0]
+            if kind == "fixed" and value > 0:
+                return Codec(_elementwise(lambda v: int(round(v / value))),
+                             _elementwise(lambda v: v * value))
+            if kind == "time" and value > 0:
+                resolution: int = max(1, int(round(value * NSECS)))
+                return Codec(
+                    lambda v: int(round((v["secs"] * NSECS + v["nsecs"]) / resolution)),
+                    lambda v: dict(zip(["secs", "nsecs"], divmod(v * resolution, NSECS))),
+                )
+        raise ValueError(f"Invalid quantization '{spec}' for field '{field}'. Expected one of "
+                         f"{list(FLOAT_FORMATS.keys())}, {{'fixed': <scale>}}, "
+                         f"{{'time': <resolution>}}.")
+
+
+class Projection:
+    """
+    Strips messages (in their dict form) down to a subset of their fields and quantizes
+    what is left.
+
+    Fields are given as dotted paths (e.g., 'header.stamp'). Paths go through arrays of
+    messages, e.g., 'poses.position' refers to the position of each pose.
+
+    :param fields:      fields to keep, None keeps all of them
+    :param quantize:    quantization of the fields (see `Codec.parse`)
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None,
+                 quantize: Optional[Dict[str, Union[str, Dict[str, float]]]] = None):
+        self._fields: Optional[dict] = None
+        if fields is not None:
+            self._fields = {}
+            for field in fields:
+                node: dict = self._fields
+                for key in field.split("."):
+                    node = node.setdefault(key, {})
+        self._codecs: List[Tuple[List[str], Codec]] = [
+            (field.split("."), Codec.parse(field, spec)) for field, spec in
+            (quantize or {}).items()
+        ]
+
+    @staticmethod
+    def from_arguments(arguments: Dict) -> Optional['Projection']:
+        """
+        Projection described by the 'fields' and 'quantize' arguments of a channel, None if
+        the channel does not ask for one.
+        """
+        fields: Optional[List[str]] = arguments.get("fields", None)
+        quantize: Optional[Dict] = arguments.get("quantize", None)
+        if fields is None and not quantize:
+            return None
+        return Projection(fields, quantize)
+
+    def apply(self, data: dict) -> dict:
+        if self._fields is not None:
+            data = self._project(data, self._fields)
+        for path, codec in self._codecs:
+            self._transform(data, path, codec.encode)
+        return data
+
+    def invert(self, data: dict) -> dict:
+        for path, codec in self._codecs:
+            self._transform(data, path, codec.decode)
+        return data
+
+    @classmethod
+    def _project(cls, data: Any, fields: dict) -> Any:
+        if isinstance(data, list):
+            return [cls._project(e, fields) for e in data]
+        return {
+            k: (cls._project(data[k], sub) if sub else data[k])
+            for k, sub in fields.items() if k in data
+        }
+
+    @classmethod
+    def _transform(cls, data: Any, path: List[str], fcn: Callable[[Any], Any]):
+        if isinstance(data, list):
+            for e in data:
+                cls._transform(e, path, fcn)
+            return
+        if not isinstance(data, dict) or path[0] not in data:
+            return
+        if len(path) == 1:
+            data[path[0]] = fcn(data[path[0]])
+        else:
+            cls._transform(data[path[0]], path[1:], fcn)
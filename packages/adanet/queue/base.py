@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Optional
+from typing import Optional, Callable, Dict
 
 
 class QueueType(Enum):
@@ -8,11 +8,36 @@ class QueueType(Enum):
     CACHE = "cache"
 
 
+class QueueDurability(Enum):
+    # every operation is committed (and synced to disk) on its own
+    FULL = "full"
+    # operations are committed in groups, a crash loses at most the last group
+    BATCH = "batch"
+    # as BATCH, without syncing to disk, an OS crash or power loss can corrupt the queue
+    OFF = "off"
+
+
 class IQueue(ABC):
 
     def __init__(self, type: QueueType, channel: str):
         self._type: QueueType = type
         self._channel: str = channel
+        self._on_evict: Optional[Callable[[bytes], None]] = None
+
+    def on_evict(self, callback: Callable[[bytes], None]):
+        """
+        Registers a function to call with the data that is dropped from the queue to make
+        room for new data before it could be consumed.
+        """
+        self._on_evict = callback
+
+    def _evicted(self, data: bytes):
+        if self._on_evict is not None:
+            self._on_evict(data)
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {}
 
     @property
     @abstractmethod
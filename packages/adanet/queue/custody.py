@@ -0,0 +1,119 @@
+import dataclasses
+import os
+from threading import Semaphore
+from typing import Optional, Dict, List
+
+from persistqueue import SQLiteAckQueue, Empty
+
+from adanet.constants import QUEUE_PATH
+from adanet.queue.base import IQueue, QueueType
+from adanet.time import Clock
+
+# control message sent back to the previous hop when the custody of a message is taken over
+CUSTODY_ACK = "custody/ack"
+
+
+@dataclasses.dataclass
+class Custody:
+    # id of the message within the queue
+    id: int
+    payload: bytes
+    # time at which the message was first sent by its original source
+    origin_stamp: float
+
+
+class Queue(IQueue, SQLiteAckQueue):
+    """
+    Persistent queue of the messages a relay holds in custody.
+
+    A message leaves the queue only when the next hop acknowledges it (see `ack`). Messages
+    handed out (see `get`) and not acknowledged within a timeout go back in the queue (see
+    `expire`), and so do the ones that were in flight when the relay was restarted.
+    """
+
+    def __init__(self, channel: str):
+        IQueue.__init__(self, QueueType.PERSISTENT, channel)
+        queue_location: str = os.path.join(QUEUE_PATH, QueueType.PERSISTENT.value, "relay",
+                                           self._channel.strip("/"))
+        os.makedirs(queue_location, exist_ok=True)
+        # NOTE: messages that were in flight when the relay stopped are ready to go again
+        SQLiteAckQueue.__init__(self, queue_location, auto_commit=True, multithreading=True,
+                                auto_resume=True)
+        self._lock: Semaphore = Semaphore()
+        # messages handed out and not acknowledged yet (id -> time)
+        self._in_flight: Dict[int, float] = {}
+        # statistics
+        self._acked: int = 0
+        self._expired: int = 0
+
+    @property
+    def length(self) -> int:
+        """
+        Number of messages waiting to be sent.
+        """
+        return self.size
+
+    @property
+    def max_size(self) -> int:
+        return -1
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def backlog(self) -> int:
+        """
+        Number of messages in custody, i.e., waiting to be sent or to be acknowledged.
+        """
+        return self.size + len(self._in_flight)
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "backlog": self.backlog,
+            "in_flight": self.in_flight,
+            "acked": self._acked,
+            "expired": self._expired,
+        }
+
+    def put(self, data: bytes, origin_stamp: Optional[float] = None):
+        SQLiteAckQueue.put(self, {
+            "payload": data,
+            "origin_stamp": Clock.time() if origin_stamp is None else origin_stamp,
+        })
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Optional[Custody]:
+        try:
+            item: dict = SQLiteAckQueue.get(self, block=block, timeout=timeout, raw=True)
+        except Empty:
+            return None
+        with self._lock:
+            self._in_flight[item["pqid"]] = Clock.time()
+        return Custody(item["pqid"], item["data"]["payload"], item["data"]["origin_stamp"])
+
+    def ack(self, id: int):
+        """
+        Releases custody of a message, the next hop has it.
+        """
+        with self._lock:
+            if self._in_flight.pop(id, None) is None:
+                return
+            self._acked += 1
+        SQLiteAckQueue.ack(self, id=id)
+
+    def expire(self, timeout: float):
+        """
+        Puts back in the queue the messages not acknowledged within `timeout` seconds.
+        """
+        now: float = Clock.time()
+        with self._lock:
+            expired: List[int] = [i for i, t in self._in_flight.items() if now - t > timeout]
+            for i in expired:
+                del self._in_flight[i]
+            self._expired += len(expired)
+        for i in expired:
+            SQLiteAckQueue.nack(self, id=i)
+        # forget about the messages delivered
+        if self._acked:
+            self.clear_acked_data(keep_latest=0)
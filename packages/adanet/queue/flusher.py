@@ -0,0 +1,39 @@
+import weakref
+from typing import Optional
+
+from adanet.constants import QUEUE_COMMIT_EVERY_SEC
+from adanet.queue.base import IQueue
+from adanet.types import Shuttable
+
+
+class QueueFlusher(Shuttable):
+    """
+    Commits the operations left pending by queues that went quiet, and everything pending on
+    shutdown.
+    """
+
+    def __init__(self):
+        super(QueueFlusher, self).__init__()
+        self._queues: weakref.WeakSet = weakref.WeakSet()
+        self._task: Optional['Task'] = None
+        self.register_shutdown_callback(self.flush)
+
+    def add(self, queue: IQueue):
+        self._queues.add(queue)
+        if self._task is None:
+            # NOTE: the event loop starts when imported, only bring it up once there is a queue
+            from adanet.asyncio import loop, Task
+            self._task = Task(QUEUE_COMMIT_EVERY_SEC, self.step)
+            loop.add_task(self._task)
+
+    def step(self):
+        for queue in list(self._queues):
+            queue.flush(older_than=QUEUE_COMMIT_EVERY_SEC)
+
+    def flush(self):
+        for queue in list(self._queues):
+            queue.flush()
+
+
+# flusher shared by all the queues
+flusher: QueueFlusher = QueueFlusher()
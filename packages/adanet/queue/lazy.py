@@ -21,13 +21,20 @@ class Queue(IQueue):
         return 1
 
     def put(self, data: bytes):
-        self._content = data
         with self._event:
+            evicted: Optional[bytes] = self._content
+            self._content = data
             self._event.notify()
+        # the previous content was never consumed
+        if evicted is not None:
+            self._evicted(evicted)
 
     def get(self, block: bool = True) -> Optional[bytes]:
-        if self._content is None and not block:
-            return None
         with self._event:
-            self._event.wait()
-        return self._content
+            while self._content is None:
+                if not block:
+                    return None
+                self._event.wait()
+            data: bytes = self._content
+            self._content = None
+        return data
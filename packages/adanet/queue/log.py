@@ -0,0 +1,403 @@
+import mmap
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from threading import Condition
+from typing import Optional, List, Tuple, Set, Iterable, Any
+
+from adanet.constants import QUEUE_PATH, QUEUE_DURABILITY, QUEUE_COMMIT_BATCH, \
+    QUEUE_COMMIT_EVERY_SEC, QUEUE_LOG_SEGMENT_BYTES
+from adanet.queue.base import IQueue, QueueType, QueueDurability
+from adanet.queue.flusher import flusher
+
+# every message in a segment is prefixed by its length and checksum
+RECORD_HEADER = struct.Struct("<II")
+# the index of a segment holds the position of each of its messages
+INDEX_ENTRY = struct.Struct("<Q")
+# offset of the next message to consume
+CHECKPOINT_FILE_NAME = "checkpoint"
+# how often a blocked `get` checks for messages added by other processes
+POLL_EVERY_SEC = 0.1
+
+
+class MappedFile:
+    """
+    Read-only memory map of a file that keeps growing, mapped again when reading past its end.
+    """
+
+    def __init__(self, path: str):
+        self._fd: int = os.open(path, os.O_RDONLY)
+        self._map: Optional[mmap.mmap] = None
+
+    def read(self, start: int, end: int) -> Optional[bytes]:
+        if self._map is None or end > len(self._map):
+            size: int = os.fstat(self._fd).st_size
+            if end > size:
+                return None
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        return self._map[start:end]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        os.close(self._fd)
+
+
+class Segment:
+    """
+    Messages from offset `base` on, stored in a log file (records) and an index file (positions
+    of the records in the log). A message is only visible once its position is in the index.
+    """
+
+    def __init__(self, path: str, base: int):
+        self.base: int = base
+        self.log_path: str = os.path.join(path, f"{base:020d}.log")
+        self.index_path: str = os.path.join(path, f"{base:020d}.idx")
+        self._log: Optional[MappedFile] = None
+        self._index: Optional[MappedFile] = None
+
+    @property
+    def count(self) -> int:
+        try:
+            return os.path.getsize(self.index_path) // INDEX_ENTRY.size
+        except FileNotFoundError:
+            return 0
+
+    def position(self, i: int) -> int:
+        if self._index is None:
+            self._index = MappedFile(self.index_path)
+        return INDEX_ENTRY.unpack(self._index.read(i * INDEX_ENTRY.size,
+                                                   (i + 1) * INDEX_ENTRY.size))[0]
+
+    def read(self, offset: int) -> Optional[bytes]:
+        """
+        Message at the given offset, None if it did not make it to disk in one piece.
+        """
+        if self._log is None:
+            self._log = MappedFile(self.log_path)
+        position: int = self.position(offset - self.base)
+        header: Optional[bytes] = self._log.read(position, position + RECORD_HEADER.size)
+        if header is None:
+            return None
+        length, checksum = RECORD_HEADER.unpack(header)
+        start: int = position + RECORD_HEADER.size
+        data: Optional[bytes] = self._log.read(start, start + length)
+        if data is None or zlib.crc32(data) != checksum:
+            return None
+        return data
+
+    def end(self) -> int:
+        """
+        Size of the log up to the end of the last indexed message.
+        """
+        count: int = self.count
+        if count == 0:
+            return 0
+        position: int = self.position(count - 1)
+        with open(self.log_path, "rb") as fin:
+            fin.seek(position)
+            length, _ = RECORD_HEADER.unpack(fin.read(RECORD_HEADER.size))
+        return position + RECORD_HEADER.size + length
+
+    def close(self):
+        for mapped in [self._log, self._index]:
+            if mapped is not None:
+                mapped.close()
+        self._log = self._index = None
+
+    def remove(self):
+        self.close()
+        for path in [self.log_path, self.index_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class Queue(IQueue):
+    """
+    Append-only log of messages, split into segments of about `segment_bytes` bytes.
+
+    Messages are read through memory maps, the position of each message is kept in an index
+    next to its segment. The offset of the next message to consume (checkpoint) is stored on
+    disk, segments are deleted once all their messages are consumed.
+
+    Writes are synced and the checkpoint is saved according to the durability level (see
+    `QueueDurability`). The log can be written and consumed by different processes (e.g., a
+    DiskSink writing what a DiskSource reads) but only one process consumes it.
+    """
+
+    def __init__(self, type: QueueType, channel: str, max_size: int = -1,
+                 durability: Optional[QueueDurability] = None,
+                 segment_bytes: int = QUEUE_LOG_SEGMENT_BYTES):
+        IQueue.__init__(self, type, channel)
+        self._max_size: int = max_size
+        self._durability: QueueDurability = QueueDurability(durability or QUEUE_DURABILITY)
+        self._segment_bytes: int = segment_bytes
+        self._path: str = os.path.join(QUEUE_PATH, type.value, self._channel.strip("/"), "log")
+        os.makedirs(self._path, exist_ok=True)
+        self._condition: Condition = Condition()
+        # segments, oldest first
+        self._segments: List[Segment] = [
+            Segment(self._path, int(f[:-len(".log")]))
+            for f in sorted(os.listdir(self._path)) if f.endswith(".log")
+        ]
+        # writer (opened with the first `put`)
+        self._log_fd: Optional[int] = None
+        self._index_fd: Optional[int] = None
+        self._log_size: int = 0
+        # consumer
+        self._checkpoint_path: str = os.path.join(self._path, CHECKPOINT_FILE_NAME)
+        self._cursor: int = self._load_checkpoint()
+        # messages consumed ahead of the cursor (see `discard`)
+        self._discarded: Set[int] = set()
+        # end of the log the last time we looked
+        self._seen: int = self._cursor
+        # operations not committed yet, time of the first of them
+        self._written: int = 0
+        self._consumed: int = 0
+        self._pending_since: Optional[float] = None
+        flusher.add(self)
+
+    @property
+    def size(self) -> int:
+        return self.length
+
+    @property
+    def length(self) -> int:
+        with self._condition:
+            return self._end() - self._cursor - len(self._discarded)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def durability(self) -> QueueDurability:
+        return self._durability
+
+    def put(self, data: bytes, block: bool = True):
+        self.put_many([data])
+
+    def put_many(self, items: Iterable[bytes]):
+        """
+        Adds multiple messages to the queue at once.
+        """
+        evicted: List[bytes] = []
+        with self._condition:
+            if self._log_fd is None:
+                self._open_writer()
+            for data in items:
+                if 0 < self._max_size <= self._end() - self._cursor - len(self._discarded):
+                    evicted.extend(self._take(1))
+                self._append(data)
+            self._condition.notify_all()
+        for data in evicted:
+            self._evicted(data)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None, default: Any = None) -> \
+            Optional[bytes]:
+        items: List[bytes] = self.get_many(1, block=block, timeout=timeout)
+        return items[0] if items else default
+
+    def get_many(self, count: int, block: bool = False, timeout: Optional[float] = None) -> \
+            List[bytes]:
+        """
+        Takes up to `count` messages off the queue.
+
+        :param count:   max number of messages to take
+        :param block:   whether to wait for at least one message to be available
+        :param timeout: max time (in seconds) to wait for, None means forever
+        :return:        the messages, possibly none
+        """
+        deadline: Optional[float] = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                items: List[bytes] = self._take(count)
+                if items or not block:
+                    return items
+                remaining: float = POLL_EVERY_SEC if deadline is None else \
+                    min(POLL_EVERY_SEC, deadline - time.time())
+                if remaining <= 0:
+                    return []
+                # other processes can add messages too, check every once in a while
+                self._condition.wait(remaining)
+
+    def peek(self, count: int, after: Optional[int] = None) -> List[Tuple[int, bytes]]:
+        """
+        Reads (without consuming them) the oldest messages in the queue.
+
+        :param count:   max number of messages to read
+        :param after:   only read messages with an offset greater than this
+        :return:        list of (offset, message)
+        """
+        with self._condition:
+            end: int = self._end()
+            offset: int = self._cursor if after is None else max(self._cursor, after + 1)
+            messages: List[Tuple[int, bytes]] = []
+            while offset < end and len(messages) < count:
+                if offset not in self._discarded:
+                    data: Optional[bytes] = self._read(offset)
+                    if data is not None:
+                        messages.append((offset, data))
+                offset += 1
+            return messages
+
+    def discard(self, ids: List[int]):
+        """
+        Consumes the messages with the given offsets (see `peek`).
+        """
+        if not ids:
+            return
+        with self._condition:
+            self._discarded.update(i for i in ids if i >= self._cursor)
+            moved: int = self._advance()
+            self._done(0, moved)
+
+    def flush(self, older_than: float = 0.0):
+        """
+        Commits the pending operations (if they have been pending for at least `older_than`
+        seconds).
+        """
+        with self._condition:
+            if self._pending_since is None:
+                return
+            if time.time() - self._pending_since >= older_than:
+                self._commit()
+
+    def _take(self, count: int) -> List[bytes]:
+        # only look for new messages when we run out of the ones we know of
+        end: int = self._seen if self._cursor + count <= self._seen else self._end()
+        items: List[bytes] = []
+        moved: int = self._advance()
+        while self._cursor < end and len(items) < count:
+            data: Optional[bytes] = self._read(self._cursor)
+            self._cursor += 1
+            moved += 1 + self._advance()
+            # messages that did not make it to disk in one piece are skipped
+            if data is not None:
+                items.append(data)
+        self._done(0, moved)
+        return items
+
+    def _advance(self) -> int:
+        # move the cursor past the messages consumed ahead of it
+        moved: int = 0
+        while self._cursor in self._discarded:
+            self._discarded.remove(self._cursor)
+            self._cursor += 1
+            moved += 1
+        return moved
+
+    def _read(self, offset: int) -> Optional[bytes]:
+        i: int = bisect_right([s.base for s in self._segments], offset) - 1
+        if i < 0:
+            return None
+        data: Optional[bytes] = self._segments[i].read(offset)
+        if data is None:
+            print(f"Message {offset} of queue '{self._channel}' is corrupted, skipping it.")
+        return data
+
+    def _end(self) -> int:
+        # segments created by other processes since we last looked
+        if not self._segments:
+            first: Segment = Segment(self._path, self._cursor)
+            if not os.path.exists(first.log_path):
+                return self._cursor
+            self._segments.append(first)
+        while True:
+            last: Segment = self._segments[-1]
+            count: int = last.count
+            following: Segment = Segment(self._path, last.base + count)
+            if count == 0 or not os.path.exists(following.log_path):
+                self._seen = last.base + count
+                return self._seen
+            self._segments.append(following)
+
+    def _open_writer(self):
+        end: int = self._end()
+        if self._segments:
+            # drop whatever was written after the last message that made it to the index
+            last: Segment = self._segments[-1]
+            self._log_size = last.end()
+            os.truncate(last.log_path, self._log_size)
+            os.truncate(last.index_path, last.count * INDEX_ENTRY.size)
+            self._open_segment(last)
+        else:
+            self._start_segment(end)
+
+    def _start_segment(self, base: int):
+        segment: Segment = Segment(self._path, base)
+        self._log_size = 0
+        self._open_segment(segment)
+        self._segments.append(segment)
+
+    def _open_segment(self, segment: Segment):
+        flags: int = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        # the log comes first, other processes look for it to find new segments
+        self._log_fd = os.open(segment.log_path, flags, 0o644)
+        self._index_fd = os.open(segment.index_path, flags, 0o644)
+
+    def _append(self, data: bytes):
+        os.write(self._log_fd, RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data)
+        # the message is visible once its position is in the index
+        os.write(self._index_fd, INDEX_ENTRY.pack(self._log_size))
+        self._log_size += RECORD_HEADER.size + len(data)
+        self._done(1, 0)
+        if self._log_size >= self._segment_bytes:
+            # the segment is complete, the next one starts where it ends
+            self._sync()
+            os.close(self._log_fd)
+            os.close(self._index_fd)
+            last: Segment = self._segments[-1]
+            self._start_segment(last.base + last.count)
+
+    def _done(self, written: int, consumed: int):
+        self._written += written
+        self._consumed += consumed
+        if self._written + self._consumed == 0:
+            return
+        if self._pending_since is None:
+            self._pending_since = time.time()
+        if self._durability is QueueDurability.FULL or \
+                self._written + self._consumed >= QUEUE_COMMIT_BATCH or \
+                time.time() - self._pending_since >= QUEUE_COMMIT_EVERY_SEC:
+            self._commit()
+
+    def _commit(self):
+        if self._written > 0:
+            self._sync()
+        if self._consumed > 0:
+            self._save_checkpoint()
+        self._written = 0
+        self._consumed = 0
+        self._pending_since = None
+
+    def _sync(self):
+        if self._durability is QueueDurability.OFF or self._log_fd is None:
+            return
+        # messages first, then the index pointing at them
+        os.fsync(self._log_fd)
+        os.fsync(self._index_fd)
+
+    def _load_checkpoint(self) -> int:
+        first: int = self._segments[0].base if self._segments else 0
+        try:
+            with open(self._checkpoint_path, "rb") as fin:
+                return max(first, INDEX_ENTRY.unpack(fin.read(INDEX_ENTRY.size))[0])
+        except (FileNotFoundError, struct.error):
+            return first
+
+    def _save_checkpoint(self):
+        tmp_path: str = self._checkpoint_path + ".tmp"
+        with open(tmp_path, "wb") as fout:
+            fout.write(INDEX_ENTRY.pack(self._cursor))
+            if self._durability is not QueueDurability.OFF:
+                fout.flush()
+                os.fsync(fout.fileno())
+        os.replace(tmp_path, self._checkpoint_path)
+        # segments followed by one starting at or before the cursor are fully consumed
+        while len(self._segments) > 1 and self._segments[1].base <= self._cursor:
+            self._segments.pop(0).remove()
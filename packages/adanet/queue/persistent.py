@@ -0,0 +1,35 @@
+from typing import Dict, Type, Union, Optional
+
+from adanet.constants import QUEUE_PERSISTENT_BACKEND
+from adanet.queue.base import QueueType
+from adanet.queue.log import Queue as LogQueue
+from adanet.queue.sqlite import Queue as SQLiteQueue
+
+PersistentQueue = Union[SQLiteQueue, LogQueue]
+
+# storage persistent queues can be backed by (see `QUEUE_PERSISTENT_BACKEND`)
+BACKENDS: Dict[str, Type[PersistentQueue]] = {
+    "sqlite": SQLiteQueue,
+    "log": LogQueue,
+}
+
+
+def make_persistent_queue(channel: str, max_size: int = -1, lifo: bool = False,
+                          backend: Optional[str] = None) -> PersistentQueue:
+    """
+    Creates a persistent queue on the configured backend.
+
+    :param channel:     the channel the queue belongs to
+    :param max_size:    max number of messages in the queue (-1 means unbounded)
+    :param lifo:        whether the newest messages are consumed first
+    :param backend:     one of `BACKENDS`, defaults to `QUEUE_PERSISTENT_BACKEND`
+    :return:            the queue
+    """
+    backend = backend or QUEUE_PERSISTENT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown persistent queue backend '{backend}'. "
+                         f"Expected one of {list(BACKENDS.keys())}.")
+    if lifo:
+        # logs are consumed in the order they are written
+        return SQLiteQueue(QueueType.PERSISTENT, channel, max_size, lifo=True)
+    return BACKENDS[backend](QueueType.PERSISTENT, channel, max_size)
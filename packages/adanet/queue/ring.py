@@ -0,0 +1,64 @@
+from threading import Condition
+from typing import Optional, List
+
+from adanet.queue.base import IQueue, QueueType
+
+
+class Queue(IQueue):
+    """
+    Fixed-size in-memory queue. Slots are allocated upfront, when the queue is full the
+    oldest message is dropped to make room for the new one.
+    """
+
+    def __init__(self, type: QueueType, channel: str, max_size: int, lifo: bool = False):
+        super(Queue, self).__init__(type, channel)
+        if max_size < 1:
+            raise ValueError(f"Ring queues need a size of at least 1, got {max_size}.")
+        self._max_size: int = max_size
+        self._lifo: bool = lifo
+        self._slots: List[Optional[bytes]] = [None] * max_size
+        # index of the oldest message, number of messages
+        self._head: int = 0
+        self._length: int = 0
+        self._condition: Condition = Condition()
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def put(self, data: bytes, block: bool = True):
+        evicted: Optional[bytes] = None
+        with self._condition:
+            if self._length == self._max_size:
+                # the oldest message was never consumed, it makes room for the new one
+                evicted = self._slots[self._head]
+                self._slots[self._head] = data
+                self._head = (self._head + 1) % self._max_size
+            else:
+                self._slots[(self._head + self._length) % self._max_size] = data
+                self._length += 1
+            self._condition.notify()
+        if evicted is not None:
+            self._evicted(evicted)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Optional[bytes]:
+        with self._condition:
+            if self._length == 0:
+                if not block:
+                    return None
+                self._condition.wait_for(lambda: self._length > 0, timeout=timeout)
+                if self._length == 0:
+                    return None
+            if self._lifo:
+                i: int = (self._head + self._length - 1) % self._max_size
+            else:
+                i: int = self._head
+                self._head = (self._head + 1) % self._max_size
+            data: bytes = self._slots[i]
+            self._slots[i] = None
+            self._length -= 1
+        return data
@@ -1,63 +1,279 @@
 import os
-from typing import Optional, Any
+import pickle
+import sqlite3
+import time
+from threading import Condition
+from typing import Optional, Any, List, Tuple, Iterable
 
-from persistqueue import SQLiteQueue, Empty
+from adanet.constants import QUEUE_PATH, QUEUE_DURABILITY, QUEUE_COMMIT_BATCH, \
+    QUEUE_COMMIT_EVERY_SEC
+from adanet.queue.base import IQueue, QueueType, QueueDurability
+from adanet.queue.flusher import flusher
 
-from adanet.asyncio import loop, Task
-from adanet.constants import QUEUE_PATH
-from adanet.queue.base import IQueue, QueueType
+# NOTE: the layout of the database is the same used by `persistqueue.SQLiteQueue`, so that the
+#       queues written by previous versions can still be read
+DB_FILE_NAME = "data.db"
+TABLE_NAME = "queue_default"
+# the length of the queue is kept in here, updated (by triggers) in the same transaction as
+# the data
+META_TABLE_NAME = "queue_meta"
+# how often a blocked `get` checks for messages added by other processes
+POLL_EVERY_SEC = 0.1
+# how hard SQLite tries to get commits to the disk, for each durability level
+SYNCHRONOUS = {
+    QueueDurability.FULL: "FULL",
+    QueueDurability.BATCH: "NORMAL",
+    QueueDurability.OFF: "OFF",
+}
 
 
-class Queue(IQueue, SQLiteQueue):
+class Queue(IQueue):
+    """
+    SQLite-backed queue.
 
-    def __init__(self, type: QueueType, channel: str, max_size: int, multithreading: bool = False,
-                 memory: bool = False):
+    Operations are committed in groups (see `QueueDurability`), once `QUEUE_COMMIT_BATCH`
+    operations are pending or `QUEUE_COMMIT_EVERY_SEC` seconds after the first of them,
+    whichever comes first. The database is in WAL mode, so readers (e.g., a source reading what
+    a sink wrote from another process) do not block the writer.
+    """
+
+    def __init__(self, type: QueueType, channel: str, max_size: int, memory: bool = False,
+                 lifo: bool = False, durability: Optional[QueueDurability] = None):
         IQueue.__init__(self, type, channel)
         self._max_size: int = max_size
+        self._lifo: bool = lifo
+        self._durability: QueueDurability = QueueDurability(durability or QUEUE_DURABILITY)
+        self._order: str = "DESC" if lifo else "ASC"
         # in memory database
         if memory:
-            queue_location: str = ":memory:"
+            self._path: str = ":memory:"
         else:
             queue_location: str = os.path.join(QUEUE_PATH, type.value, self._channel.strip("/"))
             os.makedirs(queue_location, exist_ok=True)
-        # make queue
-        SQLiteQueue.__init__(self, queue_location, auto_commit=True, multithreading=multithreading)
+            self._path: str = os.path.join(queue_location, DB_FILE_NAME)
+        # NOTE: transactions are managed explicitly (see `_commit`)
+        self._db: sqlite3.Connection = sqlite3.connect(self._path, check_same_thread=False,
+                                                       isolation_level=None, timeout=10.0)
+        if not memory:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(f"PRAGMA synchronous={SYNCHRONOUS[self._durability]}")
+        self._condition: Condition = Condition()
+        # operations not committed yet, time of the first of them
+        self._pending: int = 0
+        self._pending_since: Optional[float] = None
         # internal state
-        # - length is taken from the database at the beginning
-        self._length: int = self._count()
-        # update queue size every once in a while
-        task: Task = Task(1.0, self._update_length)
-        loop.add_task(task)
+        # - length is read from the database at the beginning and then kept up to date
+        self._length: int = self._setup()
+        # - the length changes under our feet when other processes (e.g., a DiskSink writing
+        #   what a DiskSource reads) commit to the same database, see `_refresh`
+        self._shared: bool = not memory
+        self._data_version: int = self._version()
+        # commit what is left pending when nothing else happens
+        flusher.add(self)
 
     @property
     def size(self) -> int:
-        return self._length
+        return self.length
 
     @property
     def length(self) -> int:
+        if self._shared:
+            self._refresh()
         return self._length
 
     @property
     def max_size(self) -> int:
         return self._max_size
 
+    @property
+    def durability(self) -> QueueDurability:
+        return self._durability
+
     def put(self, data: bytes, block: bool = True):
-        if self._max_size > 0 and self.length >= self._max_size:
-            # remove oldest
-            _ = SQLiteQueue.get(self, block=False, timeout=0)
-            self._length -= 1
-        # add new
-        SQLiteQueue.put(self, data, block=block)
-        self._length += 1
+        self.put_many([data])
+
+    def put_many(self, items: Iterable[bytes]):
+        """
+        Adds multiple messages to the queue at once.
+        """
+        evicted: List[bytes] = []
+        with self._condition:
+            self._begin()
+            try:
+                rows: List[Tuple[bytes, float]] = []
+                now: float = time.time()
+                for data in items:
+                    if self._max_size > 0 and self._length + len(rows) >= self._max_size:
+                        # make room, drop the oldest (among what is on disk, then among the new)
+                        if self._length > 0:
+                            evicted.extend(self._take(1, oldest=True))
+                        elif rows:
+                            evicted.append(pickle.loads(rows.pop(0)[0]))
+                    rows.append((pickle.dumps(data, protocol=4), now))
+                self._db.executemany(
+                    f"INSERT INTO {TABLE_NAME} (data, timestamp) VALUES (?, ?)", rows)
+                self._length += len(rows)
+                self._done(len(rows))
+            except BaseException:
+                self._rollback()
+                raise
+            self._condition.notify_all()
+        for data in evicted:
+            self._evicted(data)
 
     def get(self, block: bool = True, timeout: Optional[float] = None, default: Any = None) -> \
             Optional[bytes]:
-        try:
-            data = SQLiteQueue.get(self, block=block, timeout=timeout)
-            self._length -= 1
-            return data
-        except Empty:
-            return default
-
-    def _update_length(self):
-        self._length = self._count()
+        items: List[bytes] = self.get_many(1, block=block, timeout=timeout)
+        return items[0] if items else default
+
+    def get_many(self, count: int, block: bool = False, timeout: Optional[float] = None) -> \
+            List[bytes]:
+        """
+        Takes up to `count` messages off the queue.
+
+        :param count:   max number of messages to take
+        :param block:   whether to wait for at least one message to be available
+        :param timeout: max time (in seconds) to wait for, None means forever
+        :return:        the messages, possibly none
+        """
+        deadline: Optional[float] = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                self._begin()
+                try:
+                    items: List[bytes] = self._take(count)
+                    if items or not block:
+                        self._done(len(items))
+                        return items
+                    remaining: float = POLL_EVERY_SEC if deadline is None else \
+                        min(POLL_EVERY_SEC, deadline - time.time())
+                    if remaining <= 0:
+                        self._done(0)
+                        return []
+                    # other processes can add messages too, check every once in a while (out
+                    # of the transaction, or we would keep looking at the same snapshot)
+                    self._commit()
+                except BaseException:
+                    self._rollback()
+                    raise
+                self._condition.wait(remaining)
+
+    def peek(self, count: int, after: Optional[int] = None) -> List[Tuple[int, bytes]]:
+        """
+        Reads (without removing them) the oldest messages in the queue.
+
+        :param count:   max number of messages to read
+        :param after:   only read messages with an id greater than this
+        :return:        list of (id, message)
+        """
+        with self._condition:
+            rows = self._db.execute(
+                f"SELECT _id, data FROM {TABLE_NAME} WHERE _id > ? ORDER BY _id ASC LIMIT ?",
+                (-1 if after is None else after, count)).fetchall()
+        return [(rowid, pickle.loads(data)) for rowid, data in rows]
+
+    def discard(self, ids: List[int]):
+        """
+        Removes the messages with the given ids (see `peek`) from the queue.
+        """
+        if not ids:
+            return
+        with self._condition:
+            self._begin()
+            try:
+                deleted: int = self._db.executemany(f"DELETE FROM {TABLE_NAME} WHERE _id = ?",
+                                                    [(i,) for i in ids]).rowcount
+                self._length -= deleted
+                self._done(len(ids))
+            except BaseException:
+                self._rollback()
+                raise
+
+    def flush(self, older_than: float = 0.0):
+        """
+        Commits the pending operations (if they have been pending for at least `older_than`
+        seconds).
+        """
+        with self._condition:
+            if self._pending_since is None:
+                return
+            if time.time() - self._pending_since >= older_than:
+                self._commit()
+
+    def _take(self, count: int, oldest: bool = False) -> List[bytes]:
+        order: str = "ASC" if oldest else self._order
+        rows = self._db.execute(
+            f"SELECT _id, data FROM {TABLE_NAME} ORDER BY _id {order} LIMIT ?", (count,)
+        ).fetchall()
+        if not rows:
+            return []
+        self._db.executemany(f"DELETE FROM {TABLE_NAME} WHERE _id = ?", [(r[0],) for r in rows])
+        self._length -= len(rows)
+        return [pickle.loads(data) for _, data in rows]
+
+    def _begin(self):
+        # NOTE: transactions take the write lock right away, a (deferred) transaction that
+        #       reads first cannot write anymore once another process commits (in WAL mode)
+        if not self._db.in_transaction:
+            self._db.execute("BEGIN IMMEDIATE")
+
+    def _done(self, operations: int):
+        self._pending += operations
+        if self._pending == 0:
+            # nothing to commit, do not hold the write lock
+            self._commit()
+            return
+        if self._pending_since is None:
+            self._pending_since = time.time()
+        if self._durability is QueueDurability.FULL or self._pending >= QUEUE_COMMIT_BATCH or \
+                time.time() - self._pending_since >= QUEUE_COMMIT_EVERY_SEC:
+            self._commit()
+
+    def _commit(self):
+        if self._db.in_transaction:
+            self._db.execute("COMMIT")
+        self._pending = 0
+        self._pending_since = None
+
+    def _rollback(self):
+        if self._db.in_transaction:
+            self._db.execute("ROLLBACK")
+        self._pending = 0
+        self._pending_since = None
+        # what was not committed is gone
+        self._length = self._stored_length()
+
+    def _setup(self) -> int:
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} ("
+                         f"_id INTEGER PRIMARY KEY AUTOINCREMENT, data BLOB, timestamp FLOAT)")
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE_NAME} ("
+                         f"key TEXT PRIMARY KEY, value INTEGER)")
+        # queues created before the length was kept need to be counted (once)
+        if self._db.execute(f"SELECT 1 FROM {META_TABLE_NAME} WHERE key = 'length'").fetchone() \
+                is None:
+            self._db.execute(f"INSERT INTO {META_TABLE_NAME} (key, value) "
+                             f"SELECT 'length', COUNT(_id) FROM {TABLE_NAME}")
+        for event, delta in [("INSERT", "+ 1"), ("DELETE", "- 1")]:
+            self._db.execute(f"CREATE TRIGGER IF NOT EXISTS {TABLE_NAME}_{event.lower()} "
+                             f"AFTER {event} ON {TABLE_NAME} BEGIN "
+                             f"UPDATE {META_TABLE_NAME} SET value = value {delta} "
+                             f"WHERE key = 'length'; END")
+        length: int = self._stored_length()
+        self._db.execute("COMMIT")
+        return length
+
+    def _stored_length(self) -> int:
+        return self._db.execute(
+            f"SELECT value FROM {META_TABLE_NAME} WHERE key = 'length'").fetchone()[0]
+
+    def _version(self) -> int:
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _refresh(self):
+        with self._condition:
+            # the data version only changes when other connections commit
+            version: int = self._version()
+            if version != self._data_version:
+                self._data_version = version
+                self._length = self._stored_length()
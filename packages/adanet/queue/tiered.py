@@ -0,0 +1,210 @@
+import os
+import shutil
+import struct
+import uuid
+from collections import deque
+from threading import Condition
+from typing import Optional, Deque, BinaryIO, Dict, List
+
+from adanet.constants import QUEUE_PATH, QUEUE_MEMORY_BYTES, QUEUE_SEGMENT_BYTES
+from adanet.queue.base import IQueue, QueueType
+
+# every message in a segment is prefixed by its length
+RECORD_HEADER = struct.Struct("<I")
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # the process exists, it belongs to somebody else
+        pass
+    return True
+
+
+def _discard_leftovers(path: str):
+    """
+    Removes what the queues of processes that are no longer running spilled under `path`.
+    The head of those queues was in memory, what is left on disk cannot be put back in order.
+    """
+    if not os.path.isdir(path):
+        return
+    for name in sorted(os.listdir(path)):
+        owner: str = name.split("-", 1)[0]
+        if owner.isdigit() and _is_running(int(owner)):
+            continue
+        leftover: str = os.path.join(path, name)
+        segments: List[str] = [os.path.join(leftover, f) for f in os.listdir(leftover)] \
+            if os.path.isdir(leftover) else [leftover]
+        size: int = sum(os.path.getsize(segment) for segment in segments)
+        print(f"WARNING: Discarding {len(segments)} segment(s) ({size} bytes) spilled by a "
+              f"previous run to '{leftover}'.")
+        if os.path.isdir(leftover):
+            shutil.rmtree(leftover, ignore_errors=True)
+        else:
+            os.remove(leftover)
+
+
+class SegmentStore:
+    """
+    FIFO of messages stored in files (segments) of about `segment_bytes` bytes each. Messages
+    are appended to the newest segment and read back one segment at a time, the oldest first.
+    """
+
+    def __init__(self, path: str, segment_bytes: int):
+        self._path: str = path
+        self._segment_bytes: int = segment_bytes
+        # segments that are complete, oldest first
+        self._segments: Deque[str] = deque()
+        # segment being written
+        self._writer: Optional[BinaryIO] = None
+        self._writer_bytes: int = 0
+        self._next: int = 0
+        # content
+        self._count: int = 0
+        self._bytes: int = 0
+        os.makedirs(self._path, exist_ok=True)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def append(self, data: bytes):
+        if self._writer is None:
+            self._writer = open(os.path.join(self._path, f"{self._next:012d}.seg"), "wb")
+            self._next += 1
+        self._writer.write(RECORD_HEADER.pack(len(data)))
+        self._writer.write(data)
+        self._writer_bytes += RECORD_HEADER.size + len(data)
+        self._count += 1
+        self._bytes += len(data)
+        if self._writer_bytes >= self._segment_bytes:
+            self._seal()
+
+    def load(self) -> List[bytes]:
+        """
+        Removes the oldest segment from the store and returns its messages.
+        """
+        if not self._segments:
+            if self._writer is None:
+                return []
+            # the segment being written is the only one left
+            self._seal()
+        path: str = self._segments.popleft()
+        with open(path, "rb") as fin:
+            buffer: bytes = fin.read()
+        os.remove(path)
+        messages: List[bytes] = []
+        cursor: int = 0
+        while cursor < len(buffer):
+            size, = RECORD_HEADER.unpack_from(buffer, cursor)
+            cursor += RECORD_HEADER.size
+            messages.append(buffer[cursor:cursor + size])
+            cursor += size
+        self._count -= len(messages)
+        self._bytes -= sum(len(m) for m in messages)
+        return messages
+
+    def _seal(self):
+        self._writer.close()
+        self._segments.append(self._writer.name)
+        self._writer = None
+        self._writer_bytes = 0
+
+
+class Queue(IQueue):
+    """
+    FIFO queue keeping its head in memory and spilling the rest to disk.
+
+    Messages are kept in memory until they take `memory_bytes` bytes, past that (and until the
+    queue is drained back into memory) new messages are appended to a `SegmentStore`. Spilled
+    messages are reloaded, one segment at a time, when the messages in memory drop below half
+    of `memory_bytes`.
+
+    NOTE: the head of the queue lives in memory, the queue does not survive restarts.
+    """
+
+    def __init__(self, type: QueueType, channel: str, max_size: int,
+                 memory_bytes: int = QUEUE_MEMORY_BYTES, segment_bytes: int = QUEUE_SEGMENT_BYTES):
+        super(Queue, self).__init__(type, channel)
+        self._max_size: int = max_size
+        self._memory_bytes: int = memory_bytes
+        self._head: Deque[bytes] = deque()
+        self._head_bytes: int = 0
+        # every queue spills to a directory of its own, other instances (in this or other
+        # processes) may be using the same channel
+        spill: str = os.path.join(QUEUE_PATH, type.value, self._channel.strip("/"), "spill")
+        _discard_leftovers(spill)
+        self._tail: SegmentStore = SegmentStore(
+            os.path.join(spill, f"{os.getpid()}-{uuid.uuid4().hex}"), segment_bytes)
+        self._condition: Condition = Condition()
+        # statistics
+        self._spilled: int = 0
+        self._reloads: int = 0
+
+    @property
+    def length(self) -> int:
+        return len(self._head) + self._tail.count
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            # bytes held in memory and on disk
+            "memory": self._head_bytes,
+            "disk": self._tail.size,
+            # messages written to disk, segments read back
+            "spilled": self._spilled,
+            "reloads": self._reloads,
+        }
+
+    def put(self, data: bytes, block: bool = True):
+        evicted: Optional[bytes] = None
+        with self._condition:
+            if 0 < self._max_size <= self.length:
+                evicted = self._pop()
+            if self._tail.count == 0 and self._head_bytes + len(data) <= self._memory_bytes:
+                self._head.append(data)
+                self._head_bytes += len(data)
+            else:
+                # messages on disk are older than this one, it goes after them
+                self._tail.append(data)
+                self._spilled += 1
+            self._condition.notify()
+        if evicted is not None:
+            self._evicted(evicted)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Optional[bytes]:
+        with self._condition:
+            if self.length == 0:
+                if not block:
+                    return None
+                self._condition.wait_for(lambda: self.length > 0, timeout=timeout)
+                if self.length == 0:
+                    return None
+            return self._pop()
+
+    def _pop(self) -> bytes:
+        if not self._head:
+            self._reload()
+        data: bytes = self._head.popleft()
+        self._head_bytes -= len(data)
+        # refill ahead of time, before the head runs dry
+        if self._tail.count > 0 and self._head_bytes < self._memory_bytes / 2:
+            self._reload()
+        return data
+
+    def _reload(self):
+        messages: List[bytes] = self._tail.load()
+        self._head.extend(messages)
+        self._head_bytes += sum(len(m) for m in messages)
+        self._reloads += 1
@@ -1,7 +1,7 @@
 from time import sleep
 import math as mathlib
 from threading import Thread, Semaphore
-from typing import Dict, Union
+from typing import Dict, Union, Optional
 
 from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC
 from adanet.time import Clock
@@ -81,9 +81,10 @@ class Simulator(Shuttable, Thread):
             sleep(Clock.period(0.1 * FORMULATE_PROBLEM_EVERY_SEC))
 
     @staticmethod
-    def _update_channel(channel: Channel, simulation: SimulatedChannel) -> Dict[str, float]:
+    def _update_channel(channel: Channel, simulation: SimulatedChannel,
+                        t: Optional[float] = None) -> Dict[str, float]:
         # NOTE: these are the variables available to the simulation scripts
-        t: float = Clock.relative_time()
+        t: float = Clock.relative_time() if t is None else t
         c: Channel = channel
         math = mathlib
         # NOTE: -----------------------------------------------------------
@@ -100,9 +101,10 @@ class Simulator(Shuttable, Thread):
         return update
 
     @staticmethod
-    def _update_link(link: Link, simulation: SimulatedLink) -> Dict[str, float]:
+    def _update_link(link: Link, simulation: SimulatedLink,
+                     t: Optional[float] = None) -> Dict[str, float]:
         # NOTE: these are the variables available to the simulation scripts
-        t: float = Clock.relative_time()
+        t: float = Clock.relative_time() if t is None else t
         l: Link = link
         math = mathlib
         # NOTE: -----------------------------------------------------------
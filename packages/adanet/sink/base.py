@@ -1,12 +1,97 @@
-from abc import abstractmethod, ABC
+from abc import abstractmethod
+from typing import Dict, Optional, Callable, Tuple
 
+from ..constants import SINK_QUEUE_SIZE
+from ..types.misc import FlowWatch
 from ..types.pipes import IPipe
+from ..workers import workers, Lane
 
 
 class ISink(IPipe):
 
-    def __init__(self, name: str, size: int, *_, **__):
+    def __init__(self, name: str, size: int, *_, **kwargs):
         super(ISink, self).__init__(name=name, size=size)
+        # statistics
+        self._throughput: FlowWatch = FlowWatch()
+        # messages waiting to be processed (in order) by the shared workers
+        self._inbox_size: int = kwargs.get("queue_size", SINK_QUEUE_SIZE)
+        self._inbox: Lane = workers.lane(name, lambda item: self._process(*item),
+                                         self._inbox_size, kwargs.get("lossless", False))
+
+    @property
+    def backlog(self) -> int:
+        """
+        Number of messages waiting to be processed by the sink.
+        """
+        return self._inbox.backlog
+
+    @property
+    def capacity(self) -> int:
+        """
+        Maximum number of messages that can wait to be processed by the sink.
+        """
+        return self._inbox_size
+
+    @property
+    def throughput(self) -> float:
+        """
+        Number of messages per second processed by the sink.
+        """
+        return self._throughput.frequency if self._throughput.counter else 0.0
+
+    @property
+    def dropped(self) -> int:
+        """
+        Number of messages dropped because the sink was not keeping up.
+        """
+        return self._inbox.dropped
+
+    @property
+    def lag(self) -> float:
+        """
+        Time (in seconds) from when a message is received to when the sink is done with it.
+        """
+        return self._inbox.statistics["latency"]
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "backlog": self.backlog,
+            "capacity": self.capacity,
+            "throughput": self.throughput,
+            "dropped": self.dropped,
+            "lag": self.lag,
+        }
+
+    def push(self, data: bytes, on_done: Optional[Callable[[], None]] = None):
+        """
+        Queues data for the sink to process. The oldest message is dropped if the sink is not
+        keeping up (unless the sink is lossless).
+
+        :param data:        the data to process
+        :param on_done:     function to call once the sink is done with the data (and holds it
+                            for good, see `flush`), never called if the data is dropped or the
+                            sink fails to process it
+        """
+        item: Tuple[bytes, Optional[Callable[[], None]]] = (data, on_done)
+        self._inbox.push(item)
+
+    def _process(self, data: bytes, on_done: Optional[Callable[[], None]] = None):
+        try:
+            self.recv(data)
+        finally:
+            self._throughput.signal(len(data))
+        if on_done is not None:
+            # whoever is waiting on the data can forget about it, make sure we do not
+            self.flush()
+            on_done()
+
+    def flush(self):
+        """
+        Makes sure the data processed so far is not lost if the agent stops (e.g., commits it
+        to disk).
+        """
+        pass
 
     @abstractmethod
     def recv(self, data: bytes):
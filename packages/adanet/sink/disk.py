@@ -1,14 +1,20 @@
 from .base import ISink
-from ..queue.base import QueueType
-from ..queue.sqlite import Queue
+from ..queue.persistent import PersistentQueue, make_persistent_queue
 
 
 class DiskSink(ISink):
 
-    def __init__(self, name: str, size: int, *_, **__):
-        super(DiskSink, self).__init__(name=name, size=size)
-        self._db: Queue = Queue(QueueType.PERSISTENT, self.name, max_size=-1, multithreading=True)
+    def __init__(self, name: str, size: int, *_, **kwargs):
+        # messages meant to be persisted are never dropped, a backlog past the size of the
+        # inbox is reported upstream (see `Switchboard.report_backpressure`) to slow down the
+        # source instead
+        super(DiskSink, self).__init__(name=name, size=size, lossless=True, **kwargs)
+        self._db: PersistentQueue = make_persistent_queue(self.name)
 
     def recv(self, data: bytes):
         # print(f"RECEIVED DATA: {len(data)} bytes, DB: {self._db.length}")
         self._db.put(data)
+
+    def flush(self):
+        # messages are committed in groups (see `QueueDurability`)
+        self._db.flush()
@@ -1,4 +1,4 @@
-from typing import Type, Dict
+from typing import Type, Dict, Callable, Optional
 
 import cbor2
 import rospy
@@ -6,6 +6,7 @@ from rospy.msg import AnyMsg
 
 from .base import ISink
 from ..networking.ros import ROS
+from ..projection import Projection
 
 
 class ROSSink(ISink):
@@ -24,18 +25,36 @@ class ROSSink(ISink):
         ROS.register()
         # get message type from arguments
         self.MsgType: Type[AnyMsg] = ROS.load_message_type(self._arguments["message_type"])
+        # converter from Python dicts to ROS messages (compiled once per message type)
+        self._decode: Callable[[Dict], AnyMsg] = ROS.decoder(self.MsgType)
+        # the source forwards serialized ROS messages as they are, publish them as they are
+        self._raw: bool = self._arguments.get("raw", False)
+        self._RawMsgType: Type[AnyMsg] = ROS.raw_message_type(self.MsgType)
+        # the source kept only some of the fields, at reduced precision
+        self._projection: Optional[Projection] = Projection.from_arguments(self._arguments)
 
         # create publisher
-        self._publisher = rospy.Publisher(self.topic, self.MsgType, queue_size=1)
+        self._publisher = rospy.Publisher(self.topic,
+                                          self._RawMsgType if self._raw else self.MsgType,
+                                          queue_size=1)
 
     @property
     def topic(self) -> str:
         return self.name
 
     def recv(self, data: bytes):
+        if self._raw:
+            msg: AnyMsg = self._RawMsgType()
+            # noinspection PyProtectedMember
+            msg._buff = data
+            self._publisher.publish(msg)
+            return
         # deserialize char bytes into Python dict
         data: Dict = cbor2.loads(data)
+        # restore the quantized fields (if any)
+        if self._projection is not None:
+            data = self._projection.invert(data)
         # convert Python dict to ROS message
-        msg: AnyMsg = ROS.dict_to_message(data, self.MsgType)
+        msg: AnyMsg = self._decode(data)
         # send data out into the ROS network
         self._publisher.publish(msg)
@@ -0,0 +1,263 @@
+from collections import defaultdict
+from math import floor
+from typing import List, Dict, Optional, Tuple
+
+from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC, MPC_HORIZON_WINDOWS, \
+    MPC_BUDGET_HORIZON_SEC, MPC_BULK_BANDWIDTH_FRACTION
+from adanet.solver.base import AbsSolver
+from adanet.types.problem import Problem, Channel, Link, LatencyPolicy, ChannelKind
+from adanet.types.solution import Solution, SolvedChannel
+
+Priority = int
+Interface = str
+Window = int
+Slot = Tuple[Window, Link]
+
+
+class RecedingHorizonSolver(AbsSolver):
+    """
+    Model predictive (receding horizon) solver.
+
+    The allocation of channels to links is planned over the next `horizon` problem windows
+    using the links' forecasts (see `Link.forecast`) and the channels' backlog
+    (see `Channel.queue_length`). Only the plan for the first window is applied, the rest is
+    re-planned at the next problem formulation.
+
+    Compared to `SimpleSolver`:
+        - metered links are paced so that their budget lasts `budget_horizon` seconds
+          instead of being drained as fast as possible;
+        - backlog is deferred to upcoming windows with high-bandwidth unmetered capacity
+          (e.g., a forecasted wifi contact) instead of being trickled over slow links;
+        - live traffic is always served in the window in which it is produced.
+    """
+
+    def __init__(self, horizon: int = MPC_HORIZON_WINDOWS,
+                 budget_horizon: float = MPC_BUDGET_HORIZON_SEC):
+        super(RecedingHorizonSolver, self).__init__()
+        self._horizon: int = max(1, horizon)
+        self._budget_horizon: float = budget_horizon
+
+    def solve(self, problem: Problem) -> Solution:
+        solution: Solution = Solution(problem=problem, assignments=[])
+        # return an empty solution if we don't have information about the links
+        if problem.links is None:
+            return solution
+        window: float = FORMULATE_PROBLEM_EVERY_SEC
+        # - find biggest currently streaming channel
+        biggest_packet_size: int = 0
+        for c in problem.channels:
+            if c.frequency and c.size:
+                biggest_packet_size = max(biggest_packet_size, c.size)
+        # - sort links by latency
+        links: List[Link] = sorted(problem.links, key=lambda l: l.latency)
+        # - capacity (in bytes) of each link in each window of the horizon
+        capacity: Dict[Interface, List[float]] = {
+            link.interface: self._capacity(link, biggest_packet_size, window) for link in links
+        }
+        # - cumulative budget (in bytes) each metered link is allowed to spend by each window
+        allowance: Dict[Interface, List[float]] = {
+            link.interface: self._allowance(link, window) for link in links
+            if link.budget is not None
+        }
+        spent: Dict[Interface, List[float]] = {
+            iface: [0.0] * self._horizon for iface in allowance
+        }
+        # - bandwidth above which a slot is considered good for bulk (backlog) transfers
+        best_bandwidth: float = max([max(c) for c in capacity.values()] or [0.0]) / window
+        bulk_bandwidth: float = best_bandwidth * MPC_BULK_BANDWIDTH_FRACTION
+        # - group channels by priority (cached lanes last)
+        groups: List[List[Channel]] = self._channel_groups(problem.channels)
+        # - allocate live traffic first and then backlog, by priority
+        plans: Dict[str, Dict[Interface, int]] = {}
+        for channels in groups:
+            for channel in channels:
+                if channel.size is None:
+                    continue
+                plan: Dict[Interface, int] = defaultdict(lambda: 0)
+                good_links, slow_links = self._compatible_links(channel, links)
+                # - live traffic has to be served in the window it is produced in
+                live: int = self._live_packets(channel, window)
+                for h in range(self._horizon):
+                    missing: int = live
+                    for tier in self._live_tiers(good_links, slow_links):
+                        sent: Dict[Interface, int] = self._fill(
+                            channel, missing, [(h, link) for link in tier],
+                            capacity, allowance, spent)
+                        missing -= sum(sent.values())
+                        if h == 0:
+                            for iface, n in sent.items():
+                                plan[iface] += n
+                # - backlog can be sent in any window of the horizon
+                missing: int = channel.queue_length
+                for slots in self._backlog_tiers(good_links, slow_links, capacity, window,
+                                                 bulk_bandwidth):
+                    for slot in slots:
+                        sent: Dict[Interface, int] = self._fill(
+                            channel, missing, [slot], capacity, allowance, spent)
+                        missing -= sum(sent.values())
+                        if slot[0] == 0:
+                            for iface, n in sent.items():
+                                plan[iface] += n
+                plans[channel.name] = plan
+        # - apply the plan of the first window only
+        for channels in groups:
+            for channel in channels:
+                plan: Dict[Interface, int] = plans.get(channel.name, {})
+                packets: int = sum(plan.values())
+                interfaces: List[str] = self._interleave(
+                    [(link.interface, plan.get(link.interface, 0)) for link in links])
+                solution.assignments.append(SolvedChannel(
+                    name=channel.name,
+                    frequency=packets / window,
+                    interfaces=self._compact_sequence(interfaces),
+                    problem=channel,
+                ))
+        # ---
+        return solution
+
+    def _capacity(self, link: Link, biggest_packet_size: int, window: float) -> List[float]:
+        # plan on the expected goodput of the link, i.e., bandwidth x reliability
+        bandwidth: float = (link.bandwidth if link.bandwidth else 0.0) * link.reliability
+        # to avoid getting stuck in a bandwidth=0 situation, assume bandwidth is always good
+        # enough to transfer a single packet of the biggest channel in the current window
+        capacity: List[float] = [max(biggest_packet_size, bandwidth) * window]
+        for h in range(1, self._horizon):
+            # the forecast starts with the window following the current one
+            predicted: float = bandwidth
+            if link.forecast is not None and link.forecast.horizon >= h:
+                predicted = link.forecast.bandwidth[h - 1] * link.forecast.availability[h - 1] \
+                    * link.reliability
+            capacity.append(predicted * window)
+        return capacity
+
+    def _allowance(self, link: Link, window: float) -> List[float]:
+        budget: float = max(0.0, link.budget)
+        if self._budget_horizon <= window:
+            return [budget] * self._horizon
+        return [min(budget, budget * (h + 1) * window / self._budget_horizon)
+                for h in range(self._horizon)]
+
+    @staticmethod
+    def _live_packets(channel: Channel, window: float) -> int:
+        # disk channels have no live traffic, their content is all backlog
+        if channel.kind in [ChannelKind.DISK, ChannelKind.DISK.value]:
+            return 0
+        # QoS frequency is either the given QoS frequency or the original frequency
+        qos_frequency: float = channel.qos.frequency \
+            if (channel.qos and channel.qos.frequency) else channel.frequency
+        # problem frequency is the minimum between QoS and current
+        frequency: float = min(qos_frequency, channel.frequency) if channel.frequency else 0.0
+        return int(frequency * window)
+
+    @staticmethod
+    def _compatible_links(channel: Channel, links: List[Link]) -> Tuple[List[Link], List[Link]]:
+        good_links: List[Link] = []
+        slow_links: List[Link] = []
+        for link in links:
+            compatible: bool = channel.qos is None or channel.qos.latency is None or \
+                               channel.qos.latency >= link.latency
+            if compatible:
+                good_links.append(link)
+            else:
+                slow_links.append(link)
+        # slow links can only be used by channels with a best-effort latency policy
+        best_effort: bool = channel.qos is not None and channel.qos.latency_policy in \
+            [LatencyPolicy.BEST_EFFORT, LatencyPolicy.BEST_EFFORT.value]
+        return good_links, (slow_links if best_effort else [])
+
+    @staticmethod
+    def _live_tiers(good_links: List[Link], slow_links: List[Link]) -> List[List[Link]]:
+        # unmetered links first, metered links only when needed
+        return [
+            [link for link in good_links if link.budget is None],
+            [link for link in good_links if link.budget is not None],
+            [link for link in slow_links if link.budget is None],
+            [link for link in slow_links if link.budget is not None],
+        ]
+
+    def _backlog_tiers(self, good_links: List[Link], slow_links: List[Link],
+                       capacity: Dict[Interface, List[float]], window: float,
+                       bulk_bandwidth: float) -> List[List[Slot]]:
+        def slots(links: List[Link], bulk: Optional[bool] = None) -> List[Slot]:
+            res: List[Slot] = []
+            for h in range(self._horizon):
+                for link in links:
+                    is_bulk: bool = (capacity[link.interface][h] / window) >= bulk_bandwidth
+                    if bulk is None or bulk == is_bulk:
+                        res.append((h, link))
+            return res
+
+        unmetered: List[Link] = [link for link in good_links + slow_links if link.budget is None]
+        metered: List[Link] = [link for link in good_links + slow_links if link.budget is not None]
+        return [
+            # high-bandwidth unmetered slots (e.g., an upcoming wifi contact) first,
+            slots(unmetered, bulk=True),
+            # then any unmetered slot,
+            slots(unmetered, bulk=False),
+            # metered links only as a last resort
+            slots(metered),
+        ]
+
+    def _fill(self, channel: Channel, packets: int, slots: List[Slot],
+              capacity: Dict[Interface, List[float]], allowance: Dict[Interface, List[float]],
+              spent: Dict[Interface, List[float]]) -> Dict[Interface, int]:
+        """
+        Spreads `packets` packets of the given channel as evenly as possible over the given
+        slots (within the same window), consuming capacity and budget.
+        """
+        sent: Dict[Interface, int] = defaultdict(lambda: 0)
+        size: float = channel.size
+        if packets <= 0 or size <= 0:
+            return sent
+        room: Dict[int, int] = {i: self._room(slot, size, capacity, allowance, spent)
+                                for i, slot in enumerate(slots)}
+        while packets > 0:
+            open_slots: List[int] = [i for i, r in room.items() if r > 0]
+            if not open_slots:
+                break
+            share: int = max(1, packets // len(open_slots))
+            for i in open_slots:
+                if packets <= 0:
+                    break
+                n: int = min(share, room[i], packets)
+                h, link = slots[i]
+                capacity[link.interface][h] -= n * size
+                if link.interface in spent:
+                    spent[link.interface][h] += n * size
+                room[i] -= n
+                packets -= n
+                sent[link.interface] += n
+        return sent
+
+    def _room(self, slot: Slot, size: float, capacity: Dict[Interface, List[float]],
+              allowance: Dict[Interface, List[float]],
+              spent: Dict[Interface, List[float]]) -> int:
+        h, link = slot
+        room: int = int(floor(capacity[link.interface][h] / size))
+        if link.interface in allowance:
+            # spending in window `h` counts against the allowance of all the following windows
+            cumulative: float = sum(spent[link.interface][:h])
+            budget_room: float = float("inf")
+            for k in range(h, self._horizon):
+                cumulative += spent[link.interface][k]
+                budget_room = min(budget_room, allowance[link.interface][k] - cumulative)
+            room = min(room, int(floor(max(0.0, budget_room) / size)))
+        return max(0, room)
+
+    @staticmethod
+    def _interleave(counts: List[Tuple[Interface, int]]) -> List[Interface]:
+        """
+        Turns per-interface packet counts into a smoothly interleaved sequence of interfaces
+        (smooth weighted round-robin).
+        """
+        counts = [(iface, n) for iface, n in counts if n > 0]
+        total: int = sum(n for _, n in counts)
+        current: Dict[Interface, int] = {iface: 0 for iface, _ in counts}
+        sequence: List[Interface] = []
+        for _ in range(total):
+            for iface, n in counts:
+                current[iface] += n
+            best: Interface = max(counts, key=lambda c: current[c[0]])[0]
+            current[best] -= total
+            sequence.append(best)
+        return sequence
@@ -1,6 +1,5 @@
-from collections import defaultdict
 from math import ceil
-from typing import List, Dict, Iterator
+from typing import List, Iterator
 
 from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC
 from adanet.solver.base import AbsSolver
@@ -21,14 +20,8 @@ class SimpleSolver(AbsSolver):
         # return an empty solution if we don't have information about the links
         if problem.links is None:
             return solution
-        # - group channels by priority
-        groups: Dict[Priority, List[Channel]] = defaultdict(list)
-        for c in problem.channels:
-            groups[c.priority].append(c)
-        # - sort channels by priority
-        channel_groups: List[List[Channel]] = [
-            groups[p] for p in sorted(groups.keys(), reverse=True)
-        ]
+        # - group channels by priority (cached lanes last)
+        channel_groups: List[List[Channel]] = self._channel_groups(problem.channels)
         # - find biggest currently streaming channel
         biggest_packet_size: int = 0
         for c in problem.channels:
@@ -40,7 +33,9 @@ class SimpleSolver(AbsSolver):
             link = link1.copy(deep=True)
             # to avoid getting stuck in a bandwidth=0 situation, assume bandwidth is always good
             # enough to transfer a single packet of the biggest channel in the current deltaT
-            bandwidth: float = max(biggest_packet_size, link.bandwidth if link.bandwidth else 0)
+            # NOTE: we plan on the expected goodput of the link, i.e., bandwidth x reliability
+            goodput: float = (link.bandwidth if link.bandwidth else 0) * link.reliability
+            bandwidth: float = max(biggest_packet_size, goodput)
 
             # - convert bandwidth into capacity
             # TODO: there is a bug here
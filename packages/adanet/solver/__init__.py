@@ -1,6 +1,8 @@
 from .base import AbsSolver
 from .SimpleSolver import SimpleSolver
+from .RecedingHorizonSolver import RecedingHorizonSolver
 
 solvers = {
-    "SimpleSolver": SimpleSolver
+    "SimpleSolver": SimpleSolver,
+    "RecedingHorizonSolver": RecedingHorizonSolver,
 }
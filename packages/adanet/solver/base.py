@@ -1,9 +1,10 @@
 import os
 from abc import abstractmethod, ABC
-from typing import List
+from collections import defaultdict
+from typing import List, Dict
 
 from adanet.types import Shuttable
-from adanet.types.problem import Problem
+from adanet.types.problem import Problem, Channel
 from adanet.types.solution import Solution
 from adanet.utils import find_shortest_whole_repetitive_pattern
 
@@ -17,6 +18,22 @@ class AbsSolver(ABC, Shuttable):
     def solve(self, problem: Problem) -> Solution:
         raise NotImplementedError("Subclasses of AbsSolver need to implement their own 'solve()'")
 
+    @staticmethod
+    def _channel_groups(channels: List[Channel]) -> List[List[Channel]]:
+        """
+        Groups channels by priority in the order they should be allocated bandwidth in.
+        Cached lanes come after all the other channels so that they only get what is left.
+
+        :param channels:    the channels to group
+        :return:            groups of channels, highest priority first
+        """
+        groups: Dict[int, List[Channel]] = defaultdict(list)
+        cached: Dict[int, List[Channel]] = defaultdict(list)
+        for c in channels:
+            (cached if c.is_cached else groups)[c.priority].append(c)
+        return [groups[p] for p in sorted(groups.keys(), reverse=True)] + \
+               [cached[p] for p in sorted(cached.keys(), reverse=True)]
+
     @staticmethod
     def _compact_sequence(sequence: List[str]) -> List[str]:
         if os.environ.get("COMPACT_SOLUTION", "1") == "1":
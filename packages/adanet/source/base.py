@@ -1,11 +1,15 @@
 import time
 from threading import Thread
-from typing import Optional
+from typing import Optional, Callable, Dict
 
+from adanet.dedup import Deduplicator, UNCHANGED_HEADER
 from adanet.queue.base import IQueue, QueueType
 from adanet.types.pipes import IPipe
 from ..queue.lazy import Queue as LazyQueue
+from ..queue.persistent import make_persistent_queue
+from ..queue.ring import Queue as RingQueue
 from ..queue.sqlite import Queue as SQLiteQueue
+from ..queue.tiered import Queue as TieredQueue
 from ..types import Shuttable
 from ..types.misc import Reminder
 from ..types.problem import ChannelQoS
@@ -20,10 +24,26 @@ class ISource(IPipe):
         self._qos: Optional[ChannelQoS] = kwargs.get("qos", None)
         self._reminder: Optional[Reminder] = Reminder(frequency=self._qos.frequency) \
             if (self._qos and self._qos.frequency is not None) else None
+        # payloads identical to the previous one are not sent again (if requested)
+        self._dedup: Optional[Deduplicator] = Deduplicator(window=self._qos.dedup) \
+            if (self._qos and self._qos.dedup is not None) else None
+        # name of the original channel (differs from the name when the channel is a lane)
+        self._origin: str = kwargs.get("origin", None) or name
         queue_size: int = kwargs.get("queue_size", 1)
-        self._windmill: MessageWindmill = MessageWindmill(self, QueueType.CACHE, queue_size)
+        queue_type: QueueType = kwargs.get("queue_type", QueueType.CACHE)
+        self._windmill: MessageWindmill = MessageWindmill(self, queue_type, queue_size,
+                                                          lifo=kwargs.get("lifo", False),
+                                                          queue=kwargs.get("queue", None))
         self._windmill.start()
 
+    @property
+    def origin(self) -> str:
+        return self._origin
+
+    @property
+    def deduplicator(self) -> Optional[Deduplicator]:
+        return self._dedup
+
     @property
     def frequency(self) -> float:
         return self._frequency
@@ -36,6 +56,10 @@ class ISource(IPipe):
     def queue_size(self) -> int:
         return self._windmill.queue_size
 
+    @property
+    def queue_statistics(self) -> Dict[str, float]:
+        return self._windmill.queue_statistics
+
     @property
     def solution_frequency(self) -> float:
         return self._solution_frequency
@@ -47,7 +71,21 @@ class ISource(IPipe):
     def set_solution_frequency(self, value: float):
         self._solution_frequency = value
 
+    def on_evict(self, callback: Callable[[bytes], None]):
+        """
+        Registers a function to call with the messages dropped from the queue before they
+        could be sent.
+        """
+        self._windmill.on_evict(callback)
+
     def inject(self, data: bytes):
+        if self._dedup is not None:
+            digest: bytes = Deduplicator.digest(data)
+            if self._dedup.unchanged(data, digest):
+                # the other side already has this payload
+                if self._qos.dedup_markers:
+                    self._on_data(b"", headers={UNCHANGED_HEADER: digest})
+                return
         self._on_data(data)
 
     def _produce(self, data: bytes):
@@ -63,11 +101,13 @@ class ISource(IPipe):
 
 class MessageWindmill(Shuttable, Thread):
 
-    def __init__(self, source: ISource, queue_type: QueueType, queue_size: int):
+    def __init__(self, source: ISource, queue_type: QueueType, queue_size: int,
+                 lifo: bool = False, queue: Optional[IQueue] = None):
         Shuttable.__init__(self)
         Thread.__init__(self, daemon=True)
         self._source: ISource = source
-        self._queue: IQueue = MessageWindmill.make_queue(source.name, queue_type, queue_size)
+        self._queue: IQueue = queue if queue is not None else \
+            MessageWindmill.make_queue(source.name, queue_type, queue_size, lifo=lifo)
 
     @property
     def is_spinning(self) -> bool:
@@ -81,6 +121,10 @@ class MessageWindmill(Shuttable, Thread):
     def queue_size(self) -> int:
         return self._queue.max_size
 
+    @property
+    def queue_statistics(self) -> Dict[str, float]:
+        return self._queue.statistics
+
     @property
     def _sleep_period(self) -> float:
         if self._source.solution_frequency <= 0:
@@ -91,6 +135,9 @@ class MessageWindmill(Shuttable, Thread):
     def put(self, data: bytes):
         self._queue.put(data)
 
+    def on_evict(self, callback: Callable[[bytes], None]):
+        self._queue.on_evict(callback)
+
     def run(self) -> None:
         while not self.is_shutdown:
             time.sleep(self._sleep_period)
@@ -100,10 +147,14 @@ class MessageWindmill(Shuttable, Thread):
             self._source.inject(data)
 
     @staticmethod
-    def make_queue(channel: str, type: QueueType, size: int):
+    def make_queue(channel: str, type: QueueType, size: int, lifo: bool = False):
         if type is QueueType.CACHE:
             if size == 1:
                 return LazyQueue(type, channel)
-            return SQLiteQueue(type, channel, size, multithreading=True, memory=1 <= size <= 100)
+            if 1 < size <= 100:
+                return RingQueue(type, channel, size, lifo=lifo)
+            if not lifo:
+                return TieredQueue(type, channel, size)
+            return SQLiteQueue(type, channel, size, lifo=lifo)
         elif type is QueueType.PERSISTENT:
-            return SQLiteQueue(type, channel, size, multithreading=True)
+            return make_persistent_queue(channel, size, lifo=lifo)
@@ -0,0 +1,30 @@
+from .base import ISource
+from ..constants import CACHED_QUEUE_SIZE
+from ..queue.base import QueueType
+
+
+class CachedSource(ISource):
+    """
+    Source of the 'cached' lane of a channel.
+
+    It does not produce data on its own, it is fed with the messages the 'live' lane of the same
+    channel could not send in time (see `ISource.on_evict`). Messages are kept on disk and sent
+    newest first, so that the most relevant part of the backlog goes out first whenever there
+    is capacity left over by the live lanes.
+    """
+
+    def __init__(self, name: str, size: int, *args, **kwargs):
+        kwargs.update(queue_type=QueueType.PERSISTENT, queue_size=CACHED_QUEUE_SIZE, lifo=True)
+        # NOTE: nothing is produced live, the demand of this lane is its backlog
+        kwargs.pop("frequency", None)
+        super(CachedSource, self).__init__(name=name, size=size, frequency=0.0, **kwargs)
+
+    @property
+    def _is_time(self) -> bool:
+        return True
+
+    def cache(self, data: bytes):
+        """
+        Stores a message the live lane dropped.
+        """
+        self._produce(data)
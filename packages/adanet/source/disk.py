@@ -1,10 +1,11 @@
-from typing import Optional
+from collections import deque
+from threading import Semaphore
+from typing import Optional, Deque, Tuple, List
 
 from .base import ISource
 from ..asyncio import Task, loop
-from ..constants import FORMULATE_PROBLEM_EVERY_SEC
-from ..queue.base import QueueType
-from ..queue.sqlite import Queue
+from ..constants import FORMULATE_PROBLEM_EVERY_SEC, PRESTAGE_BATCH
+from ..queue.persistent import PersistentQueue, make_persistent_queue
 from ..time import Clock
 
 
@@ -12,7 +13,13 @@ class DiskSource(ISource):
 
     def __init__(self, name: str, size: int, *args, **kwargs):
         super(DiskSource, self).__init__(name=name, size=size, *args, **kwargs)
-        self._db: Queue = Queue(QueueType.PERSISTENT, self.name, max_size=-1, multithreading=True)
+        self._db: PersistentQueue = make_persistent_queue(self.name)
+        # backlog read ahead (see `prestage`), messages stay on disk until they are sent
+        self._staged: Deque[Tuple[int, bytes]] = deque()
+        self._staged_bytes: int = 0
+        self._last_staged: Optional[int] = None
+        self._sent: List[int] = []
+        self._stage_lock: Semaphore = Semaphore()
         # period = -1 means paused, the function set_solution_frequency below will resume if solution allows
         self._queue_task: Task = Task(Clock.period(1.0), self._queue_get)
         loop.add_task(self._queue_task)
@@ -28,6 +35,13 @@ class DiskSource(ISource):
     def queue_length(self) -> int:
         return self._db.length
 
+    @property
+    def staged(self) -> int:
+        """
+        Size (in bytes) of the backlog read ahead and not sent yet.
+        """
+        return self._staged_bytes
+
     @property
     def _is_time(self) -> bool:
         return True
@@ -40,11 +54,50 @@ class DiskSource(ISource):
         else:
             self._queue_task.period = Clock.period(1.0 / value)
 
+    def prestage(self, budget: int) -> int:
+        """
+        Reads ahead (into memory) the oldest messages in the backlog so that they are ready to
+        go as soon as a contact begins. Messages are removed from disk only once they are sent,
+        so the ones read ahead are not lost if the agent stops before a contact.
+
+        :param budget:  max size (in bytes) of the backlog held in memory
+        :return:        size (in bytes) of the backlog held in memory
+        """
+        with self._stage_lock:
+            while self._staged_bytes < budget:
+                rows: List[Tuple[int, bytes]] = self._db.peek(PRESTAGE_BATCH,
+                                                              after=self._last_staged)
+                for rowid, data in rows:
+                    if self._staged_bytes >= budget:
+                        break
+                    self._staged.append((rowid, data))
+                    self._staged_bytes += len(data)
+                    self._last_staged = rowid
+                if len(rows) < PRESTAGE_BATCH:
+                    break
+            return self._staged_bytes
+
     def _queue_get(self):
-        data: Optional[bytes] = self._db.get(block=False)
+        data: Optional[bytes] = self._unstage()
+        if data is None:
+            data = self._db.get(block=False)
         if data is not None:
             self._produce(data)
 
+    def _unstage(self) -> Optional[bytes]:
+        with self._stage_lock:
+            if not self._staged:
+                return None
+            rowid, data = self._staged.popleft()
+            self._staged_bytes -= len(data)
+            self._sent.append(rowid)
+            # drop the messages sent from disk (in batches), all of them before reading from
+            # disk again
+            if not self._staged or len(self._sent) >= PRESTAGE_BATCH:
+                self._db.discard(self._sent)
+                self._sent = []
+            return data
+
     def _read_message_size(self):
         # if we know the message size already, we are done
         if self._size is not None:
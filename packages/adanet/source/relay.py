@@ -0,0 +1,55 @@
+from typing import Dict
+
+from .base import ISource
+from ..constants import PROCESS_KEY
+from ..queue.custody import Queue as CustodyQueue, Custody
+from ..types.misc import FlowWatch
+
+
+class RelaySource(ISource):
+    """
+    Source of a channel on a relay.
+
+    Messages received from upstream (see `store`) are persisted and re-originated toward the
+    next hop. The relay keeps custody of each message until the next hop acknowledges it
+    (see `ack`), messages that are not acknowledged in time are sent again (see `expire`).
+    """
+
+    def __init__(self, name: str, size: int, *args, **kwargs):
+        self._custody: CustodyQueue = CustodyQueue(name)
+        kwargs.update(queue=self._custody)
+        # NOTE: nothing is produced live, the demand of a relayed channel is its backlog
+        kwargs.pop("frequency", None)
+        super(RelaySource, self).__init__(name=name, size=size, frequency=0.0, **kwargs)
+        self._flowwatch: FlowWatch = FlowWatch()
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "throughput": self._flowwatch.frequency if self._flowwatch.counter else 0.0,
+            **self._custody.statistics,
+        }
+
+    def store(self, data: bytes, origin_stamp: float):
+        """
+        Takes custody of a message received from upstream.
+
+        :param data:            payload of the message
+        :param origin_stamp:    time at which the message left its original source
+        """
+        if self._size is None:
+            self._size = len(data)
+        self._custody.put(data, origin_stamp)
+        self._flowwatch.signal(len(data))
+
+    def ack(self, id: int):
+        self._custody.ack(id)
+
+    def expire(self, timeout: float):
+        self._custody.expire(timeout)
+
+    def inject(self, custody: Custody):
+        self._on_data(custody.payload, headers={
+            "custody": {"key": PROCESS_KEY, "id": custody.id},
+            "origin_stamp": custody.origin_stamp,
+        })
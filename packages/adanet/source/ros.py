@@ -1,13 +1,16 @@
-from typing import Type, Dict
+from typing import Type, Dict, Callable, Optional
 
 import cbor2
 import rospy
 from rospy.msg import AnyMsg
 
 from .base import ISource
+from ..constants import ROS_INGEST_RING_SIZE, ROS_SUBSCRIBER_QUEUE_SIZE
 from ..exceptions import ROSTopicNotFound
 from ..networking.ros import ROS
+from ..projection import Projection
 from ..types.misc import FlowWatch
+from ..workers import workers, Lane
 
 
 class ROSSource(ISource):
@@ -16,8 +19,38 @@ class ROSSource(ISource):
         super(ROSSource, self).__init__(name=name, size=size, *args, **kwargs)
         # get arguments (if any)
         self._arguments: Dict = kwargs.get("arguments", {})
+        # forward the serialized ROS messages as they are (the sink must be 'raw' as well)
+        self._raw: bool = self._arguments.get("raw", False)
+        # keep only some of the fields, at reduced precision (the sink must do the same)
+        self._projection: Optional[Projection] = Projection.from_arguments(self._arguments)
+        if self._raw and self._projection is not None:
+            raise ValueError(f"Source of type 'ROSSource' for channel '{name}' cannot project "
+                             f"or quantize the fields of raw messages.")
+        if self._projection is not None:
+            # the size of the full messages (if given) does not tell the solver much
+            self._size = None
         # register against the ROS network
         ROS.register()
+        # create flowwatch object to monitor the topic's frequency
+        self._flowwatch = FlowWatch()
+        # messages waiting to be converted
+        self._lane: Optional[Lane] = None
+
+        # pipe raw ROS messages into AdaNet
+        def _raw_ingest(msg: AnyMsg):
+            # noinspection PyProtectedMember
+            data: bytes = msg._buff
+            # send data out of the source and into the switchboard
+            self._produce(data)
+            # monitor frequency
+            self._flowwatch.signal(len(data))
+            self._frequency = self._flowwatch.frequency
+
+        # raw messages do not need to be decoded, no need to know their type
+        if self._raw:
+            self._subscribe(AnyMsg, _raw_ingest)
+            return
+
         # get message type from topic
         try:
             MsgType: Type[AnyMsg] = ROS.get_message_type(self.topic)
@@ -31,15 +64,20 @@ class ROSSource(ISource):
                 )
             # get message type from arguments
             MsgType: Type[AnyMsg] = ROS.load_message_type(self._arguments["message_type"])
-        # create flowwatch object to monitor the topic's frequency
-        self._flowwatch = FlowWatch()
+
+        # converter from ROS messages to Python dicts (compiled once per message type)
+        encode: Callable[[AnyMsg], Dict] = ROS.encoder(MsgType)
 
         # pipe ROS messages into AdaNet
-        def _callback(msg: AnyMsg):
+        def _ingest(msg: AnyMsg):
             # convert ROS message to Python dict
-            msg: Dict = ROS.message_to_dict(msg)
-            # serialize Python dict into cbor bytes
-            data: bytes = cbor2.dumps(msg)
+            msg: Dict = encode(msg)
+            # strip and quantize the message (if requested)
+            if self._projection is not None:
+                msg = self._projection.apply(msg)
+            # serialize Python dict into cbor bytes (quantized floats take less space when
+            # encoded in their shortest form)
+            data: bytes = cbor2.dumps(msg, canonical=self._projection is not None)
             # send data out of the source and into the switchboard
             self._produce(data)
             # monitor frequency
@@ -47,8 +85,18 @@ class ROSSource(ISource):
             self._frequency = self._flowwatch.frequency
 
         # subscribe
-        rospy.Subscriber(self.topic, MsgType, _callback, queue_size=1)
+        self._subscribe(MsgType, _ingest)
 
     @property
     def topic(self) -> str:
-        return self.name
+        return self.origin
+
+    @property
+    def ingestion(self) -> Dict[str, float]:
+        return self._lane.statistics if self._lane is not None else {}
+
+    def _subscribe(self, MsgType: Type[AnyMsg], ingest: Callable[[AnyMsg], None]):
+        # the subscriber's thread only hands the messages over, a worker converts them
+        self._lane = workers.lane(self.name, ingest, ROS_INGEST_RING_SIZE)
+        rospy.Subscriber(self.topic, MsgType, self._lane.push,
+                         queue_size=ROS_SUBSCRIBER_QUEUE_SIZE)
@@ -0,0 +1,123 @@
+import uuid
+from math import ceil
+from threading import Semaphore
+from typing import Dict, List, Tuple, Optional
+
+from adanet.constants import STRIPING_CHUNK_SIZE, STRIPING_REASSEMBLY_TIMEOUT_SEC, \
+    IFACE_MIN_BANDWIDTH_BYTES_SEC
+from adanet.time import Clock
+from adanet.types.message import Message
+
+
+class Striper:
+    """
+    Splits large messages into chunks and spreads them across multiple interfaces in
+    proportion to their bandwidth.
+    """
+
+    @staticmethod
+    def split(message: Message, bandwidths: Dict[str, float],
+              chunk_size: int = STRIPING_CHUNK_SIZE) -> Tuple[List[Tuple[str, Message]], float]:
+        """
+        Splits the given message into chunks and assigns each chunk to the interface that
+        would finish transferring it first, this allocates bytes to interfaces proportionally
+        to their bandwidth and minimizes the completion time of the whole message.
+
+        :param message:     the message to split
+        :param bandwidths:  bandwidth (bytes/sec) of each interface to use
+        :param chunk_size:  size of each chunk in bytes
+        :return:            the list of (interface, chunk) pairs and the estimated
+                            completion time (in seconds) of the transfer
+        """
+        payload: bytes = message.payload
+        count: int = max(1, int(ceil(len(payload) / chunk_size)))
+        stripe_id: str = uuid.uuid4().hex
+        bandwidths = {k: max(IFACE_MIN_BANDWIDTH_BYTES_SEC, v) for k, v in bandwidths.items()}
+        assigned: Dict[str, int] = {iface: 0 for iface in bandwidths}
+        chunks: List[Tuple[str, Message]] = []
+        for i in range(count):
+            data: bytes = payload[i * chunk_size:(i + 1) * chunk_size]
+            # earliest finish time
+            iface: str = min(bandwidths,
+                             key=lambda k: (assigned[k] + len(data)) / bandwidths[k])
+            assigned[iface] += len(data)
+            chunks.append((iface, Message(
+                channel=message.channel,
+                stamp=message.stamp,
+                payload=data,
+                headers={
+                    **message.headers,
+                    "stripe": {"id": stripe_id, "index": i, "count": count},
+                },
+                priority=message.priority,
+            )))
+        completion: float = max(assigned[k] / bandwidths[k] for k in bandwidths)
+        return chunks, completion
+
+
+class StripeReassembler:
+    """
+    Collects the chunks of striped messages and rebuilds the original messages.
+    Incomplete messages are dropped after `timeout` seconds.
+    """
+
+    class Stripe:
+
+        def __init__(self, count: int):
+            self.count: int = count
+            self.chunks: Dict[int, bytes] = {}
+            self.first_arrival: float = Clock.time()
+
+    def __init__(self, timeout: float = STRIPING_REASSEMBLY_TIMEOUT_SEC):
+        self._timeout: float = timeout
+        self._stripes: Dict[str, StripeReassembler.Stripe] = {}
+        self._lock: Semaphore = Semaphore()
+        # statistics
+        self._dropped: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def pending(self) -> int:
+        return len(self._stripes)
+
+    def add(self, chunk: Message) -> Tuple[Optional[Message], Optional[Dict[str, float]]]:
+        """
+        Adds a chunk to the reassembly buffer.
+
+        :param chunk:   the chunk received
+        :return:        the original message and its transfer statistics when the last chunk
+                        arrives, (None, None) otherwise
+        """
+        header: dict = chunk.headers["stripe"]
+        now: float = Clock.time()
+        with self._lock:
+            self._expire(now)
+            stripe: Optional[StripeReassembler.Stripe] = self._stripes.get(header["id"], None)
+            if stripe is None:
+                stripe = StripeReassembler.Stripe(header["count"])
+                self._stripes[header["id"]] = stripe
+            stripe.chunks[header["index"]] = chunk.payload
+            if len(stripe.chunks) < stripe.count:
+                return None, None
+            del self._stripes[header["id"]]
+        # rebuild message
+        headers: dict = {k: v for k, v in chunk.headers.items() if k != "stripe"}
+        payload: bytes = b"".join(stripe.chunks[i] for i in range(stripe.count))
+        message: Message = Message(chunk.channel, chunk.stamp, payload, headers)
+        # NOTE: the completion time assumes the clocks of source and sink to be synchronized
+        stats: Dict[str, float] = {
+            "completion_time": now - chunk.stamp,
+            "spread": now - stripe.first_arrival,
+            "chunks": stripe.count,
+            "size": len(payload),
+        }
+        return message, stats
+
+    def _expire(self, now: float):
+        for stripe_id, stripe in list(self._stripes.items()):
+            if now - stripe.first_arrival > self._timeout:
+                del self._stripes[stripe_id]
+                self._dropped += 1
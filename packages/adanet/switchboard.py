@@ -1,27 +1,39 @@
+from collections import defaultdict
 from functools import partial
 from threading import Semaphore
-from typing import Optional, Dict, Type
+from typing import Optional, Dict, Type, List, Tuple, Any, Callable
 
 from adanet.asyncio import Task, loop
-from adanet.constants import CHANNELS_LOG_EVERY_SECS
+from adanet.constants import CHANNELS_LOG_EVERY_SECS, STRIPING_MIN_SIZE, \
+    BACKPRESSURE_EVERY_SECS, BACKPRESSURE_HIGH_WATERMARK, BACKPRESSURE_LOW_WATERMARK, \
+    BACKPRESSURE_DRAIN_FACTOR, CUSTODY_TIMEOUT_SEC, CUSTODY_CHECK_EVERY_SECS, PROCESS_KEY, \
+    PRESTAGE_MAX_BYTES
+from adanet.dedup import UNCHANGED_HEADER, Republisher
+from adanet.fec import FECEncoder, FECDecoder
 from adanet.sink.base import ISink
 from adanet.sink.disk import DiskSink
 from adanet.sink.ros import ROSSink
 from adanet.sink.simulated import SimulatedSink
 from adanet.source.base import ISource
+# - cached
+from adanet.source.cached import CachedSource
 # - disk
 from adanet.source.disk import DiskSource
+# - relay
+from adanet.source.relay import RelaySource
 # - ros
 from adanet.source.ros import ROSSource
 # sources and sinks
 # - simulated
 from adanet.source.simulated import SimulatedSource
+from adanet.striping import Striper, StripeReassembler
 from adanet.time import Clock
 from adanet.types import Shuttable
 from adanet.types.agent import AgentRole
-from adanet.types.message import Message
+from adanet.types.message import Message, ControlMessage
 from adanet.types.network import INetworkManager, ISwitchboard
-from adanet.types.problem import Problem, Channel, ChannelKind
+from adanet.types.problem import Problem, Channel, ChannelKind, ChannelQoS
+from adanet.types.misc import EWMAEstimator
 from adanet.types.report import Report
 from adanet.types.solution import Solution, SolvedChannel
 
@@ -39,9 +51,25 @@ class Switchboard(Shuttable, ISwitchboard):
         self._sources: Dict[str, ISource] = {}
         self._sinks: Dict[str, ISink] = {}
         self._lock: Semaphore = Semaphore()
+        self._reassembler: StripeReassembler = StripeReassembler()
+        # cached lanes are sent after anything else
+        lowest: int = min([c.priority for c in problem.channels] or [0])
+        self._priorities: Dict[str, int] = {
+            c.name: (lowest - 1 if c.is_cached else c.priority) for c in problem.channels
+        }
+        self._fec_encoders: Dict[str, FECEncoder] = defaultdict(FECEncoder)
+        self._fec_decoders: Dict[str, FECDecoder] = defaultdict(FECDecoder)
+        # backpressure: last report from the sink and throttled frequency of each channel
+        self._sink_reports: Dict[str, Tuple[float, dict]] = {}
+        self._throttle: Dict[str, Optional[float]] = {}
+        # time it takes messages to get here from their original source
+        self._delivery_latency: Dict[str, EWMAEstimator] = defaultdict(EWMAEstimator)
+        # last payload received on each channel, republished when the source tells us that
+        # nothing changed
+        self._republishers: Dict[str, Republisher] = defaultdict(Republisher)
 
-        # instantiate data sources
-        if self._role is AgentRole.SOURCE:
+        # instantiate data sources (relays re-originate what they receive)
+        if self._role in [AgentRole.SOURCE, AgentRole.RELAY]:
             for channel in problem.channels:
                 queue_size: int = channel.qos.queue_size if channel.qos else 1
                 Source: Type[ISource] = self._source(channel)
@@ -50,22 +78,42 @@ class Switchboard(Shuttable, ISwitchboard):
                                          frequency=channel.frequency,
                                          queue_size=queue_size,
                                          qos=channel.qos,
+                                         origin=channel.origin,
                                          arguments=channel.arguments or {})
                 source.register_callback(partial(self._send, channel.name))
                 self._sources[channel.name] = source
+            # messages the live lanes could not send in time go to the cached lanes
+            for channel in problem.channels:
+                cached: ISource = self._sources[channel.name]
+                if not isinstance(cached, CachedSource):
+                    continue
+                for live in problem.channels:
+                    if live.origin == channel.origin and not live.is_cached:
+                        self._sources[live.name].on_evict(cached.cache)
 
         # instantiate data sinks
         if self._role is AgentRole.SINK:
+            # - the lanes of a channel share the same sink
+            sinks: Dict[str, ISink] = {}
             for channel in problem.channels:
-                Sink: Type[ISink] = self._sink(channel)
-                sink: ISink = Sink(name=channel.name,
-                                   size=channel.size,
-                                   arguments=channel.arguments or {})
-                self._sinks[channel.name] = sink
+                origin: str = channel.origin or channel.name
+                if origin not in sinks:
+                    Sink: Type[ISink] = self._sink(channel)
+                    sinks[origin] = Sink(name=origin,
+                                         size=channel.size,
+                                         arguments=channel.arguments or {})
+                self._sinks[channel.name] = sinks[origin]
 
         # create switchboard monitor task
         self._monitor_task: Task = SwitchboardMonitorTask(
             period=Clock.period(CHANNELS_LOG_EVERY_SECS))
+        # create backpressure task (sinks report their backlog to the source)
+        self._backpressure_task: Optional[Task] = SwitchboardBackpressureTask(
+            period=Clock.period(BACKPRESSURE_EVERY_SECS)) if self._role is AgentRole.SINK else None
+        # create custody task (relays send again what the next hop did not acknowledge)
+        self._custody_task: Optional[Task] = SwitchboardCustodyTask(
+            period=Clock.period(CUSTODY_CHECK_EVERY_SECS)) \
+            if self._role is AgentRole.RELAY else None
 
     @property
     def network_manager(self) -> INetworkManager:
@@ -78,13 +126,49 @@ class Switchboard(Shuttable, ISwitchboard):
     @property
     def channel_statistics(self) -> Dict[str, Dict[str, float]]:
         with self._lock:
+            if self._role is AgentRole.SINK:
+                return {
+                    k: {
+                        **{f"sink/{stat}": v for stat, v in sink.statistics.items()},
+                        **self._delivery_statistics(k),
+                    } for k, sink in self._sinks.items()
+                }
             return {
                 k: {
                     "queue/length": src.queue_length,
                     "queue/size": src.queue_size,
+                    **{f"queue/{stat}": v for stat, v in src.queue_statistics.items()},
+                    "backpressure/frequency": self._throttle.get(k, None),
+                    **({
+                        "fec/group_size": self._fec_encoders[k].group_size,
+                        "fec/parity": self._fec_encoders[k].parity,
+                    } if k in self._fec_encoders else {}),
+                    **({
+                        "prestage/staged": src.staged,
+                    } if isinstance(src, DiskSource) else {}),
+                    **({
+                        f"ingest/{stat}": v for stat, v in src.ingestion.items()
+                    } if isinstance(src, ROSSource) else {}),
+                    **({
+                        f"relay/{stat}": v for stat, v in src.statistics.items()
+                    } if isinstance(src, RelaySource) else {}),
+                    **({
+                        f"dedup/{stat}": v for stat, v in src.deduplicator.statistics.items()
+                    } if src.deduplicator is not None else {}),
+                    **self._delivery_statistics(k),
                 } for k, src in self._sources.items()
             }
 
+    def _delivery_statistics(self, channel: str) -> Dict[str, float]:
+        stats: Dict[str, float] = {}
+        latency: Optional[EWMAEstimator] = self._delivery_latency.get(channel, None)
+        if latency is not None:
+            stats["delivery/latency"] = latency.mean
+        republisher: Optional[Republisher] = self._republishers.get(channel, None)
+        if republisher is not None:
+            stats.update({f"dedup/{stat}": v for stat, v in republisher.statistics.items()})
+        return stats
+
     def source(self, name: str) -> ISource:
         return self._sources[name]
 
@@ -94,6 +178,10 @@ class Switchboard(Shuttable, ISwitchboard):
     def start(self):
         # activate switchboard monitor
         loop.add_task(self._monitor_task, self)
+        if self._backpressure_task is not None:
+            loop.add_task(self._backpressure_task, self)
+        if self._custody_task is not None:
+            loop.add_task(self._custody_task, self)
 
     def send(self, message: Message):
         with self._lock:
@@ -102,25 +190,193 @@ class Switchboard(Shuttable, ISwitchboard):
             # make sure we have a solution for this channel
             if solved_channel is None:
                 return
-        # find next interface for this channel according to the current solution
-        interface: Optional[str] = solved_channel.next()
-        if interface is None:
-            return
-        # send data down to the network manager
-        self._network_manager.send(interface, message)
+            # protect the channel with forward error correction (if requested)
+            qos: Optional[ChannelQoS] = solved_channel.problem.qos
+            messages: List[Message] = [message]
+            if qos is not None and qos.fec:
+                encoder: FECEncoder = self._fec_encoders[message.channel]
+                messages = encoder.encode(message, self._reliability(solved_channel))
+        for message in messages:
+            # find next interface for this channel according to the current solution
+            interface: Optional[str] = solved_channel.next()
+            if interface is None:
+                return
+            # stripe large messages across all the interfaces assigned to the channel
+            if len(message.payload) >= STRIPING_MIN_SIZE and \
+                    len(set(solved_channel.interfaces)) > 1:
+                self._send_striped(message, solved_channel)
+                continue
+            # send data down to the network manager
+            self._network_manager.send(interface, message)
+
+    def _reliability(self, solved_channel: SolvedChannel) -> float:
+        # the channel is as reliable as the least reliable of its links
+        return min([
+            link.reliability for link in self._solution.problem.links
+            if link.interface in solved_channel.interfaces
+        ] or [1.0])
+
+    def _send_striped(self, message: Message, solved_channel: SolvedChannel):
+        # use the bandwidth the solver planned on for each interface
+        bandwidths: Dict[str, float] = {
+            link.interface: link.bandwidth or 0.0 for link in self._solution.problem.links
+            if link.interface in solved_channel.interfaces
+        }
+        chunks: List[Tuple[str, Message]]
+        chunks, completion = Striper.split(message, bandwidths)
+        for interface, chunk in chunks:
+            self._network_manager.send(interface, chunk)
+        Report.log({
+            f"channel/{message.channel.strip('/')}/striping": {
+                "chunks": len(chunks),
+                "estimated_completion_time": completion,
+            }
+        })
 
     def recv(self, message: Message):
-        # find channel's sink
-        sink: Optional[ISink] = self._sinks.get(message.channel, None)
-        if not sink:
+        # find channel's sink (relays forward what they receive through the channel's source)
+        known: Dict[str, Any] = self._sources if self._role is AgentRole.RELAY else self._sinks
+        if message.channel not in known:
             print(f"Received message for unknown channel '{message.channel}'")
             return
+        # reassemble striped messages
+        if "stripe" in message.headers:
+            message, stats = self._reassembler.add(message)
+            if message is None:
+                return
+            Report.log({
+                f"channel/{message.channel.strip('/')}/striping": stats
+            })
+        # decode forward error correction
+        if "fec" in message.headers:
+            decoder: FECDecoder = self._fec_decoders[message.channel]
+            recovered: int = decoder.recovered
+            messages: List[Message] = decoder.decode(message)
+            if decoder.recovered > recovered:
+                Report.log({
+                    f"channel/{message.channel.strip('/')}/fec": {"recovered": decoder.recovered}
+                })
+            # send data up to the sink
+            for message in messages:
+                self._deliver(message)
+            return
         # send data up to the sink
-        sink.recv(message.payload)
+        self._deliver(message)
+
+    def _deliver(self, message: Message):
+        # NOTE: this assumes the clocks of all the agents to be synchronized
+        origin_stamp: float = message.headers.get("origin_stamp", message.stamp)
+        self._delivery_latency[message.channel].add(Clock.time() - origin_stamp)
+        payload: Optional[bytes] = message.payload
+        if UNCHANGED_HEADER in message.headers:
+            # same as the last payload (dropped if we never received the original)
+            digest: bytes = message.headers[UNCHANGED_HEADER]
+            payload = self._republishers[message.channel].resolve(digest)
+        elif payload is not None:
+            self._republishers[message.channel].received(payload)
+        if payload is None:
+            # nothing was delivered, the previous hop keeps custody of the message
+            return
+        # the previous hop can let the message go once we have it for good
+        acknowledge: Optional[Callable[[], None]] = \
+            (lambda: self._network_manager.acknowledge(message)) \
+            if "custody" in message.headers else None
+        if self._role is AgentRole.RELAY:
+            # store the message until the next hop takes it over
+            self._sources[message.channel].store(payload, origin_stamp)
+            if acknowledge is not None:
+                acknowledge()
+        else:
+            # messages dropped by (or failing in) the sink are not acknowledged
+            self._sinks[message.channel].push(payload, on_done=acknowledge)
+
+    def prestage(self, budget: float):
+        """
+        Reads ahead the backlog of the channels stored on disk, highest priority first, so
+        that it is ready to go as soon as a contact begins.
+
+        :param budget:  size (in bytes) of the backlog to read ahead (across all channels)
+        """
+        budget = min(budget, PRESTAGE_MAX_BYTES)
+        sources: List[Tuple[int, str]] = sorted([
+            (self._priorities.get(name, 0), name) for name, src in self._sources.items()
+            if isinstance(src, DiskSource)
+        ], reverse=True)
+        for _, name in sources:
+            if budget <= 0:
+                break
+            budget -= self._sources[name].prestage(int(budget))
 
-    def _send(self, channel: str, data: bytes):
+    def custody_ack(self, ack: dict):
+        # acknowledgements of messages relayed by somebody else
+        if ack.get("key", None) != PROCESS_KEY:
+            return
+        source: Optional[ISource] = self._sources.get(ack["channel"], None)
+        if isinstance(source, RelaySource):
+            source.ack(ack["id"])
+
+    def expire_custody(self):
+        """
+        Sends again the messages the next hop did not acknowledge in time.
+        """
+        for source in self._sources.values():
+            if isinstance(source, RelaySource):
+                source.expire(CUSTODY_TIMEOUT_SEC)
+
+    def report_backpressure(self):
+        """
+        Tells the source how far behind each sink is.
+        """
+        if self._network_manager is None:
+            return
+        report: dict = {
+            "channels": {name: sink.statistics for name, sink in self._sinks.items()}
+        }
+        self._network_manager.broadcast_control(ControlMessage("backpressure", report))
+
+    def backpressure(self, report: dict):
+        now: float = Clock.time()
+        with self._lock:
+            for name, stats in report.get("channels", {}).items():
+                if name not in self._sources:
+                    continue
+                self._sink_reports[name] = (now, stats)
+                self._throttle[name] = self._throttled_frequency(name)
+                # apply right away
+                solved_channel: Optional[SolvedChannel] = self._channels.get(name, None)
+                if solved_channel is not None:
+                    self._sources[name].set_solution_frequency(
+                        self._apply_throttle(name, solved_channel.frequency))
+
+    def _throttled_frequency(self, name: str) -> Optional[float]:
+        """
+        Frequency at which the given channel should be sent for its sink to keep up,
+        None if the sink is keeping up.
+        """
+        report: Optional[Tuple[float, dict]] = self._sink_reports.get(name, None)
+        # no (recent) reports, no throttling
+        if report is None or Clock.time() - report[0] > 3 * BACKPRESSURE_EVERY_SECS:
+            return None
+        stats: dict = report[1]
+        fill: float = stats["backlog"] / stats["capacity"] if stats["capacity"] else 0.0
+        if fill >= BACKPRESSURE_HIGH_WATERMARK:
+            # send slower than the sink can process so that its backlog drains
+            return stats["throughput"] * BACKPRESSURE_DRAIN_FACTOR
+        if fill <= BACKPRESSURE_LOW_WATERMARK:
+            return None
+        # in between the watermarks, keep doing what we were doing
+        return self._throttle.get(name, None)
+
+    def _apply_throttle(self, name: str, frequency: float) -> float:
+        throttle: Optional[float] = self._throttle.get(name, None)
+        if throttle is None:
+            return frequency
+        return min(frequency, throttle)
+
+    def _send(self, channel: str, data: bytes, headers: Optional[Dict[str, Any]] = None):
         # pack message
-        message: Message = Message(channel, Clock.time(), data)
+        message: Message = Message(channel, Clock.time(), data, headers=headers or {},
+                                   priority=self._priorities.get(channel, 0))
         # send message
         self.send(message)
 
@@ -130,9 +386,12 @@ class Switchboard(Shuttable, ISwitchboard):
             self._channels = {
                 c.name: c for c in solution.assignments
             }
-            # tell the sources what their solution frequency is
+            # tell the sources what their solution frequency is (throttled if their sink is
+            # not keeping up)
             for c in solution.assignments:
-                self._sources[c.name].set_solution_frequency(c.frequency)
+                self._throttle[c.name] = self._throttled_frequency(c.name)
+                self._sources[c.name].set_solution_frequency(
+                    self._apply_throttle(c.name, c.frequency))
             # if we are simulating the problem, update the sources' frequency
             if self._simulation:
                 # TODO: the idea here is that simulated sources can be throttled to the actual
@@ -144,6 +403,12 @@ class Switchboard(Shuttable, ISwitchboard):
                 pass
 
     def _source(self, channel: Channel) -> Type[ISource]:
+        # relays re-originate what they receive
+        if self._role is AgentRole.RELAY:
+            return RelaySource
+        # cached lanes are fed by their live lane, simulated or not
+        if channel.is_cached:
+            return CachedSource
         # choose between simulated and real data sources
         if self._simulation:
             return SimulatedSource
@@ -174,3 +439,15 @@ class SwitchboardMonitorTask(Task):
             Report.log({
                 f"channel/{channel.strip('/')}": stats
             })
+
+
+class SwitchboardBackpressureTask(Task):
+
+    def step(self, sb: Switchboard):
+        sb.report_backpressure()
+
+
+class SwitchboardCustodyTask(Task):
+
+    def step(self, sb: Switchboard):
+        sb.expire_custody()
@@ -0,0 +1,126 @@
+import dataclasses
+from threading import Semaphore
+from typing import Dict, Optional, Tuple
+
+from adanet.constants import SOLVE_MIN_SPACING_SEC, SOLVE_FALLBACK_EVERY_SEC, \
+    SOLVE_BANDWIDTH_CHANGE, SOLVE_QUEUE_GROWTH, IFACE_MIN_BANDWIDTH_BYTES_SEC, INFTY, \
+    FORMULATE_PROBLEM_EVERY_SEC
+from adanet.time import Clock
+
+
+@dataclasses.dataclass
+class Snapshot:
+    # interface -> (connected, bandwidth)
+    links: Dict[str, Tuple[bool, float]] = dataclasses.field(default_factory=dict)
+    # channel -> queue length
+    queues: Dict[str, int] = dataclasses.field(default_factory=dict)
+    # metered interface -> bytes charged so far
+    spent: Dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+class SolveTrigger:
+    """
+    Decides when the problem has to be solved again.
+
+    A new solution is needed as soon as something significant changes with respect to the
+    state the current solution was computed on, e.g., a link comes up or goes down, the
+    bandwidth of a link changes considerably, a queue grows, but never sooner than `spacing`
+    seconds after the previous solution. When nothing changes, the problem is solved again
+    every `fallback` seconds anyway.
+
+    Solutions only plan the spending of metered links for the next `budget_window` seconds,
+    so a new solution is also needed once that much time went by with budget being spent.
+    """
+
+    def __init__(self, spacing: float = SOLVE_MIN_SPACING_SEC,
+                 fallback: float = SOLVE_FALLBACK_EVERY_SEC,
+                 bandwidth_change: float = SOLVE_BANDWIDTH_CHANGE,
+                 queue_growth: int = SOLVE_QUEUE_GROWTH,
+                 budget_window: float = FORMULATE_PROBLEM_EVERY_SEC):
+        self._spacing: float = spacing
+        self._fallback: float = fallback
+        self._bandwidth_change: float = bandwidth_change
+        self._queue_growth: int = queue_growth
+        self._budget_window: float = budget_window
+        self._lock: Semaphore = Semaphore()
+        # state the current solution was computed on
+        self._reference: Optional[Snapshot] = None
+        self._last_solution: float = -INFTY
+        # (time, reason) of the first event not served yet
+        self._event: Optional[Tuple[float, str]] = None
+
+    def notify(self, reason: str):
+        """
+        Signals an event that requires a new solution.
+        """
+        with self._lock:
+            if self._event is None:
+                self._event = (Clock.time(), reason)
+
+    def observe(self, snapshot: Snapshot):
+        """
+        Compares the current state against the one the current solution was computed on.
+        """
+        if self._reference is None:
+            return
+        reason: Optional[str] = self._change(self._reference, snapshot)
+        if reason is None and self._spending(self._reference, snapshot):
+            reason = "link/budget"
+        if reason is not None:
+            self.notify(reason)
+
+    def due(self) -> Optional[Tuple[float, str]]:
+        """
+        Tells whether it is time to solve the problem again.
+
+        :return: time and reason of the event that triggered the new solution, None if it is
+                 not time yet
+        """
+        now: float = Clock.time()
+        with self._lock:
+            if now - self._last_solution < self._spacing:
+                return None
+            if self._event is not None:
+                return self._event
+            if now - self._last_solution >= self._fallback:
+                return now, "periodic"
+        return None
+
+    def solved(self, snapshot: Snapshot, since: float):
+        """
+        Marks the events that happened before `since` as served by a solution computed on
+        the given state.
+
+        :param snapshot:    state the solution was computed on
+        :param since:       time at which the state was captured
+        """
+        with self._lock:
+            self._reference = snapshot
+            self._last_solution = Clock.time()
+            # events that happened while solving still need a solution
+            if self._event is not None and self._event[0] <= since:
+                self._event = None
+
+    def _change(self, reference: Snapshot, snapshot: Snapshot) -> Optional[str]:
+        for interface, (connected, bandwidth) in snapshot.links.items():
+            if interface not in reference.links:
+                return "link/new"
+            was_connected, old_bandwidth = reference.links[interface]
+            if connected != was_connected:
+                return "link/connected" if connected else "link/disconnected"
+            base: float = max(old_bandwidth, IFACE_MIN_BANDWIDTH_BYTES_SEC)
+            if abs(bandwidth - old_bandwidth) / base > self._bandwidth_change:
+                return "link/bandwidth"
+        if set(reference.links.keys()) - set(snapshot.links.keys()):
+            return "link/lost"
+        for channel, length in snapshot.queues.items():
+            if length - reference.queues.get(channel, 0) >= self._queue_growth:
+                return "channel/queue"
+        return None
+
+    def _spending(self, reference: Snapshot, snapshot: Snapshot) -> bool:
+        # the current solution did not plan for what metered links spend past its window
+        if Clock.time() - self._last_solution < self._budget_window:
+            return False
+        return any(spent > reference.spent.get(interface, 0)
+                   for interface, spent in snapshot.spent.items())
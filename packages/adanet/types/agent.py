@@ -4,3 +4,5 @@ from enum import Enum
 class AgentRole(Enum):
     SOURCE = "source"
     SINK = "sink"
+    # receives from upstream (as a sink) and forwards downstream (as a source)
+    RELAY = "relay"
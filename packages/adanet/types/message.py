@@ -1,4 +1,5 @@
 import dataclasses
+from typing import Dict, Any
 
 import cbor2
 
@@ -8,14 +9,41 @@ class Message:
     channel: str
     stamp: float
     payload: bytes
+    # optional metadata used by the transport (e.g., striping)
+    headers: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    # priority of the channel (local only, not serialized)
+    priority: int = 0
 
     def serialize(self) -> bytes:
-        return cbor2.dumps({
+        data: Dict[str, Any] = {
             "channel": self.channel,
             "stamp": self.stamp,
             "payload": self.payload,
-        })
+        }
+        if self.headers:
+            data["headers"] = self.headers
+        return cbor2.dumps(data)
 
     @staticmethod
     def deserialize(data: bytes) -> 'Message':
         return Message(**cbor2.loads(data))
+
+
+@dataclasses.dataclass
+class ControlMessage:
+    """
+    Message exchanged between the adapters on the two sides of a link (e.g., acknowledgements),
+    these never reach the switchboard.
+    """
+    type: str
+    data: Dict[str, Any] = dataclasses.field(default_factory=dict)
+
+    def serialize(self) -> bytes:
+        return cbor2.dumps({
+            "type": self.type,
+            "data": self.data,
+        })
+
+    @staticmethod
+    def deserialize(data: bytes) -> 'ControlMessage':
+        return ControlMessage(**cbor2.loads(data))
@@ -1,11 +1,12 @@
 import json
+import math
 import signal
 import threading
 from threading import Semaphore
 from time import sleep
-from abc import abstractmethod
-from collections import Callable, defaultdict
-from typing import Set, Dict, List, Optional
+from abc import abstractmethod, ABC
+from collections import Callable, defaultdict, deque
+from typing import Set, Dict, List, Optional, Type, Deque
 from threading import Condition
 
 import yaml
@@ -267,3 +268,244 @@ class MaxWindow:
     def last(self) -> float:
         with self._lock:
             return self._data[self._cursor]
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter. Tokens (bytes) accumulate at `rate` per second up to `burst`.
+    Requests bigger than the burst are let through when the bucket is full and leave the
+    bucket in debt, so that the long term rate is still respected.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self._rate: Optional[float] = rate
+        self._burst: float = burst if burst is not None else (rate or 0.0)
+        self._tokens: float = self._burst
+        self._last: float = Clock.time()
+        self._lock: Semaphore = Semaphore()
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def set_rate(self, rate: Optional[float], burst: Optional[float] = None):
+        """
+        Changes the rate (None means unlimited) and burst size of the bucket.
+        """
+        with self._lock:
+            self._refill()
+            self._rate = rate
+            self._burst = burst if burst is not None else (rate or 0.0)
+            self._tokens = min(self._tokens, self._burst)
+
+    def consume(self, amount: float) -> bool:
+        """
+        Takes `amount` tokens from the bucket.
+
+        :param amount:  number of tokens needed
+        :return:        whether the tokens were available (and taken)
+        """
+        with self._lock:
+            if self._rate is None:
+                return True
+            self._refill()
+            if self._tokens < min(amount, self._burst):
+                return False
+            self._tokens -= amount
+            return True
+
+    def allows(self, amount: float) -> bool:
+        """
+        Tells whether `amount` tokens could be taken right now (without taking them).
+        """
+        with self._lock:
+            if self._rate is None:
+                return True
+            self._refill()
+            return self._tokens >= min(amount, self._burst)
+
+    def charge(self, amount: float):
+        """
+        Takes `amount` tokens from the bucket, even if that leaves the bucket in debt.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+
+    def _refill(self):
+        now: float = Clock.time()
+        if self._rate is not None:
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+
+class IEstimator(ABC):
+    """
+    Online estimator of a noisy signal (e.g., the bandwidth of a network link).
+    Estimators keep a running mean and variance of the samples they receive and can
+    provide a lower confidence bound on the signal.
+    """
+
+    def __init__(self):
+        self._last: float = 0.0
+        self._count: int = 0
+        self._lock: Semaphore = Semaphore()
+
+    @property
+    def last(self) -> float:
+        return self._last
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    @abstractmethod
+    def mean(self) -> float:
+        pass
+
+    @property
+    @abstractmethod
+    def variance(self) -> float:
+        pass
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(0.0, self.variance))
+
+    def lower_bound(self, z: float = 1.0) -> float:
+        """
+        Lower confidence bound on the signal, i.e., `z` standard deviations below the mean.
+
+        :param z: number of standard deviations
+        :return: lower confidence bound (never negative)
+        """
+        return max(0.0, self.mean - z * self.std)
+
+    def add(self, value: float):
+        with self._lock:
+            self._last = value
+            self._count += 1
+            self._update(value)
+
+    @abstractmethod
+    def _update(self, value: float):
+        pass
+
+
+class EWMAEstimator(IEstimator):
+    """
+    Exponentially weighted moving average and variance.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        super(EWMAEstimator, self).__init__()
+        self._alpha: float = alpha
+        self._mean: float = 0.0
+        self._variance: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        return self._variance
+
+    def _update(self, value: float):
+        if self._count == 1:
+            self._mean = value
+            self._variance = 0.0
+            return
+        diff: float = value - self._mean
+        increment: float = self._alpha * diff
+        self._mean += increment
+        self._variance = (1.0 - self._alpha) * (self._variance + diff * increment)
+
+
+class KalmanEstimator(IEstimator):
+    """
+    Scalar Kalman filter with a random-walk state model.
+    The measurement noise is learned online from the innovations, this makes the filter
+    usable on links whose bandwidth differs by orders of magnitude (e.g., acoustic vs wifi).
+    The process noise is expressed as a fraction of the measurement noise.
+    """
+
+    def __init__(self, process_noise: float = 0.1, adaptation: float = 0.2):
+        super(KalmanEstimator, self).__init__()
+        self._q: float = process_noise
+        self._a: float = adaptation
+        self._x: float = 0.0
+        self._p: float = 0.0
+        self._r: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self._x
+
+    @property
+    def variance(self) -> float:
+        # predictive variance of the next measurement
+        return self._p + self._r
+
+    def _update(self, value: float):
+        if self._count == 1:
+            self._x = value
+            return
+        innovation: float = value - self._x
+        # learn measurement noise from the innovations
+        self._r = (1.0 - self._a) * self._r + self._a * (innovation ** 2)
+        # predict
+        p: float = self._p + self._q * self._r
+        # correct
+        gain: float = p / (p + self._r) if (p + self._r) > 0 else 1.0
+        self._x += gain * innovation
+        self._p = (1.0 - gain) * p
+
+
+class QuantileWindow(IEstimator):
+    """
+    Keeps the last `size` samples, the lower confidence bound is the empirical `quantile`
+    of the window rather than a function of the standard deviation.
+    """
+
+    def __init__(self, size: int = 20, quantile: float = 0.1):
+        super(QuantileWindow, self).__init__()
+        self._quantile: float = quantile
+        self._data: Deque[float] = deque(maxlen=size)
+
+    @property
+    def mean(self) -> float:
+        with self._lock:
+            return sum(self._data) / len(self._data) if self._data else 0.0
+
+    @property
+    def variance(self) -> float:
+        with self._lock:
+            if not self._data:
+                return 0.0
+            mean: float = sum(self._data) / len(self._data)
+            return sum((v - mean) ** 2 for v in self._data) / len(self._data)
+
+    def lower_bound(self, z: float = 1.0) -> float:
+        with self._lock:
+            if not self._data:
+                return 0.0
+            data: List[float] = sorted(self._data)
+        return max(0.0, data[int(self._quantile * (len(data) - 1))])
+
+    def _update(self, value: float):
+        self._data.append(value)
+
+
+estimators: Dict[str, Type[IEstimator]] = {
+    "ewma": EWMAEstimator,
+    "kalman": KalmanEstimator,
+    "quantile": QuantileWindow,
+}
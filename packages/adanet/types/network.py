@@ -3,7 +3,7 @@ from enum import IntEnum, Enum
 
 import dataclasses
 
-from adanet.types.message import Message
+from adanet.types.message import Message, ControlMessage
 
 
 class NetworkDeviceType(Enum):
@@ -28,6 +28,18 @@ class INetworkManager(ABC):
     def recv(self, interface: str, message: Message):
         pass
 
+    @abstractmethod
+    def broadcast_control(self, message: ControlMessage):
+        pass
+
+    @abstractmethod
+    def charge(self, interface: str, size: int):
+        pass
+
+    @abstractmethod
+    def acknowledge(self, message: Message):
+        pass
+
 
 class ISwitchboard(ABC):
 
@@ -39,6 +51,14 @@ class ISwitchboard(ABC):
     def recv(self, message: Message):
         pass
 
+    @abstractmethod
+    def backpressure(self, report: dict):
+        pass
+
+    @abstractmethod
+    def custody_ack(self, ack: dict):
+        pass
+
 
 class IAdapter(ABC):
 
@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Callable, Optional
+from typing import Callable, Optional, Any
 
 
 class IPipe(ABC):
@@ -7,7 +7,7 @@ class IPipe(ABC):
     def __init__(self, name: str, size: int, *_, **__):
         self._name: str = name
         self._size: int = size
-        self._callback: Optional[Callable[[bytes], None]] = None
+        self._callback: Optional[Callable[..., None]] = None
 
     @property
     def name(self) -> str:
@@ -17,7 +17,7 @@ class IPipe(ABC):
     def size(self) -> int:
         return self._size
 
-    def register_callback(self, callback: Callable[[bytes], None]):
+    def register_callback(self, callback: Callable[..., None]):
         if self._callback is not None:
             raise ValueError("Another callback is already registered")
         self._callback = callback
@@ -25,7 +25,7 @@ class IPipe(ABC):
     def update(self, **kwargs):
         pass
 
-    def _on_data(self, data: bytes):
+    def _on_data(self, data: bytes, **kwargs: Any):
         if self._callback is None:
             return
         # update size
@@ -34,4 +34,4 @@ class IPipe(ABC):
         else:
             self._size = max(self._size, len(data))
         # ---
-        self._callback(data)
+        self._callback(data, **kwargs)
@@ -1,11 +1,12 @@
 import os
 from enum import Enum
 from ipaddress import IPv4Address
-from typing import Optional, List, Callable, Dict, Iterable
+from typing import Optional, List, Callable, Dict, Iterable, Set
 
 from pydantic import validator
 
 from adanet.networking.constants import NETWORK_TECHNOLOGIES
+from adanet.types.agent import AgentRole
 from adanet.types.misc import GenericModel
 from adanet.utils import parse_bandwidth_str, parse_latency_str, parse_size_str
 
@@ -20,6 +21,33 @@ class ChannelKind(Enum):
     DISK = "disk"
 
 
+class ChannelCategory(Enum):
+    # newest message only, latency-sensitive
+    LIVE = "live"
+    # messages the live lane could not send in time, drained newest first with leftover capacity
+    CACHED = "cached"
+
+
+class LinkForecast(GenericModel):
+    # predicted bandwidth (bytes/sec) for each of the next problem windows
+    bandwidth: List[float] = []
+    # predicted probability of the link being available for each of the next problem windows
+    availability: List[float] = []
+    # period of the link pattern (in number of problem windows), if one was detected
+    period: Optional[int] = None
+
+    @property
+    def horizon(self) -> int:
+        return len(self.bandwidth)
+
+    def report(self) -> dict:
+        return {
+            "bandwidth": self.bandwidth[0] if self.bandwidth else None,
+            "availability": self.availability[0] if self.availability else None,
+            "period": self.period,
+        }
+
+
 class Link(GenericModel):
     class Config:
         extra = "allow"
@@ -34,6 +62,10 @@ class Link(GenericModel):
     # optional static network configuration
     server: Optional[IPv4Address] = None
 
+    # side of the link this agent is on, only relays need it ('sink' faces upstream and
+    # 'source' faces downstream)
+    role: Optional[AgentRole] = None
+
     # network flow properties
     bandwidth: Optional[float] = None
     latency: float = 0
@@ -45,6 +77,8 @@ class Link(GenericModel):
     # (internal use only)
     # - budget in Bytes that this link can use in each problem formulation
     capacity: Optional[float] = None
+    # - bandwidth/availability forecast for the next problem windows
+    forecast: Optional[LinkForecast] = None
 
     # noinspection PyMethodParameters
     @validator("bandwidth", "latency")
@@ -89,8 +123,10 @@ class Link(GenericModel):
         return {
             "bandwidth": self.bandwidth,
             "latency": self.latency,
+            "reliability": self.reliability,
             "budget": self.budget,
             "capacity": self.capacity,
+            "forecast": self.forecast.report() if self.forecast else None,
         }
 
 
@@ -99,6 +135,13 @@ class ChannelQoS(GenericModel):
     latency: Optional[float] = None
     frequency: Optional[float] = None
     latency_policy: LatencyPolicy = LatencyPolicy.BEST_EFFORT
+    # protect the channel with forward error correction on lossy links
+    fec: bool = False
+    # suppress payloads identical to the previous one, sending them in full at least once every
+    # `dedup` seconds (None disables deduplication)
+    dedup: Optional[float] = None
+    # send a small marker in place of a suppressed payload (the sink republishes the last one)
+    dedup_markers: bool = True
 
     # noinspection PyMethodParameters
     @validator("latency", pre=True)
@@ -129,9 +172,17 @@ class Channel(GenericModel):
     # (internal use only)
     # - packet stored in queue waiting to be bridged
     queue_length: int = 0
+    # - lane of the original channel this channel carries (see `Problem.categorize_channels`)
+    category: Optional[ChannelCategory] = None
+    origin: Optional[str] = None
+
+    @property
+    def is_cached(self) -> bool:
+        return self.category in [ChannelCategory.CACHED, ChannelCategory.CACHED.value]
 
     def report(self) -> dict:
         return {
+            "category": self.category,
             "priority": self.priority,
             "frequency": self.frequency,
             "size": self.size,
@@ -170,29 +221,48 @@ class Problem(GenericModel):
     simulation: Optional[Simulation] = None
     name: str = "real"
 
-    def categorize_channels(self, categories: Iterable[str]):
+    def categorize_channels(self, categories: Iterable[ChannelCategory] = tuple(ChannelCategory)):
+        """
+        Splits each channel into one lane per category, e.g., `/gps` becomes `live/gps` and
+        `cached/gps`. Disk channels are not split as their content is all backlog.
+        """
         old_channels: List[Channel] = self.channels
         new_channels: List[Channel] = []
         # iterate over the categories
-        for category in categories:
+        for category in map(ChannelCategory, categories):
             # iterate over the original channels
             for channel in old_channels:
+                if channel.kind in [ChannelKind.DISK, ChannelKind.DISK.value]:
+                    if category is ChannelCategory.LIVE:
+                        new_channels.append(channel)
+                    continue
                 new_channel = channel.copy(deep=True)
-                new_channel.name = os.path.join(category, channel.name.strip("/"))
+                new_channel.name = os.path.join(category.value, channel.name.strip("/"))
+                new_channel.category = category.value
+                new_channel.origin = channel.name
+                qos: ChannelQoS = new_channel.qos or ChannelQoS()
+                if category is ChannelCategory.LIVE:
+                    # the live lane only holds the newest message
+                    qos.queue_size = 1
+                else:
+                    # the cached lane produces nothing on its own, it is fed by the live lane
+                    new_channel.frequency = None
+                    # and it is not latency-sensitive
+                    qos.latency = None
+                    qos.frequency = None
+                    qos.latency_policy = LatencyPolicy.BEST_EFFORT
+                new_channel.qos = qos
                 new_channels.append(new_channel)
         self.channels = new_channels
-        # iterate over the simulated channels (if any)
+        # iterate over the simulated channels (if any), only live lanes produce data
         if self.simulation:
-            old_channels: List[SimulatedChannel] = self.simulation.channels or []
-            new_channels: List[SimulatedChannel] = []
-            # iterate over the categories
-            for category in categories:
-                # iterate over the original channels
-                for channel in old_channels:
-                    new_channel = channel.copy(deep=True)
-                    new_channel.name = os.path.join(category, channel.name.strip("/"))
-                    new_channels.append(new_channel)
-            self.simulation.channels = new_channels
+            disk_channels: Set[str] = {
+                c.name for c in old_channels if c.kind in [ChannelKind.DISK, ChannelKind.DISK.value]
+            }
+            for channel in self.simulation.channels or []:
+                if channel.name not in disk_channels:
+                    channel.name = os.path.join(ChannelCategory.LIVE.value,
+                                                channel.name.strip("/"))
 
     def report(self) -> dict:
         return {
@@ -0,0 +1,162 @@
+import traceback
+from collections import deque
+from threading import Thread, Condition
+from typing import Deque, Tuple, Any, Callable, Dict, List, Optional
+
+from adanet.constants import WORKER_POOL_SIZE
+from adanet.time import Clock
+from adanet.types import Shuttable
+from adanet.types.misc import EWMAEstimator
+
+
+class Lane:
+    """
+    Bounded ring of items handled one at a time, in the order they were pushed, by the
+    workers of a `WorkerPool`. When the ring is full, the oldest item is dropped, unless the
+    lane is lossless, in which case the ring grows past its size (and it is up to the owner of
+    the lane to slow down the producer, e.g., through backpressure).
+    """
+
+    def __init__(self, pool: 'WorkerPool', key: str, handler: Callable[[Any], None], size: int,
+                 lossless: bool = False):
+        self._pool: WorkerPool = pool
+        self._key: str = key
+        self._handler: Callable[[Any], None] = handler
+        self._size: int = size
+        self._lossless: bool = lossless
+        self._ring: Deque[Tuple[float, Any]] = deque()
+        # whether the lane is waiting for a worker or being served by one
+        self._scheduled: bool = False
+        # statistics
+        self._dropped: int = 0
+        self._latency: EWMAEstimator = EWMAEstimator()
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    @property
+    def backlog(self) -> int:
+        return len(self._ring)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def statistics(self) -> Dict[str, float]:
+        return {
+            "backlog": self.backlog,
+            "dropped": self.dropped,
+            # time from when an item is pushed to when it is handled
+            "latency": self._latency.mean,
+        }
+
+    def push(self, item: Any):
+        """
+        Hands an item over to the workers, never blocks.
+        """
+        self._pool.push(self, item)
+
+
+class WorkerPool:
+    """
+    Pool of threads serving lanes of work.
+
+    Items of the same lane are handled serially and in order, items of different lanes are
+    handled in parallel. Threads are started with the first lane.
+    """
+
+    def __init__(self, size: int = WORKER_POOL_SIZE):
+        self._size: int = size
+        self._condition: Condition = Condition()
+        # lanes with items waiting for a worker
+        self._ready: Deque[Lane] = deque()
+        self._lanes: List[Lane] = []
+        self._workers: List[Worker] = []
+
+    @property
+    def lanes(self) -> List[Lane]:
+        return list(self._lanes)
+
+    def lane(self, key: str, handler: Callable[[Any], None], size: int,
+             lossless: bool = False) -> Lane:
+        """
+        Creates a new lane.
+
+        :param key:         name of the lane (e.g., the channel it serves)
+        :param handler:     function handling the items of the lane
+        :param size:        max number of items waiting to be handled
+        :param lossless:    whether to keep items past `size` instead of dropping the oldest
+        :return:            the lane
+        """
+        lane: Lane = Lane(self, key, handler, size, lossless)
+        with self._condition:
+            self._lanes.append(lane)
+            if not self._workers:
+                self._workers = [Worker(self) for _ in range(self._size)]
+                for worker in self._workers:
+                    worker.start()
+        return lane
+
+    def push(self, lane: Lane, item: Any):
+        with self._condition:
+            # noinspection PyProtectedMember
+            if not lane._lossless and len(lane._ring) >= lane._size:
+                lane._ring.popleft()
+                lane._dropped += 1
+            lane._ring.append((Clock.time(), item))
+            if not lane._scheduled:
+                lane._scheduled = True
+                self._ready.append(lane)
+                self._condition.notify()
+
+    def _next(self, timeout: float) -> Tuple[Optional[Lane], float, Any]:
+        with self._condition:
+            if not self._ready:
+                self._condition.wait(timeout)
+            if not self._ready:
+                return None, 0.0, None
+            lane: Lane = self._ready.popleft()
+            # noinspection PyProtectedMember
+            stamp, item = lane._ring.popleft()
+            return lane, stamp, item
+
+    def _done(self, lane: Lane, stamp: float):
+        # noinspection PyProtectedMember
+        lane._latency.add(Clock.time() - stamp)
+        with self._condition:
+            # noinspection PyProtectedMember
+            if lane._ring:
+                # other items are waiting, the lane goes back in line
+                self._ready.append(lane)
+                self._condition.notify()
+            else:
+                lane._scheduled = False
+
+
+class Worker(Shuttable, Thread):
+
+    def __init__(self, pool: WorkerPool):
+        Shuttable.__init__(self)
+        Thread.__init__(self, daemon=True)
+        self._pool: WorkerPool = pool
+
+    def run(self) -> None:
+        while not self.is_shutdown:
+            # noinspection PyProtectedMember
+            lane, stamp, item = self._pool._next(timeout=1.0)
+            if lane is None:
+                continue
+            # noinspection PyBroadException
+            try:
+                # noinspection PyProtectedMember
+                lane._handler(item)
+            except Exception:
+                print(traceback.format_exc())
+            # noinspection PyProtectedMember
+            self._pool._done(lane, stamp)
+
+
+# pool shared by all the channels
+workers: WorkerPool = WorkerPool()
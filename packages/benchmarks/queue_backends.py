@@ -0,0 +1,76 @@
+"""
+Persistent queue backends (see `QUEUE_PERSISTENT_BACKEND`): throughput (messages/sec) and
+disk footprint of the SQLite queue vs the segment log, after writing all the messages, after
+consuming half of them and after consuming all of them.
+
+Queues are created in a temporary directory, e.g.,
+
+    launchers/benchmark.sh queue_backends -n 20000 -s 1024
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Callable
+
+# queues are created under QUEUE_PATH, which must be set before adanet is imported
+os.environ["QUEUE_PATH"] = tempfile.mkdtemp(prefix="adanet-queues-")
+
+from adanet.constants import QUEUE_PATH
+from adanet.queue.base import QueueType, QueueDurability
+from adanet.queue.log import Queue as LogQueue
+from adanet.queue.persistent import PersistentQueue
+from adanet.queue.sqlite import Queue as SQLiteQueue
+from adanet.types import Shuttable
+
+
+def _rate(number: int, fcn: Callable[[], None]) -> float:
+    stime: float = time.perf_counter()
+    fcn()
+    return number / (time.perf_counter() - stime)
+
+
+def _footprint(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=20000,
+                        help="Number of messages")
+    parser.add_argument("-s", "--size", type=int, default=1024,
+                        help="Size of each message (in bytes)")
+    parser.add_argument("--segment-bytes", type=int, default=4 * 1024 * 1024,
+                        help="Size of the segments of the log")
+    parsed = parser.parse_args()
+    payload: bytes = os.urandom(parsed.size)
+    half: int = parsed.number // 2
+    fmt = "{:<10}{:>14}{:>14}{:>12}{:>12}{:>12}"
+    print(fmt.format("backend", "put (msg/s)", "get (msg/s)", "disk (MB)", "half (MB)",
+                     "empty (MB)"))
+    for name in ["sqlite", "log"]:
+        queue: PersistentQueue = SQLiteQueue(QueueType.PERSISTENT, name, -1) if name == "sqlite" \
+            else LogQueue(QueueType.PERSISTENT, name, segment_bytes=parsed.segment_bytes)
+        path: str = os.path.join(QUEUE_PATH, QueueType.PERSISTENT.value, name)
+        assert queue.durability is QueueDurability.BATCH
+        puts: float = _rate(parsed.number,
+                            lambda: [queue.put(payload) for _ in range(parsed.number)])
+        queue.flush()
+        footprint: List[int] = [_footprint(path)]
+        gets: float = _rate(half, lambda: [queue.get(block=False) for _ in range(half)])
+        queue.flush()
+        footprint.append(_footprint(path))
+        queue.get_many(parsed.number)
+        queue.flush()
+        footprint.append(_footprint(path))
+        print(fmt.format(name, f"{puts:.0f}", f"{gets:.0f}",
+                         *[f"{f / 1024 / 1024:.1f}" for f in footprint]))
+    Shuttable.shutdown_all()
+    shutil.rmtree(QUEUE_PATH, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Cost of a put/get round trip through the small CACHE queues: the in-memory SQLite queue they
+used vs the ring buffer (see `adanet.queue.ring.Queue`), empty and full (evicting on put).
+
+    launchers/benchmark.sh queue_ring
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+from typing import List
+
+# queues are created under QUEUE_PATH, which must be set before adanet is imported
+os.environ["QUEUE_PATH"] = tempfile.mkdtemp(prefix="adanet-queues-")
+
+from adanet.constants import QUEUE_PATH
+from adanet.queue.base import QueueType, IQueue
+from adanet.queue.ring import Queue as RingQueue
+from adanet.queue.sqlite import Queue as SQLiteQueue
+from adanet.types import Shuttable
+
+
+def _measure(fcn, number: int) -> float:
+    return min(timeit.repeat(fcn, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=10000,
+                        help="Number of operations per measurement")
+    parser.add_argument("-s", "--size", type=int, default=1024,
+                        help="Size of each message (in bytes)")
+    parsed = parser.parse_args()
+    payload: bytes = os.urandom(parsed.size)
+    fmt = "{:>10}{:>16}{:>16}"
+    print(fmt.format("max size", "sqlite (mem)", "ring"))
+    for max_size in [2, 10, 100]:
+        for full in [False, True]:
+            timings: List[float] = []
+            for queue in [
+                SQLiteQueue(QueueType.CACHE, f"sqlite-{max_size}", max_size, memory=True),
+                RingQueue(QueueType.CACHE, f"ring-{max_size}", max_size),
+            ]:
+                queue: IQueue
+                if full:
+                    for _ in range(max_size):
+                        queue.put(payload)
+                    # the queue stays full, every put evicts the oldest message
+                    timings.append(_measure(lambda: queue.put(payload), parsed.number))
+                else:
+                    timings.append(_measure(lambda: (queue.put(payload), queue.get(block=False)),
+                                            parsed.number))
+            name: str = f"{max_size}" + (" (full)" if full else "")
+            print(fmt.format(name, *[f"{t:.2f}us" for t in timings]))
+    Shuttable.shutdown_all()
+    shutil.rmtree(QUEUE_PATH, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
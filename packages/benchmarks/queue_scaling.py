@@ -0,0 +1,70 @@
+"""
+Cost of reading the length of a persistent queue as the queue grows: counting the rows
+(`COUNT(*)`, as the queues did every second) vs the length kept alongside the data
+(`Queue.length`), both when nothing changed and right after another connection committed a
+message (the latter includes the cost of that commit).
+
+Queues are created in a temporary directory, e.g.,
+
+    launchers/benchmark.sh queue_scaling -s 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+from typing import List
+
+# queues are created under QUEUE_PATH, which must be set before adanet is imported
+os.environ["QUEUE_PATH"] = tempfile.mkdtemp(prefix="adanet-queues-")
+
+from adanet.constants import QUEUE_PATH
+from adanet.queue.base import QueueType, QueueDurability
+from adanet.queue.sqlite import Queue, TABLE_NAME
+from adanet.types import Shuttable
+
+
+def _measure(fcn, number: int) -> float:
+    return min(timeit.repeat(fcn, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--sizes", type=int, nargs="+",
+                        default=[1000, 10000, 100000, 1000000],
+                        help="Number of messages in the queue")
+    parser.add_argument("-n", "--number", type=int, default=100,
+                        help="Number of reads per measurement")
+    parsed = parser.parse_args()
+    fmt = "{:>12}{:>16}{:>16}{:>20}"
+    print(fmt.format("messages", "COUNT(*)", "length", "put + length"))
+    for size in parsed.sizes:
+        queue: Queue = Queue(QueueType.PERSISTENT, f"scaling-{size}", max_size=-1,
+                             durability=QueueDurability.OFF)
+        for _ in range(0, size, 10000):
+            queue.put_many([b"x" * 16] * min(10000, size - queue.length))
+        queue.flush()
+        # a second connection to the same queue (e.g., a DiskSink in another process)
+        other: Queue = Queue(QueueType.PERSISTENT, f"scaling-{size}", max_size=-1,
+                             durability=QueueDurability.OFF)
+        # noinspection PyProtectedMember
+        count = queue._db.execute
+
+        def _changed():
+            other.put(b"x")
+            other.flush()
+            return queue.length
+
+        timings: List[float] = [
+            _measure(lambda: count(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone(),
+                     parsed.number),
+            _measure(lambda: queue.length, parsed.number),
+            _measure(_changed, parsed.number),
+        ]
+        print(fmt.format(size, *[f"{t:.2f}us" for t in timings]))
+    Shuttable.shutdown_all()
+    shutil.rmtree(QUEUE_PATH, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Throughput (messages/sec) of the persistent queues: one SQLite transaction per operation
+(`persistqueue.SQLiteQueue` with auto_commit, as the queues were before group commit) vs the
+group-committed queues at each durability level, one message at a time and in batches
+(`put_many`/`get_many`).
+
+Queues are created in a temporary directory, e.g.,
+
+    launchers/benchmark.sh queues -n 5000 -s 1024
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+# queues are created under QUEUE_PATH, which must be set before adanet is imported
+os.environ["QUEUE_PATH"] = tempfile.mkdtemp(prefix="adanet-queues-")
+
+from persistqueue import SQLiteQueue
+
+from adanet.constants import QUEUE_PATH
+from adanet.queue.base import QueueType, QueueDurability
+from adanet.queue.sqlite import Queue
+from adanet.types import Shuttable
+
+
+def _rate(number: int, fcn: Callable[[], None]) -> float:
+    stime: float = time.perf_counter()
+    fcn()
+    return number / (time.perf_counter() - stime)
+
+
+def _baseline(number: int, payload: bytes) -> Tuple[float, float]:
+    queue = SQLiteQueue(os.path.join(QUEUE_PATH, "baseline"), auto_commit=True,
+                        multithreading=True)
+    puts: float = _rate(number, lambda: [queue.put(payload) for _ in range(number)])
+    gets: float = _rate(number, lambda: [queue.get(block=False) for _ in range(number)])
+    return puts, gets
+
+
+def _grouped(number: int, payload: bytes, durability: QueueDurability, batch: int) -> \
+        Tuple[float, float]:
+    queue: Queue = Queue(QueueType.PERSISTENT, f"{durability.value}-{batch}", max_size=-1,
+                         durability=durability)
+    if batch == 1:
+        puts: float = _rate(number, lambda: [queue.put(payload) for _ in range(number)])
+        queue.flush()
+        gets: float = _rate(number, lambda: [queue.get(block=False) for _ in range(number)])
+    else:
+        puts: float = _rate(number, lambda: [queue.put_many([payload] * batch)
+                                             for _ in range(number // batch)])
+        queue.flush()
+        gets: float = _rate(number, lambda: [queue.get_many(batch)
+                                             for _ in range(number // batch)])
+    queue.flush()
+    return puts, gets
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=5000,
+                        help="Number of messages per measurement")
+    parser.add_argument("-s", "--size", type=int, default=1024,
+                        help="Size of each message (in bytes)")
+    parser.add_argument("-b", "--batch", type=int, default=64,
+                        help="Messages per put_many/get_many")
+    parsed = parser.parse_args()
+    payload: bytes = os.urandom(parsed.size)
+    results: List[Tuple[str, Tuple[float, float]]] = [
+        ("auto-commit (before)", _baseline(parsed.number, payload)),
+    ]
+    for durability in QueueDurability:
+        for batch in [1, parsed.batch]:
+            name: str = f"{durability.value}" + ("" if batch == 1 else f" x{batch}")
+            results.append((name, _grouped(parsed.number, payload, durability, batch)))
+    fmt = "{:<24}{:>16}{:>16}"
+    print(fmt.format("queue", "put (msg/s)", "get (msg/s)"))
+    for name, (puts, gets) in results:
+        print(fmt.format(name, f"{puts:.0f}", f"{gets:.0f}"))
+    Shuttable.shutdown_all()
+    shutil.rmtree(QUEUE_PATH, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Cost of converting ROS messages to/from Python dicts with the generic (recursive) converters
+vs the converters compiled once per message type (see `ROS.encoder` and `ROS.decoder`).
+
+Only needs the ROS message packages (no ROS master), e.g.,
+
+    launchers/benchmark.sh ros_converters
+"""
+import argparse
+import timeit
+from typing import Dict, Type, Any, List, Tuple, Optional
+
+import rospy
+from geometry_msgs.msg import Pose, PoseArray
+from nav_msgs.msg import Odometry
+from sensor_msgs.msg import NavSatFix, Image, PointCloud2, PointField
+from std_msgs.msg import Float64
+
+from adanet.networking.ros import ROS
+
+
+# generic converters (walk the message every time), as they were before being compiled
+
+def _generic_message_to_dict(msg: rospy.msg.AnyMsg) -> Dict:
+    res: Dict = {}
+    for k in msg.__slots__:
+        v = getattr(msg, k)
+        if hasattr(v, "__slots__"):
+            v = _generic_message_to_dict(v)
+        res[k] = v
+    return res
+
+
+def _generic_dict_to_message(data: Dict, MsgType: Type[rospy.msg.AnyMsg]) -> rospy.msg.AnyMsg:
+    fields: Dict = {}
+    for i, k in enumerate(MsgType.__slots__):
+        if k not in data:
+            continue
+        v: Any = data[k]
+        # noinspection PyProtectedMember
+        kt = MsgType._slot_types[i]
+        if kt == "time":
+            v = rospy.Time(**v)
+        elif "/" in kt:
+            v = _generic_dict_to_message(v, ROS.load_message_type(kt))
+        fields[k] = v
+    return MsgType(**fields)
+
+
+def _shapes() -> List[Tuple[str, rospy.msg.AnyMsg]]:
+    stamp = rospy.Time(1700000000, 500)
+    odometry: Odometry = Odometry()
+    odometry.header.stamp = stamp
+    odometry.pose.covariance = [0.1] * 36
+    odometry.twist.covariance = [0.1] * 36
+    cloud: PointCloud2 = PointCloud2(height=1, width=10000, point_step=16, row_step=160000,
+                                     fields=[PointField(name=n, offset=4 * i, datatype=7, count=1)
+                                             for i, n in enumerate("xyzi")],
+                                     data=bytes(160000))
+    return [
+        ("std_msgs/Float64", Float64(data=1.0)),
+        ("sensor_msgs/NavSatFix", NavSatFix(latitude=41.5, longitude=-70.6,
+                                            position_covariance=[0.0] * 9)),
+        ("nav_msgs/Odometry", odometry),
+        ("geometry_msgs/PoseArray (100)", PoseArray(poses=[Pose() for _ in range(100)])),
+        ("sensor_msgs/Image (640x480)", Image(height=480, width=640, encoding="rgb8",
+                                              step=640 * 3, data=bytes(640 * 480 * 3))),
+        ("sensor_msgs/PointCloud2 (10k)", cloud),
+    ]
+
+
+def _measure(fcn, number: int) -> Optional[float]:
+    try:
+        fcn()
+    except Exception:
+        # the generic converters do not support arrays of messages
+        return None
+    return min(timeit.repeat(fcn, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=10000,
+                        help="Number of conversions per measurement")
+    parsed = parser.parse_args()
+    fmt = "{:<32}{:>14}{:>14}{:>14}{:>14}"
+    print(fmt.format("message", "to_dict (gen)", "to_dict", "to_msg (gen)", "to_msg"))
+    for name, msg in _shapes():
+        MsgType: Type[rospy.msg.AnyMsg] = type(msg)
+        data: Dict = ROS.message_to_dict(msg)
+        encode, decode = ROS.encoder(MsgType), ROS.decoder(MsgType)
+        timings: List[Optional[float]] = [
+            _measure(lambda: _generic_message_to_dict(msg), parsed.number),
+            _measure(lambda: encode(msg), parsed.number),
+            _measure(lambda: _generic_dict_to_message(data, MsgType), parsed.number),
+            _measure(lambda: decode(data), parsed.number),
+        ]
+        print(fmt.format(name, *[
+            "n/a" if t is None else f"{t:.2f}us" for t in timings
+        ]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Throughput of a ROS channel bridged as dict/CBOR vs forwarded as raw serialized buffers.
+
+A local publisher (stand-in for a camera driver) publishes `sensor_msgs/Image` messages as
+fast as it can, a subscriber in the same process does what a `ROSSource` and a `ROSSink`
+would do with each message and counts how many messages per second make it through.
+
+Requires a running ROS master, e.g.,
+
+    roscore &
+    launchers/benchmark.sh ros_passthrough --width 1280 --height 720
+"""
+import argparse
+import time
+from io import BytesIO
+from threading import Thread, Event
+from typing import Dict, Type, Callable
+
+import cbor2
+import rospy
+from rospy.msg import AnyMsg
+from sensor_msgs.msg import Image
+
+from adanet.networking.ros import ROS
+
+
+def _dict_pipeline(msg: Image):
+    # source: ROS message -> dict -> CBOR
+    data: bytes = cbor2.dumps(ROS.message_to_dict(msg))
+    # sink: CBOR -> dict -> ROS message -> wire
+    ROS.dict_to_message(cbor2.loads(data), Image).serialize(BytesIO())
+    return len(data)
+
+
+def _raw_pipeline(msg: AnyMsg):
+    # source: nothing to do
+    # noinspection PyProtectedMember
+    data: bytes = msg._buff
+    # sink: wire
+    RawImage: Type[AnyMsg] = ROS.raw_message_type(Image)
+    raw: AnyMsg = RawImage()
+    raw._buff = data
+    raw.serialize(BytesIO())
+    return len(data)
+
+
+def _publish(topic: str, width: int, height: int, stop: Event):
+    publisher = rospy.Publisher(topic, Image, queue_size=1)
+    msg: Image = Image(height=height, width=width, encoding="rgb8", step=width * 3,
+                       data=bytes(width * height * 3))
+    # give the subscriber the time to connect
+    time.sleep(1.0)
+    while not stop.is_set() and not rospy.is_shutdown():
+        msg.header.stamp = rospy.Time.now()
+        publisher.publish(msg)
+
+
+def _run(mode: str, width: int, height: int, duration: float) -> Dict[str, float]:
+    topic: str = f"/adanet/benchmark/{mode}"
+    received: Dict[str, float] = {"messages": 0, "bytes": 0}
+    pipeline: Callable = _raw_pipeline if mode == "raw" else _dict_pipeline
+
+    def _callback(msg):
+        received["bytes"] += pipeline(msg)
+        received["messages"] += 1
+
+    MsgType: Type[AnyMsg] = AnyMsg if mode == "raw" else Image
+    subscriber = rospy.Subscriber(topic, MsgType, _callback, queue_size=1, buff_size=2 ** 26)
+    stop: Event = Event()
+    publisher: Thread = Thread(target=_publish, args=(topic, width, height, stop), daemon=True)
+    publisher.start()
+    # wait for the first message, then measure
+    while received["messages"] == 0 and not rospy.is_shutdown():
+        time.sleep(0.01)
+    start: Dict[str, float] = dict(received)
+    time.sleep(duration)
+    end: Dict[str, float] = dict(received)
+    stop.set()
+    subscriber.unregister()
+    return {
+        "messages/sec": (end["messages"] - start["messages"]) / duration,
+        "MB/sec": (end["bytes"] - start["bytes"]) / duration / 2 ** 20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1280, help="Width of the images")
+    parser.add_argument("--height", type=int, default=720, help="Height of the images")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="Duration (in seconds) of each measurement")
+    parsed = parser.parse_args()
+    rospy.init_node("adanet_benchmark", disable_signals=True)
+    results: Dict[str, Dict[str, float]] = {}
+    for mode in ["dict", "raw"]:
+        results[mode] = _run(mode, parsed.width, parsed.height, parsed.duration)
+        print(f"{mode:>5}: {results[mode]['messages/sec']:8.1f} messages/sec, "
+              f"{results[mode]['MB/sec']:8.1f} MB/sec")
+    if results["dict"]["messages/sec"] > 0:
+        print(f" gain: {results['raw']['messages/sec'] / results['dict']['messages/sec']:.1f}x")
+    rospy.signal_shutdown("done")
+
+
+if __name__ == '__main__':
+    main()
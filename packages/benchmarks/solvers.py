@@ -0,0 +1,164 @@
+import argparse
+import math
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import yaml
+
+from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC
+from adanet.forecast import LinkForecaster
+from adanet.simulation import Simulator
+from adanet.solver import solvers, AbsSolver
+from adanet.types.problem import Problem, Channel, ChannelKind, Link
+from adanet.types.solution import Solution
+
+DEFAULT_PROBLEM = "/data/problems/iridium-wifi-contact.yaml"
+
+
+def _load_problem(fpath: str) -> Problem:
+    with open(fpath, "rt") as fin:
+        return Problem.parse_obj(yaml.safe_load(fin))
+
+
+def _is_disk(channel: Channel) -> bool:
+    return channel.kind in [ChannelKind.DISK, ChannelKind.DISK.value]
+
+
+def run(problem: Problem, solver: AbsSolver, duration: float, backlog: int) -> Dict[str, object]:
+    """
+    Runs the given solver against the simulated problem, one problem window at a time.
+
+    Links whose simulated bandwidth is zero are considered disconnected. Live channels produce
+    `frequency` messages per second that are lost if not sent within their window, disk
+    channels accumulate their production into a backlog (that starts at `backlog` messages).
+    """
+    window: float = FORMULATE_PROBLEM_EVERY_SEC
+    forecaster: LinkForecaster = LinkForecaster(window=window)
+    sim_links = {l.interface: l for l in (problem.simulation.links or [])} \
+        if problem.simulation else {}
+    sim_channels = {c.name: c for c in (problem.simulation.channels or [])} \
+        if problem.simulation else {}
+    # state
+    budget: Dict[str, Optional[float]] = {l.interface: l.budget for l in problem.links}
+    queues: Dict[str, int] = {c.name: backlog if _is_disk(c) else 0 for c in problem.channels}
+    produced: Dict[str, int] = defaultdict(lambda: 0)
+    delivered: Dict[str, int] = defaultdict(lambda: 0)
+    link_usage: Dict[str, float] = defaultdict(lambda: 0.0)
+    budget_exhausted_at: Optional[float] = None
+    # simulate
+    for k in range(int(duration // window)):
+        t: float = k * window
+        p: Problem = problem.copy(deep=True)
+        # simulate links and channels
+        for link in p.links:
+            if link.interface in sim_links:
+                link.__dict__.update(Simulator._update_link(link, sim_links[link.interface], t))
+        for channel in p.channels:
+            if channel.name in sim_channels:
+                channel.__dict__.update(
+                    Simulator._update_channel(channel, sim_channels[channel.name], t))
+        # produce data
+        rates: Dict[str, float] = {c.name: c.frequency or 0.0 for c in p.channels}
+        live: Dict[str, int] = {}
+        for channel in p.channels:
+            n: int = int(rates[channel.name] * window)
+            produced[channel.name] += n
+            if _is_disk(channel):
+                queues[channel.name] += n
+                live[channel.name] = 0
+                # this is what `DiskSource` reports
+                channel.frequency = queues[channel.name] / window
+            else:
+                live[channel.name] = n
+            channel.queue_length = queues[channel.name]
+        # formulate problem (as the engine does)
+        all_links: List[Link] = list(p.links)
+        for link in all_links:
+            link.budget = budget[link.interface]
+            available: bool = (link.bandwidth or 0) > 0 and \
+                (link.budget is None or link.budget > 0)
+            forecaster.observe(link.interface, link.bandwidth or 0.0, available, t=t)
+            if not available:
+                p.links.remove(link)
+        for link in p.links:
+            link.forecast = forecaster.forecast(link.interface)
+        # solve
+        solution: Solution = solver.solve(p)
+        # deliver
+        capacity: Dict[str, float] = {l.interface: (l.bandwidth or 0) * window for l in p.links}
+        for assignment in solution.assignments:
+            size: float = assignment.problem.size or 0
+            want: int = int(round(assignment.frequency * window))
+            have: int = live[assignment.name] + queues[assignment.name]
+            sent: int = 0
+            for i in range(min(want, have)):
+                iface: str = assignment.interfaces[i % len(assignment.interfaces)]
+                if iface not in capacity or capacity[iface] < size:
+                    continue
+                if budget[iface] is not None and budget[iface] < size:
+                    continue
+                capacity[iface] -= size
+                link_usage[iface] += size
+                if budget[iface] is not None:
+                    budget[iface] -= size
+                sent += 1
+            # live data first, backlog with what is left
+            from_backlog: int = max(0, sent - live[assignment.name])
+            queues[assignment.name] -= from_backlog
+            delivered[assignment.name] += sent
+        # budget exhausted?
+        if budget_exhausted_at is None and \
+                any(b is not None and b < 64 for b in budget.values()):
+            budget_exhausted_at = t
+    # ---
+    return {
+        "produced": dict(produced),
+        "delivered": dict(delivered),
+        "backlog": dict(queues),
+        "usage": dict(link_usage),
+        "budget": budget,
+        "budget_exhausted_at": budget_exhausted_at,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the solvers against the simulated version of a problem")
+    parser.add_argument("-p", "--problem", type=str, default=DEFAULT_PROBLEM,
+                        help="Path to a problem definition file with a 'simulation' section")
+    parser.add_argument("-d", "--duration", type=float, default=3600,
+                        help="Duration of the simulated mission (in seconds)")
+    parser.add_argument("-b", "--backlog", type=int, default=2000,
+                        help="Initial backlog (in messages) of the disk channels")
+    parser.add_argument("-s", "--solvers", type=str, nargs="+", default=list(solvers.keys()),
+                        choices=list(solvers.keys()), help="Solvers to benchmark")
+    parsed = parser.parse_args()
+    problem: Problem = _load_problem(os.path.abspath(parsed.problem))
+    print(f"Problem: {parsed.problem}\n"
+          f"Duration: {parsed.duration:.0f} secs\n"
+          f"Initial backlog: {parsed.backlog} messages\n")
+    for name in parsed.solvers:
+        results = run(problem, solvers[name](), parsed.duration, parsed.backlog)
+        print(f"{name}:")
+        for channel in problem.channels:
+            produced: int = results["produced"][channel.name]
+            if _is_disk(channel):
+                produced += parsed.backlog
+            delivered: int = results["delivered"].get(channel.name, 0)
+            ratio: float = delivered / produced if produced else math.nan
+            print(f"  channel {channel.name:<16} "
+                  f"delivered: {delivered:>7}/{produced:<7} ({ratio * 100:5.1f}%)  "
+                  f"backlog left: {results['backlog'][channel.name]}")
+        for link in problem.links:
+            left: Optional[float] = results["budget"][link.interface]
+            print(f"  link    {link.interface:<16} "
+                  f"used: {results['usage'].get(link.interface, 0) / 1024:>9.1f} KB  "
+                  f"budget left: {'-' if left is None else f'{left / 1024:.1f} KB'}")
+        exhausted: Optional[float] = results["budget_exhausted_at"]
+        print(f"  metered budget exhausted at: "
+              f"{'never' if exhausted is None else f'{exhausted:.0f} secs'}\n")
+
+
+if __name__ == '__main__':
+    main()
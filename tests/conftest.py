@@ -0,0 +1,15 @@
+from typing import List
+
+import pytest
+
+from adanet.time import Clock
+
+
+@pytest.fixture
+def fake_clock(monkeypatch) -> List[float]:
+    """
+    Freezes `Clock.time`, tests move time forward by changing the (only) element of the list.
+    """
+    now: List[float] = [1000.0]
+    monkeypatch.setattr(Clock, "time", staticmethod(lambda: now[0]))
+    return now
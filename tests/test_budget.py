@@ -0,0 +1,45 @@
+import os
+
+from adanet.networking.budget import BudgetLedger
+
+
+def test_budget_ledger_survives_restart(tmp_path):
+    path: str = os.path.join(tmp_path, "budget.json")
+    ledger: BudgetLedger = BudgetLedger(path)
+    ledger.charge("ppp0", 300)
+    ledger.charge("ppp0", 200)
+    ledger.charge("wlan0", 1000)
+    assert ledger.remaining("ppp0", 1024) == 524
+    # unmetered links have no budget
+    assert ledger.remaining("wlan0", None) is None
+    ledger.flush()
+    # no temporary files left behind
+    assert os.listdir(tmp_path) == ["budget.json"]
+    # a new run starts from the totals of the previous one
+    ledger = BudgetLedger(path)
+    assert ledger.spent("ppp0") == 500
+    assert ledger.spent("wlan0") == 1000
+    ledger.charge("ppp0", 1000)
+    assert ledger.remaining("ppp0", 1024) == 0
+
+
+def test_budget_ledger_corrupted_file(tmp_path):
+    path: str = os.path.join(tmp_path, "budget.json")
+    with open(path, "wt") as fout:
+        fout.write("{\"ppp0\": ")
+    ledger: BudgetLedger = BudgetLedger(path)
+    assert ledger.spent("ppp0") == 0
+
+
+def test_budget_ledger_burn_rate(fake_clock, tmp_path):
+    now = fake_clock
+    ledger: BudgetLedger = BudgetLedger(os.path.join(tmp_path, "budget.json"))
+    for _ in range(5):
+        now[0] += 10
+        ledger.charge("ppp0", 100)
+        ledger.flush()
+    stats: dict = ledger.statistics("ppp0", 1000)
+    assert stats["burn_rate"] == 10.0
+    assert stats["remaining"] == 500
+    # 500 bytes left at 10 bytes/sec
+    assert stats["exhausted_in"] == 50.0
@@ -0,0 +1,47 @@
+from typing import List, Tuple
+
+from adanet.contact import ContactMonitor, Contact
+from adanet.types.problem import LinkForecast
+
+
+def test_contact_delivered_and_utilisation(fake_clock):
+    now = fake_clock
+    sent: List[int] = [5000]
+    monitor: ContactMonitor = ContactMonitor(sent=lambda _: sent[0], horizon=10)
+    announced: List[Tuple[str, float]] = []
+    monitor.on_contact(lambda iface, expected: announced.append((iface, expected)))
+    assert monitor.observe("wlan0", False, 0.0) is None
+    # the link comes up, we are told right away how much it can carry
+    now[0] += 5
+    assert monitor.observe("wlan0", True, 1000.0) is None
+    assert announced == [("wlan0", 10000.0)]
+    # we send 15KB in 20 seconds at 1KB/s
+    for _ in range(4):
+        now[0] += 5
+        sent[0] += 3750
+        assert monitor.observe("wlan0", True, 1000.0) is None
+    now[0] += 1
+    contact: Contact = monitor.observe("wlan0", False, 0.0)
+    assert contact is not None
+    assert contact.duration == 21
+    assert contact.delivered == 15000
+    assert contact.capacity == 21000
+    assert abs(contact.utilisation - 15000 / 21000) < 1e-9
+    assert monitor.contact("wlan0") is None
+
+
+def test_contact_predicted(fake_clock):
+    monitor: ContactMonitor = ContactMonitor(sent=lambda _: 0, horizon=10, availability=0.5)
+    announced: List[Tuple[str, float]] = []
+    monitor.on_contact(lambda iface, expected: announced.append((iface, expected)))
+    # unlikely to come up
+    monitor.predict("wlan0", LinkForecast(bandwidth=[500.0], availability=[0.2]))
+    monitor.predict("wlan0", None)
+    assert announced == []
+    # likely to come up in the next window
+    monitor.predict("wlan0", LinkForecast(bandwidth=[500.0], availability=[0.8]))
+    assert announced == [("wlan0", 5000.0)]
+    # not announced again while the contact is ongoing
+    monitor.observe("wlan0", True, 500.0)
+    monitor.predict("wlan0", LinkForecast(bandwidth=[500.0], availability=[0.8]))
+    assert len(announced) == 2
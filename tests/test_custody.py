@@ -0,0 +1,87 @@
+import time
+from threading import Event
+from typing import List
+
+from adanet.queue import custody
+from adanet.queue.custody import Queue as CustodyQueue, Custody
+from adanet.sink.base import ISink
+
+
+def test_custody_until_acknowledged(fake_clock, monkeypatch, tmp_path):
+    monkeypatch.setattr(custody, "QUEUE_PATH", str(tmp_path))
+    now = fake_clock
+    queue: CustodyQueue = CustodyQueue("/sonar")
+    queue.put(b"a", origin_stamp=900.0)
+    queue.put(b"b")
+    assert queue.length == 2
+    first: Custody = queue.get(block=False)
+    second: Custody = queue.get(block=False)
+    assert (first.payload, first.origin_stamp) == (b"a", 900.0)
+    assert (second.payload, second.origin_stamp) == (b"b", 1000.0)
+    assert queue.get(block=False) is None
+    # both messages are still in custody
+    assert queue.backlog == 2
+    queue.ack(first.id)
+    assert queue.backlog == 1
+    # the next hop never acknowledged the second message, it goes out again
+    now[0] += 10
+    queue.expire(timeout=30)
+    assert queue.length == 0
+    now[0] += 30
+    queue.expire(timeout=30)
+    assert queue.length == 1
+    assert queue.get(block=False).payload == b"b"
+    assert queue.statistics["expired"] == 1
+
+
+def test_custody_survives_restart(monkeypatch, tmp_path):
+    monkeypatch.setattr(custody, "QUEUE_PATH", str(tmp_path))
+    queue: CustodyQueue = CustodyQueue("/sonar")
+    queue.put(b"a")
+    queue.put(b"b")
+    # 'a' is in flight when the relay goes down
+    assert queue.get(block=False).payload == b"a"
+    queue = CustodyQueue("/sonar")
+    assert queue.length == 2
+    assert [queue.get(block=False).payload for _ in range(2)] == [b"a", b"b"]
+
+
+class _BlockedSink(ISink):
+
+    def __init__(self, *args, **kwargs):
+        super(_BlockedSink, self).__init__(*args, **kwargs)
+        self.unblock: Event = Event()
+
+    def recv(self, data: bytes):
+        self.unblock.wait()
+        if data == b"bad":
+            raise ValueError("Cannot process this")
+
+
+def test_custody_kept_for_messages_the_sink_drops(monkeypatch, tmp_path):
+    monkeypatch.setattr(custody, "QUEUE_PATH", str(tmp_path))
+    # the previous hop's custody
+    upstream: CustodyQueue = CustodyQueue("/sonar")
+    for data in [b"a", b"b", b"c", b"d", b"bad", b"e"]:
+        upstream.put(data)
+    sink = _BlockedSink(name="/sonar", size=None, queue_size=2)
+    messages: List[Custody] = [upstream.get(block=False) for _ in range(6)]
+    sink.push(messages[0].payload, on_done=lambda: upstream.ack(messages[0].id))
+    # the sink blocks on the first message and overflows
+    stime: float = time.time()
+    while sink.backlog > 0 and time.time() - stime < 5:
+        time.sleep(0.01)
+    for m in messages[1:]:
+        sink.push(m.payload, on_done=lambda i=m.id: upstream.ack(i))
+    assert sink.dropped == 3
+    sink.unblock.set()
+    stime = time.time()
+    while (sink.backlog > 0 or upstream.backlog > 4) and time.time() - stime < 5:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    # only 'a' and 'e' made it through the sink, 'b', 'c' and 'd' were dropped and 'bad' failed
+    assert upstream.statistics["acked"] == 2
+    assert upstream.backlog == 4
+    upstream.expire(timeout=-1)
+    assert sorted(upstream.get(block=False).payload for _ in range(4)) == \
+        [b"b", b"bad", b"c", b"d"]
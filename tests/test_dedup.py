@@ -0,0 +1,48 @@
+from adanet.dedup import Deduplicator, Republisher
+
+
+def test_dedup_suppresses_repeats(fake_clock):
+    dedup: Deduplicator = Deduplicator()
+    assert not dedup.unchanged(b"idle")
+    assert dedup.unchanged(b"idle")
+    assert dedup.unchanged(b"idle")
+    assert not dedup.unchanged(b"busy")
+    assert not dedup.unchanged(b"idle")
+    stats = dedup.statistics
+    assert stats["suppressed"] == 2
+    assert stats["ratio"] == 2 / 5
+    assert stats["bytes_saved"] == 8
+
+
+def test_dedup_refreshes_after_window(fake_clock):
+    now = fake_clock
+    dedup: Deduplicator = Deduplicator(window=5.0)
+    assert not dedup.unchanged(b"config")
+    now[0] += 4
+    assert dedup.unchanged(b"config")
+    # the payload goes out in full once per window, in case the original was lost
+    now[0] += 2
+    assert not dedup.unchanged(b"config")
+    now[0] += 1
+    assert dedup.unchanged(b"config")
+
+
+def test_republisher_repeats_last_payload():
+    republisher: Republisher = Republisher()
+    republisher.received(b"idle")
+    assert republisher.resolve(Deduplicator.digest(b"idle")) == b"idle"
+    assert republisher.resolve(Deduplicator.digest(b"idle")) == b"idle"
+    assert republisher.statistics == {"republished": 2, "mismatched": 0}
+
+
+def test_republisher_lost_original():
+    republisher: Republisher = Republisher()
+    # nothing received yet
+    assert republisher.resolve(Deduplicator.digest(b"a")) is None
+    # 'a' is delivered, 'b' is lost, then the marker standing for 'b' comes
+    republisher.received(b"a")
+    assert republisher.resolve(Deduplicator.digest(b"b")) is None
+    assert republisher.statistics == {"republished": 0, "mismatched": 2}
+    # 'b' goes out in full again (see the window of the `Deduplicator`)
+    republisher.received(b"b")
+    assert republisher.resolve(Deduplicator.digest(b"b")) == b"b"
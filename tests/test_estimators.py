@@ -0,0 +1,69 @@
+import random
+
+from adanet.types.misc import IEstimator, EWMAEstimator, KalmanEstimator, QuantileWindow, \
+    estimators
+
+eps = 0.000001
+
+
+def _feed(estimator: IEstimator, values) -> IEstimator:
+    for v in values:
+        estimator.add(v)
+    return estimator
+
+
+def _noisy(mean: float, noise: float, n: int = 200, seed: int = 0):
+    rng = random.Random(seed)
+    return [mean + rng.uniform(-noise, noise) for _ in range(n)]
+
+
+def test_estimators_empty():
+    for Estimator in estimators.values():
+        estimator: IEstimator = Estimator()
+        assert estimator.count == 0
+        assert estimator.lower_bound() == 0
+
+
+def test_estimators_constant_signal():
+    for Estimator in estimators.values():
+        estimator: IEstimator = _feed(Estimator(), [100.0] * 50)
+        assert abs(estimator.mean - 100.0) <= eps
+        assert estimator.std <= eps
+        assert abs(estimator.lower_bound() - 100.0) <= eps
+        assert estimator.last == 100.0
+
+
+def test_estimators_noisy_signal():
+    for Estimator in estimators.values():
+        estimator: IEstimator = _feed(Estimator(), _noisy(1000.0, 200.0))
+        # the mean is close to the true value
+        assert abs(estimator.mean - 1000.0) <= 150.0
+        # the noise is detected
+        assert estimator.std > 0
+        # the lower bound is conservative
+        assert estimator.lower_bound() < estimator.mean
+
+
+def test_estimators_lower_bound_never_negative():
+    for Estimator in estimators.values():
+        estimator: IEstimator = _feed(Estimator(), [0.0, 1000.0] * 20)
+        assert estimator.lower_bound(z=10) >= 0
+
+
+def test_ewma_tracks_step():
+    estimator: IEstimator = _feed(EWMAEstimator(alpha=0.5), [0.0] * 10 + [100.0] * 20)
+    assert abs(estimator.mean - 100.0) <= 0.01
+
+
+def test_kalman_tracks_step():
+    estimator: IEstimator = _feed(KalmanEstimator(), [0.0] * 10 + [100.0] * 50)
+    assert abs(estimator.mean - 100.0) <= 1.0
+
+
+def test_quantile_window_lower_bound():
+    estimator: IEstimator = _feed(QuantileWindow(size=10, quantile=0.1), list(range(1, 11)))
+    assert estimator.lower_bound() == 1
+    assert abs(estimator.mean - 5.5) <= eps
+    # old samples leave the window
+    _feed(estimator, [50.0] * 10)
+    assert estimator.lower_bound() == 50.0
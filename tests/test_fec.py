@@ -0,0 +1,101 @@
+import random
+from typing import List
+
+from adanet.dedup import UNCHANGED_HEADER
+from adanet.fec import FECEncoder, FECDecoder
+from adanet.types.message import Message
+
+
+def _messages(n: int) -> List[Message]:
+    return [
+        Message(channel="/gps", stamp=float(i),
+                payload=bytes(random.getrandbits(8) for _ in range(random.randint(10, 100))))
+        for i in range(n)
+    ]
+
+
+def _encode(messages: List[Message], reliability: float) -> List[Message]:
+    encoder = FECEncoder()
+    encoded: List[Message] = []
+    for message in messages:
+        encoded += encoder.encode(message, reliability)
+    return encoded
+
+
+def test_fec_group_size():
+    assert FECEncoder.group_size_for(1.0) == 0
+    assert FECEncoder.group_size_for(0.9) == 4
+    assert FECEncoder.group_size_for(0.999) == 0
+    assert FECEncoder.group_size_for(0.98) == 16
+    assert FECEncoder.group_size_for(0.1) == 2
+
+
+def test_fec_reliable_link_passthrough():
+    messages: List[Message] = _messages(10)
+    assert _encode(messages, 1.0) == messages
+
+
+def test_fec_no_loss():
+    messages: List[Message] = _messages(8)
+    encoded: List[Message] = _encode(messages, 0.9)
+    # one parity message every 4 messages
+    assert len(encoded) == 10
+    decoder = FECDecoder()
+    received: List[Message] = []
+    for message in encoded:
+        received += decoder.decode(Message.deserialize(message.serialize()))
+    assert received == messages
+    assert decoder.recovered == 0
+
+
+def test_fec_recover_one_loss_per_group():
+    messages: List[Message] = _messages(8)
+    encoded: List[Message] = _encode(messages, 0.9)
+    decoder = FECDecoder()
+    received: List[Message] = []
+    # lose the 2nd message of the first group and the 4th of the second group
+    for i, message in enumerate(encoded):
+        if i in [1, 8]:
+            continue
+        received += decoder.decode(message)
+    assert decoder.recovered == 2
+    assert sorted(received, key=lambda m: m.stamp) == messages
+
+
+def test_fec_two_losses_per_group():
+    messages: List[Message] = _messages(4)
+    encoded: List[Message] = _encode(messages, 0.9)
+    decoder = FECDecoder()
+    received: List[Message] = []
+    for i, message in enumerate(encoded):
+        if i in [0, 1]:
+            continue
+        received += decoder.decode(message)
+    assert decoder.recovered == 0
+    assert received == messages[2:]
+
+
+def test_fec_recovered_message_keeps_headers():
+    encoder = FECEncoder()
+    decoder = FECDecoder()
+    k: int = FECEncoder.group_size_for(0.8)
+    sent: List[Message] = []
+    for i in range(k):
+        headers: dict = {"custody": {"key": "relay", "id": i}}
+        payload: bytes = bytes([i]) * 100
+        if i == 1:
+            # payload identical to the previous one, only a marker goes out
+            headers[UNCHANGED_HEADER] = True
+            payload = b""
+        sent += encoder.encode(Message(channel="/gps", stamp=float(i), payload=payload,
+                                       headers=headers), reliability=0.8)
+    # the marker is lost
+    received: List[Message] = []
+    for message in sent:
+        if message.headers["fec"]["index"] != 1:
+            received += decoder.decode(Message.deserialize(message.serialize()))
+    assert decoder.recovered == 1
+    recovered: Message = received[-1]
+    assert recovered.payload == b""
+    assert recovered.stamp == 1.0
+    assert recovered.headers == {"custody": {"key": "relay", "id": 1}, UNCHANGED_HEADER: True}
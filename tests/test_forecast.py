@@ -0,0 +1,69 @@
+import math
+from typing import Optional
+
+from adanet.forecast import LinkForecaster
+from adanet.types.problem import LinkForecast
+
+window = 4.0
+eps = 0.000001
+
+
+def _square(period: int, t: int) -> float:
+    return 100.0 if (t % period) < (period // 2) else 0.0
+
+
+def test_forecast_unknown_link():
+    forecaster = LinkForecaster(window=window)
+    assert forecaster.forecast("wlan0") is None
+
+
+def test_forecast_constant_link():
+    forecaster = LinkForecaster(window=window)
+    for t in range(20):
+        forecaster.observe("wlan0", 100.0, True, t=t * window)
+    forecast: Optional[LinkForecast] = forecaster.forecast("wlan0", horizon=5)
+    assert forecast.period is None
+    assert forecast.horizon == 5
+    assert all(abs(b - 100.0) <= eps for b in forecast.bandwidth)
+    assert all(abs(a - 1.0) <= eps for a in forecast.availability)
+
+
+def test_forecast_unavailable_link():
+    forecaster = LinkForecaster(window=window)
+    for t in range(20):
+        forecaster.observe("ppp0", 100.0, False, t=t * window)
+    forecast: Optional[LinkForecast] = forecaster.forecast("ppp0", horizon=3)
+    assert all(b == 0.0 for b in forecast.bandwidth)
+    assert all(a == 0.0 for a in forecast.availability)
+
+
+def test_forecast_periodic_link():
+    period: int = 10
+    forecaster = LinkForecaster(window=window)
+    # observe 4 periods, the last window observed is the last "off" window of a period
+    for t in range(4 * period):
+        bw: float = _square(period, t)
+        forecaster.observe("wlan0", bw, bw > 0, t=t * window)
+    forecast: Optional[LinkForecast] = forecaster.forecast("wlan0", horizon=2 * period)
+    assert forecast.period == period
+    # the next period starts with an "on" phase
+    expected = [_square(period, t) for t in range(4 * period, 6 * period)]
+    assert forecast.bandwidth == expected
+    assert forecast.availability == [float(v > 0) for v in expected]
+
+
+def test_forecast_sine_period():
+    forecaster = LinkForecaster(window=window)
+    for t in range(100):
+        forecaster.observe("ppp0", 256 * abs(math.sin(0.05 * t * window)), True, t=t * window)
+    forecast: Optional[LinkForecast] = forecaster.forecast("ppp0")
+    # period of |sin(0.05 t)| is pi / 0.05 secs, i.e., ~15.7 windows of 4 secs
+    assert forecast.period in [15, 16]
+
+
+def test_forecast_missing_windows_repeat_last_reading():
+    forecaster = LinkForecaster(window=window)
+    forecaster.observe("wlan0", 50.0, True, t=0)
+    forecaster.observe("wlan0", 50.0, True, t=10 * window)
+    forecast: Optional[LinkForecast] = forecaster.forecast("wlan0", horizon=1)
+    assert abs(forecast.bandwidth[0] - 50.0) <= eps
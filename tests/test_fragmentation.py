@@ -0,0 +1,117 @@
+import random
+from typing import List, Optional
+
+from adanet.fragmentation import FragmentSender, Defragmenter
+from adanet.types.message import Message
+
+mtu = 256
+
+
+def _message(size: int) -> Message:
+    payload: bytes = bytes(random.getrandbits(8) for _ in range(size))
+    return Message(channel="/sonar", stamp=0.0, payload=payload)
+
+
+def _deliver(sender: FragmentSender, defragmenter: Defragmenter,
+             lose: Optional[set] = None) -> List[Message]:
+    received: List[Message] = []
+    for fragment in sender.due():
+        if lose and fragment.headers["fragment"]["index"] in lose:
+            continue
+        message, ack = defragmenter.add(Message.deserialize(fragment.serialize()))
+        sender.ack(ack.data["id"], ack.data["received"])
+        if message is not None:
+            received.append(message)
+    return received
+
+
+def test_fragmentation_fragments_fit_mtu():
+    message: Message = _message(5000)
+    fragments: List[Message] = FragmentSender.split(message, mtu)
+    assert len(fragments) > 5000 // mtu
+    assert all(len(f.serialize()) <= mtu for f in fragments)
+    assert b"".join(f.payload for f in fragments) == message.payload
+
+
+def test_fragmentation_window():
+    sender = FragmentSender(window=4)
+    sender.push(_message(5000), mtu)
+    assert len(sender.due()) == 4
+    # nothing acknowledged yet
+    assert len(sender.due()) == 0
+
+
+def test_fragmentation_reassembly():
+    message: Message = _message(5000)
+    sender = FragmentSender(window=4)
+    defragmenter = Defragmenter()
+    sender.push(message, mtu)
+    received: List[Message] = []
+    while sender.pending:
+        received += _deliver(sender, defragmenter)
+    assert len(received) == 1
+    assert received[0].payload == message.payload
+    assert received[0].headers == {}
+    assert defragmenter.pending == 0
+
+
+def test_fragmentation_resume_after_reconnect():
+    message: Message = _message(5000)
+    sender = FragmentSender(window=4)
+    defragmenter = Defragmenter()
+    sender.push(message, mtu)
+    _deliver(sender, defragmenter)
+    # the link goes down while the fragments 4 to 7 are in flight
+    sender.due()
+    sender.rewind()
+    # transfer resumes from the first fragment not received
+    assert [f.headers["fragment"]["index"] for f in sender.due()] == [4, 5, 6, 7]
+    sender.rewind()
+    received: List[Message] = []
+    while sender.pending:
+        received += _deliver(sender, defragmenter)
+    assert received[0].payload == message.payload
+    assert sender.statistics["sent"] == len(FragmentSender.split(message, mtu)) + 8
+
+
+def test_fragmentation_retransmit_lost_fragment():
+    message: Message = _message(2000)
+    sender = FragmentSender(window=4, retransmit_after=-1)
+    defragmenter = Defragmenter()
+    sender.push(message, mtu)
+    # fragment 1 is lost the first time
+    received: List[Message] = _deliver(sender, defragmenter, lose={1})
+    while sender.pending:
+        received += _deliver(sender, defragmenter)
+    assert len(received) == 1
+    assert received[0].payload == message.payload
+    assert sender.statistics["retransmitted"] > 0
+
+
+def test_fragmentation_reassembly_memory_budget():
+    defragmenter = Defragmenter(memory=1000)
+    for _ in range(3):
+        fragments: List[Message] = FragmentSender.split(_message(5000), mtu)
+        for fragment in fragments[:8]:
+            defragmenter.add(fragment)
+    assert defragmenter.statistics["reassembly/memory"] <= 8 * mtu
+    assert defragmenter.statistics["reassembly/evicted"] == 2
+    assert defragmenter.pending == 1
+
+
+def test_fragmentation_recover_from_receiver_eviction():
+    message: Message = _message(5000)
+    sender = FragmentSender(window=4)
+    sender.push(message, mtu)
+    _deliver(sender, Defragmenter())
+    # the receiver evicts the partial transfer, the fragments received so far are lost
+    defragmenter = Defragmenter()
+    received: List[Message] = []
+    for _ in range(50):
+        if not sender.pending:
+            break
+        received += _deliver(sender, defragmenter)
+    assert sender.pending == 0
+    assert len(received) == 1
+    assert received[0].payload == message.payload
+    assert sender.statistics["retransmitted"] > 0
@@ -0,0 +1,55 @@
+from typing import List
+
+from adanet.networking.outbox import Outbox
+
+
+def _drain(outbox: Outbox) -> List[bytes]:
+    out: List[bytes] = []
+    while outbox.peek() is not None:
+        out.append(outbox.pop())
+    return out
+
+
+def test_outbox_priority_order(fake_clock):
+    outbox = Outbox(size=10, aging=2.0)
+    outbox.put(b"bulk-1", 0)
+    outbox.put(b"bulk-2", 0)
+    outbox.put(b"telemetry-1", 5)
+    outbox.put(b"telemetry-2", 5)
+    outbox.put(b"status", 1)
+    assert _drain(outbox) == [b"telemetry-1", b"telemetry-2", b"status", b"bulk-1", b"bulk-2"]
+
+
+def test_outbox_aging(fake_clock):
+    now = fake_clock
+    outbox = Outbox(size=10, aging=2.0)
+    outbox.put(b"bulk", 0)
+    # after 6 seconds the bulk frame is worth priority 3
+    now[0] += 6.0
+    outbox.put(b"priority-2", 2)
+    outbox.put(b"priority-4", 4)
+    assert _drain(outbox) == [b"priority-4", b"bulk", b"priority-2"]
+
+
+def test_outbox_drops_lowest_priority(fake_clock):
+    outbox = Outbox(size=2, aging=2.0)
+    outbox.put(b"bulk-1", 0)
+    outbox.put(b"telemetry", 5)
+    outbox.put(b"bulk-2", 0)
+    assert outbox.statistics["priority/0/dropped"] == 1
+    assert _drain(outbox) == [b"telemetry", b"bulk-1"]
+
+
+def test_outbox_latency(fake_clock):
+    now = fake_clock
+    outbox = Outbox(size=10, aging=2.0)
+    outbox.put(b"bulk", 0)
+    outbox.put(b"telemetry", 5)
+    now[0] += 1.0
+    outbox.pop()
+    now[0] += 1.0
+    outbox.pop()
+    stats = outbox.statistics
+    assert stats["priority/5/latency"] == 1.0
+    assert stats["priority/0/latency"] == 2.0
+    assert stats["length"] == 0
@@ -0,0 +1,60 @@
+import cbor2
+import pytest
+
+from adanet.projection import Projection
+
+
+def _navsatfix() -> dict:
+    return {
+        "header": {"seq": 12, "stamp": {"secs": 1700000000, "nsecs": 123456789}, "frame_id": "gps"},
+        "status": {"status": 0, "service": 1},
+        "latitude": 41.52401234,
+        "longitude": -70.67123456,
+        "altitude": 2.5,
+        "position_covariance": [0.1] * 9,
+        "position_covariance_type": 2,
+    }
+
+
+def test_projection_keeps_whitelisted_fields():
+    projection: Projection = Projection(fields=["header.stamp", "latitude", "longitude"])
+    data: dict = projection.apply(_navsatfix())
+    assert data == {
+        "header": {"stamp": {"secs": 1700000000, "nsecs": 123456789}},
+        "latitude": 41.52401234,
+        "longitude": -70.67123456,
+    }
+
+
+def test_projection_through_arrays():
+    projection: Projection = Projection(fields=["poses.position.x"],
+                                        quantize={"poses.position.x": {"fixed": 0.01}})
+    data: dict = {"poses": [{"position": {"x": 1.234, "y": 2.0}, "orientation": {}}] * 2}
+    assert projection.apply(data) == {"poses": [{"position": {"x": 123}}] * 2}
+
+
+def test_quantization_round_trip():
+    projection: Projection = Projection(quantize={
+        "latitude": {"fixed": 1e-7},
+        "longitude": {"fixed": 1e-7},
+        "altitude": "float16",
+        "position_covariance": "float16",
+        "header.stamp": {"time": 0.01},
+    })
+    full: bytes = cbor2.dumps(_navsatfix())
+    quantized: bytes = cbor2.dumps(projection.apply(_navsatfix()), canonical=True)
+    assert len(quantized) < len(full)
+    data: dict = projection.invert(cbor2.loads(quantized))
+    assert abs(data["latitude"] - 41.52401234) < 1e-7
+    assert abs(data["longitude"] + 70.67123456) < 1e-7
+    assert data["altitude"] == 2.5
+    assert all(abs(v - 0.1) < 1e-3 for v in data["position_covariance"])
+    assert data["header"]["stamp"] == {"secs": 1700000000, "nsecs": 120000000}
+    assert data["header"]["frame_id"] == "gps"
+
+
+def test_projection_from_arguments():
+    assert Projection.from_arguments({"message_type": "sensor_msgs/NavSatFix"}) is None
+    assert Projection.from_arguments({"fields": ["latitude"]}) is not None
+    with pytest.raises(ValueError):
+        Projection.from_arguments({"quantize": {"latitude": "int4"}})
@@ -0,0 +1,172 @@
+import multiprocessing
+import os
+import threading
+import time
+from typing import List
+
+from adanet.queue.base import QueueType, QueueDurability
+from adanet.queue.lazy import Queue as LazyQueue
+from adanet.queue.ring import Queue as RingQueue
+from adanet.queue import sqlite, tiered
+from adanet.queue.tiered import Queue as TieredQueue
+
+
+def test_lazy_queue_take():
+    queue: LazyQueue = LazyQueue(QueueType.CACHE, "/gps")
+    assert queue.get(block=False) is None
+    queue.put(b"a")
+    assert queue.length == 1
+    # a message can only be taken once
+    assert queue.get(block=False) == b"a"
+    assert queue.length == 0
+    assert queue.get(block=False) is None
+
+
+def test_lazy_queue_evicts_unsent():
+    evicted: List[bytes] = []
+    queue: LazyQueue = LazyQueue(QueueType.CACHE, "/gps")
+    queue.on_evict(evicted.append)
+    queue.put(b"a")
+    queue.put(b"b")
+    # 'a' was never sent, it is handed over
+    assert evicted == [b"a"]
+    assert queue.get() == b"b"
+    # 'b' was sent, nothing to hand over
+    queue.put(b"c")
+    assert evicted == [b"a"]
+
+
+def test_ring_queue_fifo():
+    queue: RingQueue = RingQueue(QueueType.CACHE, "/gps", 3)
+    assert queue.get(block=False) is None
+    for data in [b"a", b"b"]:
+        queue.put(data)
+    assert queue.get(block=False) == b"a"
+    # wraps around the end of the slots
+    for data in [b"c", b"d"]:
+        queue.put(data)
+    assert queue.length == 3
+    assert [queue.get(block=False) for _ in range(4)] == [b"b", b"c", b"d", None]
+
+
+def test_ring_queue_lifo():
+    queue: RingQueue = RingQueue(QueueType.CACHE, "/gps", 3, lifo=True)
+    for data in [b"a", b"b", b"c", b"d"]:
+        queue.put(data)
+    assert [queue.get(block=False) for _ in range(4)] == [b"d", b"c", b"b", None]
+
+
+def test_ring_queue_evicts_oldest():
+    evicted: List[bytes] = []
+    queue: RingQueue = RingQueue(QueueType.CACHE, "/gps", 2)
+    queue.on_evict(evicted.append)
+    for data in [b"a", b"b", b"c", b"d"]:
+        queue.put(data)
+    assert evicted == [b"a", b"b"]
+    assert queue.length == 2
+
+
+def test_ring_queue_blocking_get():
+    queue: RingQueue = RingQueue(QueueType.CACHE, "/gps", 2)
+    assert queue.get(block=True, timeout=0.01) is None
+    threading.Timer(0.05, queue.put, args=(b"a",)).start()
+    assert queue.get(block=True, timeout=5) == b"a"
+
+
+def _tiered_queue(monkeypatch, tmp_path, max_size: int = -1) -> TieredQueue:
+    monkeypatch.setattr(tiered, "QUEUE_PATH", str(tmp_path))
+    # room for 4 messages of 10 bytes in memory, 2 per segment
+    return TieredQueue(QueueType.CACHE, "/gps", max_size, memory_bytes=40, segment_bytes=28)
+
+
+def test_tiered_queue_spills_and_reloads(monkeypatch, tmp_path):
+    queue: TieredQueue = _tiered_queue(monkeypatch, tmp_path)
+    messages: List[bytes] = [b"%010d" % i for i in range(10)]
+    for data in messages:
+        queue.put(data)
+    assert queue.length == 10
+    assert queue.statistics["memory"] == 40
+    assert queue.statistics["disk"] == 60
+    assert queue.statistics["spilled"] == 6
+    # messages come back in order, across memory and disk
+    assert [queue.get(block=False) for _ in range(5)] == messages[:5]
+    # new messages go after the ones on disk
+    queue.put(b"x" * 10)
+    assert [queue.get(block=False) for _ in range(7)] == messages[5:] + [b"x" * 10, None]
+    # the 3 segments spilled at first, then the one holding the last message
+    assert queue.statistics["reloads"] == 4
+    assert queue.statistics["disk"] == 0
+
+
+def test_tiered_queue_evicts_oldest(monkeypatch, tmp_path):
+    evicted: List[bytes] = []
+    queue: TieredQueue = _tiered_queue(monkeypatch, tmp_path, max_size=6)
+    queue.on_evict(evicted.append)
+    messages: List[bytes] = [b"%010d" % i for i in range(8)]
+    for data in messages:
+        queue.put(data)
+    assert evicted == messages[:2]
+    assert [queue.get(block=False) for _ in range(6)] == messages[2:]
+
+
+def test_tiered_queues_share_channel(monkeypatch, tmp_path):
+    first: TieredQueue = _tiered_queue(monkeypatch, tmp_path)
+    for i in range(10):
+        first.put(b"a%09d" % i)
+    # another instance for the same channel does not touch what the first one spilled
+    second: TieredQueue = _tiered_queue(monkeypatch, tmp_path)
+    for i in range(10):
+        second.put(b"b%09d" % i)
+    assert [first.get(block=False) for _ in range(10)] == [b"a%09d" % i for i in range(10)]
+    assert [second.get(block=False) for _ in range(10)] == [b"b%09d" % i for i in range(10)]
+
+
+def test_tiered_queue_discards_leftovers(monkeypatch, tmp_path, capsys):
+    spill = tmp_path / "cache" / "gps" / "spill"
+    # left by a process that is gone, and by one that is still running
+    gone = spill / "999999999-0"
+    running = spill / f"{os.getppid()}-0"
+    for leftover in [gone, running]:
+        leftover.mkdir(parents=True)
+        (leftover / "000000000000.seg").write_bytes(b"\x00" * 14)
+    _tiered_queue(monkeypatch, tmp_path)
+    assert not gone.exists()
+    assert running.exists()
+    assert "Discarding 1 segment(s) (14 bytes)" in capsys.readouterr().out
+
+
+def _sqlite_queue(monkeypatch, tmp_path) -> sqlite.Queue:
+    monkeypatch.setattr(sqlite, "QUEUE_PATH", str(tmp_path))
+    # pending operations are committed by the queues themselves, keep the event loop down
+    monkeypatch.setattr(sqlite.flusher, "add", lambda _: None)
+    return sqlite.Queue(QueueType.PERSISTENT, "/gps", -1, durability=QueueDurability.BATCH)
+
+
+def _write(tmp_path, number: int):
+    queue: sqlite.Queue = sqlite.Queue(QueueType.PERSISTENT, "/gps", -1,
+                                       durability=QueueDurability.BATCH)
+    for i in range(number):
+        queue.put(b"%010d" % i)
+        # give the reader a chance to read in between
+        time.sleep(0.0002)
+    queue.flush()
+
+
+def test_sqlite_queue_two_processes(monkeypatch, tmp_path):
+    number: int = 3000
+    # the reader polls what another process writes, as a DiskSource reading from a DiskSink
+    reader: sqlite.Queue = _sqlite_queue(monkeypatch, tmp_path)
+    writer = multiprocessing.get_context("fork").Process(target=_write, args=(tmp_path, number))
+    writer.start()
+    received: List[bytes] = []
+    deadline: float = time.time() + 60
+    while len(received) < number and time.time() < deadline:
+        data: bytes = reader.get(block=False)
+        if data is None:
+            time.sleep(0.001)
+            continue
+        received.append(data)
+    writer.join()
+    assert writer.exitcode == 0
+    assert received == [b"%010d" % i for i in range(number)]
+    assert reader.length == 0
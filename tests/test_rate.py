@@ -0,0 +1,70 @@
+from adanet.networking.rate import FeedbackCollector, RateController
+from adanet.types.misc import TokenBucket
+
+eps = 0.000001
+
+
+def _feedback(rate: float, loss: float = 0.0, delay_gradient: float = 0.0) -> dict:
+    return {"rate": rate, "loss": loss, "delay_gradient": delay_gradient, "received": 10}
+
+
+def test_token_bucket(fake_clock):
+    now = fake_clock
+    bucket = TokenBucket(rate=100, burst=50)
+    assert bucket.consume(50)
+    assert not bucket.consume(10)
+    now[0] += 0.1
+    assert bucket.consume(10)
+    assert not bucket.consume(10)
+    # refill is capped by the burst size
+    now[0] += 10
+    assert abs(bucket.tokens - 50) <= eps
+    # requests bigger than the burst go through when the bucket is full and leave it in debt
+    assert bucket.consume(200)
+    now[0] += 1
+    assert not bucket.allows(1)
+
+
+def test_token_bucket_unlimited():
+    bucket = TokenBucket()
+    assert bucket.consume(10 ** 9)
+
+
+def test_feedback_collector(fake_clock):
+    now = fake_clock
+    collector = FeedbackCollector()
+    # frames 2 and 5 are lost, the delay grows by 0.1 secs every 0.1 secs
+    for i, seq in enumerate([0, 1, 3, 4, 6, 7, 8, 9]):
+        now[0] += 0.1
+        collector.add(100, seq, now[0] - 0.5 - 0.1 * i)
+    feedback: dict = collector.collect()
+    assert abs(feedback["rate"] - 1000) <= eps
+    assert abs(feedback["loss"] - 0.2) <= eps
+    assert abs(feedback["delay_gradient"] - 1.0) <= eps
+    # nothing else received
+    assert collector.collect() is None
+
+
+def test_rate_controller_aimd():
+    controller = RateController()
+    # no congestion, no cap
+    controller.update(_feedback(1000))
+    assert controller.rate is None
+    assert controller.bucket.rate is None
+    # losses, multiplicative decrease
+    controller.update(_feedback(1000, loss=0.1))
+    assert controller.is_congested
+    assert abs(controller.rate - 850) <= eps
+    # growing delay, multiplicative decrease
+    controller.update(_feedback(850, delay_gradient=0.5))
+    assert abs(controller.rate - 850 * 0.85) <= eps
+    # no congestion, additive increase
+    rate: float = controller.rate
+    controller.update(_feedback(rate))
+    assert controller.rate > rate
+    assert not controller.is_congested
+    assert controller.bucket.rate == controller.rate
+    # the sender is not using the rate it has, no increase
+    rate: float = controller.rate
+    controller.update(_feedback(rate * 0.1))
+    assert controller.rate == rate
@@ -0,0 +1,94 @@
+import time
+from threading import Event, Thread
+from typing import List
+
+from adanet.sink import disk
+from adanet.sink.base import ISink
+
+
+class _BlockedSink(ISink):
+
+    def __init__(self, *args, **kwargs):
+        super(_BlockedSink, self).__init__(*args, **kwargs)
+        self.unblock: Event = Event()
+        self.received: List[bytes] = []
+
+    def recv(self, data: bytes):
+        self.unblock.wait()
+        self.received.append(data)
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    stime: float = time.time()
+    while not condition() and time.time() - stime < timeout:
+        time.sleep(0.01)
+
+
+def test_sink_backlog_and_drops():
+    sink = _BlockedSink(name="/gps", size=None, queue_size=4)
+    sink.push(bytes([0]))
+    # the worker takes the first message and blocks on it
+    _wait_for(lambda: sink.backlog == 0)
+    for i in range(1, 10):
+        sink.push(bytes([i]))
+    assert sink.backlog == 4
+    assert sink.dropped == 5
+    assert sink.statistics["capacity"] == 4
+    sink.unblock.set()
+    _wait_for(lambda: sink.backlog == 0 and len(sink.received) == 5)
+    # the oldest messages were dropped
+    assert sink.received == [bytes([i]) for i in [0, 6, 7, 8, 9]]
+    assert sink.throughput > 0
+    # messages waited for the sink to be unblocked
+    assert sink.lag > 0
+
+
+class _Store:
+
+    def __init__(self):
+        self.messages: List[bytes] = []
+        self.unblock: Event = Event()
+
+        # number of messages committed
+        self.committed: int = 0
+
+    def put(self, data: bytes):
+        self.unblock.wait()
+        self.messages.append(data)
+
+    def flush(self):
+        self.committed = len(self.messages)
+
+
+def test_disk_sink_never_drops(monkeypatch):
+    store: _Store = _Store()
+    monkeypatch.setattr(disk, "make_persistent_queue", lambda *_, **__: store)
+    sink = disk.DiskSink(name="/gps", size=None, queue_size=2)
+    # the disk is slow, pushes do not wait for it (they come from the adapter's inbox)
+    pushing: Thread = Thread(target=lambda: [sink.push(bytes([i])) for i in range(10)])
+    pushing.start()
+    pushing.join(timeout=1)
+    assert not pushing.is_alive()
+    assert store.messages == []
+    # the backlog grows past the inbox, the source is told to slow down instead of dropping
+    _wait_for(lambda: sink.backlog == 9)
+    assert sink.backlog == 9
+    assert sink.statistics["backlog"] / sink.statistics["capacity"] > 1
+    store.unblock.set()
+    _wait_for(lambda: len(store.messages) == 10)
+    assert store.messages == [bytes([i]) for i in range(10)]
+    assert sink.dropped == 0
+    assert sink.backlog == 0
+
+
+def test_disk_sink_commits_before_done(monkeypatch):
+    store: _Store = _Store()
+    store.unblock.set()
+    monkeypatch.setattr(disk, "make_persistent_queue", lambda *_, **__: store)
+    sink = disk.DiskSink(name="/gps", size=None)
+    # e.g., custody is acknowledged to the previous hop, the message has to be on disk by then
+    committed: List[int] = []
+    for i in range(3):
+        sink.push(bytes([i]), on_done=lambda: committed.append(store.committed))
+    _wait_for(lambda: len(committed) == 3)
+    assert committed == [1, 2, 3]
@@ -4,8 +4,8 @@ from typing import Dict, Iterator
 import yaml
 
 from adanet.constants import FORMULATE_PROBLEM_EVERY_SEC
-from adanet.solver import AbsSolver, SimpleSolver
-from adanet.types.problem import Problem, Link, LatencyPolicy
+from adanet.solver import AbsSolver, SimpleSolver, RecedingHorizonSolver
+from adanet.types.problem import Problem, Link, LatencyPolicy, LinkForecast
 from adanet.types.solution import Solution
 from adanet.utils import infinite_iterator
 
@@ -13,6 +13,7 @@ problems_fpath = "/data/tests/"
 
 
 simple_solver: AbsSolver = SimpleSolver()
+mpc_solver: AbsSolver = RecedingHorizonSolver(horizon=4)
 
 
 def _load_problem(name: str) -> Problem:
@@ -141,3 +142,129 @@ def test_simplesolver_wifi_acoustic_1():
     _ensure_feasibility(problem, solution)
     # known solution
     # TODO: update this unit problem
+
+
+def _contact_problem(contact_in: int, backlog: int) -> Problem:
+    # a slow acoustic link is always available, a wifi contact is forecasted in `contact_in`
+    # windows from now
+    problem: Problem = Problem.parse_obj({
+        "links": [
+            {"interface": "ppp0", "type": "acoustic"},
+            {"interface": "wlan0", "type": "wifi-2.4", "bandwidth": 0},
+        ],
+        "channels": [
+            {"name": "/backlog", "kind": "disk", "size": 10, "queue_length": backlog},
+        ],
+    })
+    for link in problem.links:
+        link.forecast = LinkForecast(
+            bandwidth=[link.bandwidth] * 8,
+            availability=[1.0] * 8,
+        )
+    wifi: Link = problem.links[1]
+    wifi.forecast.bandwidth[contact_in - 1] = 1024 * 1024
+    return problem
+
+
+def test_simplesolver_lossy_link():
+    problem: Problem = Problem.parse_obj({
+        "links": [{"interface": "ppp0", "bandwidth": 100, "reliability": 0.5}],
+        "channels": [{"name": "/gps", "frequency": 20.0, "size": 10}],
+    })
+    solution: Solution = simple_solver.solve(problem)
+    # the solver plans on the goodput of the link (50 B/s), i.e., 5 packets/sec
+    assert solution.assignments[0].frequency == 5.0
+
+
+def test_mpcsolver_no_links():
+    problem: Problem = _load_problem("no-links.yaml")
+    solution: Solution = mpc_solver.solve(problem)
+    # make sure solution is feasible and respects the problem's constraints
+    _ensure_feasibility(problem, solution)
+    # known solution
+    for c in solution.assignments:
+        assert c.interfaces == []
+
+
+def test_mpcsolver_no_channels():
+    problem: Problem = _load_problem("no-channels.yaml")
+    solution: Solution = mpc_solver.solve(problem)
+    # make sure solution is feasible and respects the problem's constraints
+    _ensure_feasibility(problem, solution)
+    # known solution
+    assert solution.assignments == []
+
+
+def test_mpcsolver_two_wifis_two_channels():
+    problem: Problem = _load_problem("two-wifis-two-channels.yaml")
+    solution: Solution = mpc_solver.solve(problem)
+    # make sure solution is feasible and respects the problem's constraints
+    _ensure_feasibility(problem, solution)
+    # known solution, channels split the wifi links and alternate between the two
+    for c in solution.assignments:
+        assert c.interfaces == ["wlan0", "wlan1"]
+        assert c.frequency == c.problem.frequency
+
+
+def test_mpcsolver_two_wifis_one_metered_paced():
+    problem: Problem = _load_problem("two-wifis-one-metered.yaml")
+    solution: Solution = mpc_solver.solve(problem)
+    # make sure solution is feasible and respects the problem's constraints
+    _ensure_feasibility(problem, solution)
+    # known solution: the budget of the metered link has to last for an hour, there is enough
+    # unmetered bandwidth, the metered link is not used
+    for c in solution.assignments:
+        assert c.interfaces == ["wlan1"]
+        assert c.frequency == c.problem.frequency
+
+
+def test_mpcsolver_two_wifis_one_metered_unpaced():
+    solver: AbsSolver = RecedingHorizonSolver(horizon=4, budget_horizon=0)
+    problem: Problem = _load_problem("two-wifis-one-metered.yaml")
+    solution: Solution = solver.solve(problem)
+    # make sure solution is feasible and respects the problem's constraints
+    _ensure_feasibility(problem, solution)
+    # known solution: the budget can be spent right away, wlan1 is used first as it is
+    # unmetered, live traffic does not need wlan0
+    assert solution.assignments[0].frequency == problem.channels[0].frequency
+    assert solution.assignments[1].frequency == problem.channels[1].frequency
+    assert "wlan0" not in solution.assignments[0].interfaces
+
+
+def test_mpcsolver_backlog_waits_for_contact():
+    problem: Problem = _contact_problem(contact_in=2, backlog=1000)
+    solution: Solution = mpc_solver.solve(problem)
+    # known solution: the whole backlog fits the upcoming wifi contact, nothing is trickled
+    # over the acoustic link
+    assert solution.assignments[0].frequency == 0
+    assert solution.assignments[0].interfaces == []
+
+
+def test_mpcsolver_backlog_without_contact():
+    problem: Problem = _contact_problem(contact_in=2, backlog=1000)
+    problem.links[1].forecast.bandwidth = [0] * 8
+    solution: Solution = mpc_solver.solve(problem)
+    # known solution: no contact is coming, the backlog is trickled over the acoustic link
+    assert solution.assignments[0].frequency > 0
+    assert solution.assignments[0].interfaces == ["ppp0"]
+
+
+def test_simplesolver_cached_lanes_last():
+    problem: Problem = Problem.parse_obj({
+        "links": [{"interface": "wlan0", "bandwidth": 100, "latency": 0.01}],
+        "channels": [
+            {"name": "/gps", "priority": 10, "frequency": 5.0, "size": 10},
+            {"name": "/imu", "priority": 0, "frequency": 5.0, "size": 10},
+        ],
+    })
+    problem.categorize_channels()
+    assert [c.name for c in problem.channels] == \
+           ["live/gps", "live/imu", "cached/gps", "cached/imu"]
+    # lots of backlog on the highest priority channel
+    problem.channels[2].queue_length = 1000
+    solution: Solution = simple_solver.solve(problem)
+    frequencies: Dict[str, float] = {c.name: c.frequency for c in solution.assignments}
+    # the live lanes take the whole link, the backlog only gets what is left
+    assert frequencies["live/gps"] == 5.0
+    assert frequencies["live/imu"] == 5.0
+    assert frequencies["cached/gps"] == 0.0
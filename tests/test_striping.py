@@ -0,0 +1,55 @@
+import random
+from typing import Dict, List, Tuple
+
+from adanet.striping import Striper, StripeReassembler
+from adanet.types.message import Message
+
+eps = 0.000001
+
+
+def _message(size: int) -> Message:
+    payload: bytes = bytes(random.getrandbits(8) for _ in range(size))
+    return Message(channel="/camera", stamp=0.0, payload=payload)
+
+
+def test_striping_split_proportional():
+    message: Message = _message(100 * 1024)
+    chunks, completion = Striper.split(message, {"wlan0": 3000.0, "ppp0": 1000.0},
+                                       chunk_size=1024)
+    assert len(chunks) == 100
+    per_iface: Dict[str, int] = {"wlan0": 0, "ppp0": 0}
+    for iface, chunk in chunks:
+        per_iface[iface] += len(chunk.payload)
+    assert per_iface["wlan0"] == 75 * 1024
+    assert per_iface["ppp0"] == 25 * 1024
+    assert abs(completion - 75 * 1024 / 3000.0) <= eps
+
+
+def test_striping_reassemble_out_of_order():
+    message: Message = _message(10 * 1024 + 17)
+    chunks: List[Tuple[str, Message]]
+    chunks, _ = Striper.split(message, {"wlan0": 1000.0, "ppp0": 1000.0}, chunk_size=1024)
+    assert len(chunks) == 11
+    random.shuffle(chunks)
+    reassembler = StripeReassembler()
+    out, stats = None, None
+    for i, (_, chunk) in enumerate(chunks):
+        # chunks survive serialization
+        out, stats = reassembler.add(Message.deserialize(chunk.serialize()))
+        if i < len(chunks) - 1:
+            assert out is None
+    assert out.payload == message.payload
+    assert out.headers == {}
+    assert stats["chunks"] == 11
+    assert reassembler.pending == 0
+
+
+def test_striping_reassembly_timeout():
+    reassembler = StripeReassembler(timeout=-1)
+    chunks, _ = Striper.split(_message(4096), {"wlan0": 1000.0}, chunk_size=1024)
+    reassembler.add(chunks[0][1])
+    assert reassembler.pending == 1
+    chunks, _ = Striper.split(_message(4096), {"wlan0": 1000.0}, chunk_size=1024)
+    reassembler.add(chunks[0][1])
+    assert reassembler.dropped == 1
+    assert reassembler.pending == 1
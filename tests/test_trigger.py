@@ -0,0 +1,99 @@
+from adanet.time import Clock
+from adanet.trigger import SolveTrigger, Snapshot
+
+
+def _snapshot(connected: bool = True, bandwidth: float = 1000.0, queue: int = 0) -> Snapshot:
+    return Snapshot(links={"wlan0": (connected, bandwidth)}, queues={"/gps": queue})
+
+
+def _solve(trigger: SolveTrigger, snapshot: Snapshot):
+    trigger.solved(snapshot, since=Clock.time())
+
+
+def test_trigger_first_solution_right_away(fake_clock):
+    trigger: SolveTrigger = SolveTrigger(spacing=0.5, fallback=30)
+    assert trigger.due()[1] == "periodic"
+
+
+def test_trigger_periodic_fallback(fake_clock):
+    now = fake_clock
+    trigger: SolveTrigger = SolveTrigger(spacing=0.5, fallback=30)
+    _solve(trigger, _snapshot())
+    # nothing changes
+    for _ in range(29):
+        now[0] += 1
+        trigger.observe(_snapshot(bandwidth=1100.0, queue=5))
+        assert trigger.due() is None
+    now[0] += 1
+    assert trigger.due()[1] == "periodic"
+
+
+def test_trigger_link_events(fake_clock):
+    now = fake_clock
+    trigger: SolveTrigger = SolveTrigger(spacing=0.5, fallback=30)
+    _solve(trigger, _snapshot())
+    now[0] += 2
+    trigger.observe(_snapshot(connected=False))
+    now[0] += 0.1
+    event_time, reason = trigger.due()
+    assert reason == "link/disconnected"
+    # reaction time is measured from the event
+    assert abs(now[0] - event_time - 0.1) <= 0.000001
+    _solve(trigger, _snapshot(connected=False))
+    assert trigger.due() is None
+    # big bandwidth change
+    now[0] += 2
+    trigger.observe(_snapshot(connected=False, bandwidth=100.0))
+    assert trigger.due()[1] == "link/bandwidth"
+
+
+def test_trigger_queue_growth(fake_clock):
+    now = fake_clock
+    trigger: SolveTrigger = SolveTrigger(spacing=0.5, fallback=30, queue_growth=10)
+    _solve(trigger, _snapshot())
+    now[0] += 2
+    trigger.observe(_snapshot(queue=9))
+    assert trigger.due() is None
+    trigger.observe(_snapshot(queue=10))
+    assert trigger.due()[1] == "channel/queue"
+
+
+def test_trigger_min_spacing(fake_clock):
+    now = fake_clock
+    trigger: SolveTrigger = SolveTrigger(spacing=0.5, fallback=30)
+    _solve(trigger, _snapshot())
+    trigger.notify("link/lost")
+    assert trigger.due() is None
+    now[0] += 0.5
+    assert trigger.due()[1] == "link/lost"
+
+
+def test_trigger_events_while_solving(fake_clock):
+    now = fake_clock
+    trigger: SolveTrigger = SolveTrigger(spacing=0.5, fallback=30)
+    since: float = now[0]
+    now[0] += 0.2
+    # the event happens after the state was captured, it is not served by this solution
+    trigger.notify("link/new")
+    trigger.solved(_snapshot(), since=since)
+    now[0] += 0.5
+    assert trigger.due()[1] == "link/new"
+
+
+def test_trigger_budget_spent(fake_clock):
+    now = fake_clock
+    trigger: SolveTrigger = SolveTrigger(spacing=0.5, fallback=30, budget_window=4)
+    _solve(trigger, Snapshot(links={"lte0": (True, 1000.0)}, spent={"lte0": 100}))
+    # spending within the window the solution planned for
+    now[0] += 3
+    trigger.observe(Snapshot(links={"lte0": (True, 1000.0)}, spent={"lte0": 5000}))
+    assert trigger.due() is None
+    # the solution would keep spending past its window
+    now[0] += 1
+    trigger.observe(Snapshot(links={"lte0": (True, 1000.0)}, spent={"lte0": 9000}))
+    assert trigger.due()[1] == "link/budget"
+    # a metered link that is not spending does not need a new solution
+    _solve(trigger, Snapshot(links={"lte0": (True, 1000.0)}, spent={"lte0": 9000}))
+    now[0] += 10
+    trigger.observe(Snapshot(links={"lte0": (True, 1000.0)}, spent={"lte0": 9000}))
+    assert trigger.due() is None
@@ -0,0 +1,61 @@
+import time
+from threading import Event
+from typing import List
+
+from adanet.workers import WorkerPool, Lane
+
+
+def _wait(condition, timeout: float = 5.0):
+    stime: float = time.time()
+    while not condition() and time.time() - stime < timeout:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_workers_lane_in_order():
+    pool: WorkerPool = WorkerPool(size=4)
+    handled: List[int] = []
+    lane: Lane = pool.lane("/gps", handled.append, size=1000)
+    for i in range(500):
+        lane.push(i)
+    _wait(lambda: len(handled) == 500)
+    assert handled == list(range(500))
+    assert lane.dropped == 0
+    assert lane.backlog == 0
+
+
+def test_workers_lane_drops_oldest():
+    pool: WorkerPool = WorkerPool(size=1)
+    release: Event = Event()
+    handled: List[int] = []
+
+    def _handle(i: int):
+        release.wait()
+        handled.append(i)
+
+    lane: Lane = pool.lane("/camera", _handle, size=3)
+    lane.push(0)
+    # wait for the worker to be stuck on the first item
+    _wait(lambda: lane.backlog == 0)
+    for i in range(1, 6):
+        lane.push(i)
+    assert lane.dropped == 2
+    release.set()
+    _wait(lambda: len(handled) == 4)
+    assert handled == [0, 3, 4, 5]
+
+
+def test_workers_lanes_in_parallel():
+    pool: WorkerPool = WorkerPool(size=2)
+    release: Event = Event()
+    handled: List[str] = []
+    # a slow lane does not hold the other lanes back
+    slow: Lane = pool.lane("/slow", lambda _: release.wait(), size=10)
+    fast: Lane = pool.lane("/fast", handled.append, size=10)
+    slow.push("a")
+    slow.push("b")
+    fast.push("c")
+    _wait(lambda: handled == ["c"])
+    assert slow.backlog == 1
+    release.set()
+    _wait(lambda: slow.backlog == 0)